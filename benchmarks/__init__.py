@@ -0,0 +1 @@
+"""Performance benchmarks for sql-cli-playground (run with `python -m benchmarks.run`)."""
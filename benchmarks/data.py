@@ -0,0 +1,64 @@
+"""
+Synthetic tables for the benchmarks. Every generator is seeded, so the same
+shape and row count always yields the same data.
+"""
+
+from __future__ import annotations
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+SEED = 20240501
+
+
+def tall(n: int) -> pd.DataFrame:
+    """Few numeric columns, many rows."""
+    rng = np.random.default_rng(SEED)
+    return pd.DataFrame({
+        "id": np.arange(n, dtype=np.int64),
+        "x": rng.random(n),
+        "y": rng.normal(size=n),
+        "k": rng.integers(0, 1000, n),
+    })
+
+
+def wide(n: int, n_cols: int = 100) -> pd.DataFrame:
+    """Many float columns."""
+    rng = np.random.default_rng(SEED)
+    return pd.DataFrame(rng.random((n, n_cols)), columns=[f"c{i:03d}" for i in range(n_cols)])
+
+
+def strings(n: int) -> pd.DataFrame:
+    """Mostly text: low-cardinality labels and unique free text."""
+    rng = np.random.default_rng(SEED)
+    words = np.array(["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"])
+    return pd.DataFrame({
+        "id": np.arange(n, dtype=np.int64),
+        "label": words[rng.integers(0, len(words), n)],
+        "text": pd.Series(rng.integers(0, 10 ** 9, n)).astype(str) + " item",
+        "code": pd.Series(rng.integers(0, 10 ** 6, n)).map("{:06d}".format),
+    })
+
+
+def mixed(n: int) -> pd.DataFrame:
+    """One column of each common dtype, with missing values."""
+    rng = np.random.default_rng(SEED)
+    value = rng.random(n)
+    value[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "id": np.arange(n, dtype=np.int64),
+        "value": value,
+        "flag": rng.random(n) < 0.5,
+        "when": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 10 ** 8, n), unit="s"),
+        "name": np.array(["north", "south", "east", "west"])[rng.integers(0, 4, n)],
+        "count": pd.array(rng.integers(0, 100, n), dtype="Int64"),
+    })
+
+
+SHAPES: dict[str, Callable[[int], pd.DataFrame]] = {
+    "tall": tall,
+    "wide": wide,
+    "strings": strings,
+    "mixed": mixed,
+}
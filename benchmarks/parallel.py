@@ -0,0 +1,89 @@
+"""
+Benchmark for parallel mode: aggregate queries over the `tall` table, run
+serially and with each number of worker processes.
+
+    python -m benchmarks.parallel                            # 1M rows, 1..CPUs workers
+    python -m benchmarks.parallel --rows 5e7 --workers 1,2,4,8
+
+For every worker count the table is split once (reported as `split`), then
+each query is timed; the best of the repeats is reported with its speedup
+over the serial run.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import time
+
+from src.engines import create_manager
+from src.manager import TableManager
+
+from .data import tall
+from .run import _parse_rows
+
+QUERIES = {
+    "count": "SELECT count(*) FROM t WHERE x > 0.5",
+    "sum_avg": "SELECT sum(x), avg(y), min(y), max(y) FROM t",
+    "group_by": "SELECT k, count(*), sum(x), avg(y) FROM t GROUP BY k",
+}
+
+
+def _best(mgr: TableManager, sql: str, repeat: int, parallel: bool) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if parallel:
+            mgr.stream(sql).frame()
+        else:
+            mgr.query(sql)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _default_workers() -> list[int]:
+    cpus = os.cpu_count() or 1
+    return sorted({1, *(2 ** i for i in range(1, cpus.bit_length()) if 2 ** i <= cpus), cpus})
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.parallel", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=_parse_rows, default=[1_000_000],
+                        help="comma-separated row counts (default: 1e6)")
+    parser.add_argument("--workers", type=_parse_rows, default=_default_workers(),
+                        help="comma-separated worker counts (default: 1, 2, 4, ... up to the CPUs)")
+    parser.add_argument("--queries", default=",".join(QUERIES),
+                        help=f"comma-separated subset of: {', '.join(QUERIES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (default: 3)")
+    args = parser.parse_args(argv)
+    queries = args.queries.split(",")
+    for name in queries:
+        if name not in QUERIES:
+            parser.error(f"unknown query '{name}'")
+
+    print(f"{os.cpu_count()} CPU(s)")
+    print(f"{'query':<10}{'rows':>12}{'workers':>9}{'split':>10}{'time':>11}{'speedup':>9}")
+    for rows in args.rows:
+        mgr = create_manager("sqlite")
+        mgr.create("t", tall(rows))
+        serial = {name: _best(mgr, QUERIES[name], args.repeat, False) for name in queries}
+        for name in queries:
+            print(f"{name:<10}{rows:>12,}{'serial':>9}{'':>10}{serial[name] * 1000:>9.1f}ms{1:>8.2f}x")
+        for workers in args.workers:
+            executor = mgr.enable_parallel(workers)
+            executor.min_rows = 0
+            try:
+                start = time.perf_counter()
+                mgr.stream(QUERIES[queries[0]]).frame()   # starts the workers and splits t
+                split = time.perf_counter() - start
+                for name in queries:
+                    best = _best(mgr, QUERIES[name], args.repeat, True)
+                    print(f"{name:<10}{rows:>12,}{workers:>9}{split:>9.2f}s"
+                          f"{best * 1000:>9.1f}ms{serial[name] / best:>8.2f}x")
+            finally:
+                mgr.disable_parallel()
+        mgr.conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Benchmark runner for the sync, query and render hot paths.
+
+    python -m benchmarks.run                                  # all ops, 10K and 100K rows
+    python -m benchmarks.run --rows 1e6,1e7 --shapes tall     # bigger tables
+    python -m benchmarks.run --save before.json
+    python -m benchmarks.run --compare before.json            # after a change
+
+Every (operation, shape, rows) case gets a fresh manager and in-memory
+database for each repeat. The best wall time over the repeats is reported as
+time and throughput. Peak memory is the extra Python-heap peak (tracemalloc,
+which includes numpy buffers) seen during one further run. Memory SQLite
+allocates for itself is not included.
+"""
+
+from __future__ import annotations
+import argparse
+from dataclasses import asdict, dataclass
+import io
+import json
+from pathlib import Path
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+
+from src import render
+from src.engines import ENGINES, create_manager
+from src.manager import TableManager
+
+from .data import SHAPES
+
+DEFAULT_ROWS = (10_000, 100_000)
+
+# An operation prepares a manager holding table "t" and returns the call to time
+Operation = Callable[[TableManager, pd.DataFrame], Callable[[], object]]
+
+
+def _pushed(mgr: TableManager, df: pd.DataFrame) -> None:
+    mgr.tables["t"] = df
+    mgr._push("t")
+
+
+def op_push(mgr, df):
+    mgr.tables["t"] = df
+    return lambda: mgr._push("t")
+
+
+def op_delta_push(mgr, df):
+    _pushed(mgr, df.copy())
+    changed = mgr.tables["t"]
+    step = max(len(changed) // 100, 1)     # 1% of rows
+    changed.iloc[::step, 0] = changed.iloc[::-step, 0].to_numpy()[: len(changed.iloc[::step])]
+    return mgr.push_all
+
+
+def op_pull(mgr, df):
+    _pushed(mgr, df)
+    return lambda: mgr._pull("t")
+
+
+def op_refresh_all(mgr, df):
+    _pushed(mgr, df)
+    return mgr.refresh_all
+
+
+def op_save(mgr, df):
+    mgr.tables["t"] = df
+    return lambda: mgr.save_all_to_temp(mgr.temp_dir)
+
+
+def op_load(mgr, df):
+    mgr.tables["t"] = df
+    mgr.save_all_to_temp(mgr.temp_dir)
+    del mgr.tables["t"]
+    return lambda: mgr.load("t")
+
+
+def op_query_all(mgr, df):
+    _pushed(mgr, df)
+    return lambda: mgr.query("SELECT * FROM t")
+
+
+def op_query_first_page(mgr, df):
+    _pushed(mgr, df)
+    return lambda: mgr.stream("SELECT * FROM t").page(0)
+
+
+def op_render(mgr, df):
+    console = Console(file=io.StringIO(), width=160)
+    return lambda: render.render_df(console, df)
+
+
+OPERATIONS: dict[str, Operation] = {
+    "push": op_push,
+    "delta_push": op_delta_push,
+    "pull": op_pull,
+    "refresh_all": op_refresh_all,
+    "save": op_save,
+    "load": op_load,
+    "query_all": op_query_all,
+    "query_first_page": op_query_first_page,
+    "render": op_render,
+}
+
+
+@dataclass
+class Result:
+    op: str
+    shape: str
+    rows: int
+    seconds: float          # best of the repeats
+    mean_seconds: float
+    rows_per_s: float
+    mb_per_s: float         # in-memory DataFrame size / best time
+    peak_mb: float          # extra traced heap during one run
+
+    @property
+    def key(self) -> tuple[str, str, int]:
+        return self.op, self.shape, self.rows
+
+
+def _time_once(op: Operation, df: pd.DataFrame, engine: str, temp_dir: Path,
+               traced: bool = False) -> float:
+    mgr = create_manager(engine, temp_dir)
+    try:
+        call = op(mgr, df)
+        if traced:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            call()
+            return (tracemalloc.get_traced_memory()[1] - base) / 1024 ** 2
+        start = time.perf_counter()
+        call()
+        return time.perf_counter() - start
+    finally:
+        mgr.close_result()
+        mgr.conn.close()
+
+
+def run_case(name: str, shape: str, rows: int, df: pd.DataFrame, engine: str,
+             repeat: int) -> Result:
+    with tempfile.TemporaryDirectory() as tmp:
+        op = OPERATIONS[name]
+        times = [_time_once(op, df, engine, Path(tmp)) for _ in range(repeat)]
+        tracemalloc.start()
+        try:
+            peak = _time_once(op, df, engine, Path(tmp), traced=True)
+        finally:
+            tracemalloc.stop()
+    best = min(times)
+    nbytes = df.memory_usage(index=True, deep=True).sum()
+    return Result(name, shape, rows, best, sum(times) / len(times),
+                  rows / best, nbytes / 1024 ** 2 / best, peak)
+
+
+def _metadata(engine: str) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "engine": engine, "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__, "machine": platform.machine()}
+
+
+def _print_results(results: list[Result], baseline: dict[tuple, dict] | None) -> None:
+    header = f"{'op':<17}{'shape':<9}{'rows':>11}{'time':>11}{'rows/s':>12}{'MB/s':>9}{'peak MB':>9}"
+    if baseline is not None:
+        header += f"{'vs base':>10}{'peak vs':>9}"
+    print(header)
+    for r in results:
+        line = (f"{r.op:<17}{r.shape:<9}{r.rows:>11,}{r.seconds * 1000:>9.1f}ms"
+                f"{r.rows_per_s:>12,.0f}{r.mb_per_s:>9.1f}{r.peak_mb:>9.1f}")
+        old = baseline.get(r.key) if baseline is not None else None
+        if old is not None:
+            # Positive = slower / more memory than the baseline
+            line += f"{(r.seconds / old['seconds'] - 1) * 100:>+9.0f}%"
+            line += f"{r.peak_mb - old['peak_mb']:>+9.1f}"
+        print(line)
+
+
+def _parse_rows(text: str) -> list[int]:
+    return [int(float(part)) for part in text.split(",") if part]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=_parse_rows, default=list(DEFAULT_ROWS),
+                        help="comma-separated row counts, e.g. 1e4,1e6 (default: 1e4,1e5)")
+    parser.add_argument("--shapes", default=",".join(SHAPES),
+                        help=f"comma-separated subset of: {', '.join(SHAPES)}")
+    parser.add_argument("--ops", default=",".join(OPERATIONS),
+                        help=f"comma-separated subset of: {', '.join(OPERATIONS)}")
+    parser.add_argument("--engine", choices=ENGINES, default="sqlite")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (default: 3)")
+    parser.add_argument("--save", type=Path, metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", type=Path, metavar="FILE",
+                        help="show changes against results saved earlier with --save")
+    args = parser.parse_args(argv)
+
+    shapes = args.shapes.split(",")
+    ops = args.ops.split(",")
+    for name in shapes:
+        if name not in SHAPES:
+            parser.error(f"unknown shape '{name}'")
+    for name in ops:
+        if name not in OPERATIONS:
+            parser.error(f"unknown operation '{name}'")
+
+    baseline = None
+    if args.compare:
+        saved = json.loads(args.compare.read_text())
+        baseline = {(r["op"], r["shape"], r["rows"]): r for r in saved["results"]}
+        print(f"Comparing against {args.compare} (commit {saved['meta'].get('commit')})")
+
+    results = []
+    for shape in shapes:
+        for rows in args.rows:
+            df = SHAPES[shape](rows)
+            for name in ops:
+                results.append(run_case(name, shape, rows, df, args.engine, args.repeat))
+    _print_results(results, baseline)
+
+    if args.save:
+        payload = {"meta": _metadata(args.engine), "results": [asdict(r) for r in results]}
+        args.save.write_text(json.dumps(payload, indent=2))
+        print(f"Saved {len(results)} results to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Index advisor for the SQLite mirror.
+
+Queries run through TableManager.stream() are planned with EXPLAIN QUERY PLAN
+before they run. Two things in a plan mean a missing index:
+
+  * `SCAN t` (no index) of a table the query filters on; the columns come
+    from comparisons with constants in the SQL text, equality ones first;
+  * `... USING AUTOMATIC ... INDEX (b=?)`, an index SQLite builds for the
+    one query and throws away afterwards.
+
+Each (table, columns) is counted, and once the same one has been seen
+ADVISE_AFTER times an index is suggested (or created, in auto mode).
+"""
+
+from __future__ import annotations
+from collections import Counter
+import re
+from typing import Iterable, Mapping, Sequence
+
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Plans with the same missing index before it is suggested
+ADVISE_AFTER = 3
+# Most columns suggested for one index
+MAX_INDEX_COLUMNS = 3
+
+# Older SQLite versions print "SCAN TABLE t" / "SEARCH TABLE t"
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+_AUTOMATIC = re.compile(r"^SEARCH (?:TABLE )?(\w+)(?: AS \w+)? USING AUTOMATIC .*INDEX \((.*)\)")
+_TERM = re.compile(r"(\w+)(=|>|<)")
+_FROM = re.compile(r"\b(?:FROM|JOIN)\s+\"?(\w+)\"?(?:\s+(?:AS\s+)?\"?(\w+)\"?)?", re.IGNORECASE)
+# `column <op> <literal or parameter>`; join conditions are left to the
+# automatic index SQLite reports for the inner table of the join
+_FILTER = re.compile(
+    r"(?:\b(\w+)\.)?\"?(\w+)\"?\s*(==|=|<>|!=|<=|>=|<|>|\bIN\b|\bBETWEEN\b|\bLIKE\b|\bIS\b)"
+    r"\s*(?=[-+\d'?:@$(]|NULL\b|TRUE\b|FALSE\b|NOT\b)",
+    re.IGNORECASE,
+)
+_NOT_ALIAS = {"where", "join", "on", "using", "left", "right", "inner", "outer", "cross",
+              "full", "natural", "group", "order", "limit", "union", "except", "intersect",
+              "having", "window", "as"}
+
+
+def _aliases(sql: str) -> dict[str, str]:
+    """Name or alias used in the query -> table name, for tables in FROM/JOIN."""
+    aliases = {}
+    for table, alias in _FROM.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in _NOT_ALIAS:
+            aliases[alias] = table
+    return aliases
+
+
+def _compared_columns(sql: str, table: str, names: Iterable[str],
+                      columns: Sequence[str]) -> tuple[str, ...]:
+    """Columns of `table` (known in the query as any of `names`) that the
+    query compares with a constant: equality comparisons first."""
+    equal, other = [], []
+    for qualifier, column, op in _FILTER.findall(sql):
+        if column not in columns or (qualifier and qualifier not in names):
+            continue
+        (equal if op in ("=", "==") or op.upper() == "IN" else other).append(column)
+    found = dict.fromkeys(equal + other)   # ordered, without duplicates
+    return tuple(found)[:MAX_INDEX_COLUMNS]
+
+
+class IndexAdvisor:
+    def __init__(self):
+        self.auto = False                   # create suggested indexes right away
+        self.counts: Counter[tuple[str, tuple[str, ...]]] = Counter()
+        self._hints: list[str] = []         # messages not shown to the user yet
+
+    def observe(self, sql: str, plan: Iterable[str],
+                tables: Mapping[str, Sequence[str]]) -> list[tuple[str, tuple[str, ...]]]:
+        """Count the missing indexes in a query plan (the detail column of
+        EXPLAIN QUERY PLAN) over managed tables `tables` (name -> columns).
+        Returns those seen ADVISE_AFTER times with this plan."""
+        aliases = _aliases(sql)
+        advised = []
+        for detail in plan:
+            if m := _SCAN.match(detail):
+                table = aliases.get(m[1], m[1])
+                if table not in tables:
+                    continue
+                names = {m[1], table} | {a for a, t in aliases.items() if t == table}
+                columns = _compared_columns(sql, table, names, tables[table])
+            elif m := _AUTOMATIC.match(detail):
+                table = aliases.get(m[1], m[1])
+                if table not in tables:
+                    continue
+                columns = tuple(dict.fromkeys(
+                    c for c, _ in _TERM.findall(m[2]) if c in tables[table]))[:MAX_INDEX_COLUMNS]
+            else:
+                continue
+            if not columns:
+                continue   # e.g. SELECT * FROM t: an index wouldn't help
+            key = (table, columns)
+            self.counts[key] += 1
+            if self.counts[key] == ADVISE_AFTER:
+                advised.append(key)
+        return advised
+
+    def hint(self, message: str) -> None:
+        self._hints.append(message)
+
+    def take_hints(self) -> list[str]:
+        """Messages about suggested or created indexes since the last call."""
+        hints, self._hints = self._hints, []
+        return hints
+
+    def suggestions(self) -> pd.DataFrame:
+        """Missing indexes seen at least ADVISE_AFTER times, most frequent first."""
+        rows = [(table, ", ".join(columns), n)
+                for (table, columns), n in self.counts.most_common() if n >= ADVISE_AFTER]
+        return pd.DataFrame(rows, columns=["table", "columns", "plans"])
@@ -0,0 +1,283 @@
+"""
+Non-interactive runner for mixed Python/SQL scripts (`sql -f script.sql`).
+
+split_script() cuts a script into the blocks the REPL would run, typed with
+router.classify: each /command line, each complete SQL statement, and each run
+of Python lines in between. run_script() executes them without a prompt and
+only syncs tables where the language changes:
+
+  * DataFrames a Python block could have changed (see _Script.reached) are
+    pushed just before SQL that names them, the rest before a /command or at
+    the end of the script;
+  * tables written by a run of SQL statements are marked pending when Python
+    or a /command comes next, and pulled only if that code uses them.
+
+Results go to `out`; errors and a timing breakdown per block go to `log`.
+"""
+
+from __future__ import annotations
+import ast
+import re
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from rich.console import Console
+
+from . import render
+from .lazy import lazy_import
+from .results import QueryResult
+from .router import (META_PATTERN, MetaCommand, PythonStmt, SqlBlock, classify, code_names,
+                     names_reached, opens_python_block)
+
+if TYPE_CHECKING:
+    from .manager import TableManager
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+Block = MetaCommand | SqlBlock | PythonStmt
+
+# A line (not indented) that starts a SQL statement; `update = 1` and `with
+# open(p) as fh:` (see router.opens_python_block) are Python
+_SQL_START = re.compile(
+    r"(?:SELECT|WITH|INSERT|REPLACE|UPDATE|DELETE|CREATE|DROP|ALTER|PRAGMA|EXPLAIN"
+    r"|VALUES|BEGIN|COMMIT|ROLLBACK|ANALYZE|VACUUM|ATTACH|DETACH)\b(?!\s*[=.(\[])",
+    re.IGNORECASE,
+)
+_QUERY_WORDS = ("SELECT", "PRAGMA", "WITH", "EXPLAIN", "VALUES")
+
+
+def _complete_python(lines: list[str]) -> bool:
+    """False while the Python lines so far end inside a string or brackets
+    (so a line of SQL text there belongs to the Python code)."""
+    try:
+        ast.parse("\n".join(lines))
+    except SyntaxError:
+        return False
+    return True
+
+
+def _statements(sql: str) -> list[str]:
+    """Split complete SQL text at the semicolons that end statements."""
+    statements, start = [], 0
+    for i, char in enumerate(sql):
+        if char == ";" and sqlite3.complete_statement(sql[start:i + 1]):
+            statements.append(sql[start:i + 1])
+            start = i + 1
+    return statements + [sql[start:]]
+
+
+def split_script(text: str) -> list[tuple[int, Block]]:
+    """(first line number, block) for each block of a script."""
+    blocks: list[tuple[int, Block]] = []
+    python: list[str] = []
+    sql: list[str] = []
+    start = 0
+
+    def flush(lines: list[str]) -> None:
+        code = "\n".join(lines)
+        for part in _statements(code) if lines is sql else [code]:
+            if part.strip():
+                blocks.append((start, classify(part)))
+        lines.clear()
+
+    for number, line in enumerate(text.splitlines(), 1):
+        if sql:
+            sql.append(line)
+            if sqlite3.complete_statement("\n".join(sql)):
+                flush(sql)
+            continue
+        at_boundary = not line[:1].isspace() and (not python or _complete_python(python))
+        if at_boundary and META_PATTERN.match(line):
+            flush(python)
+            start = number
+            blocks.append((number, classify(line)))
+        elif at_boundary and line.startswith("--"):
+            continue   # SQL comment between statements
+        elif at_boundary and _SQL_START.match(line) and not opens_python_block(line):
+            flush(python)
+            start = number
+            sql.append(line)
+            if sqlite3.complete_statement(line):
+                flush(sql)
+        else:
+            if not python:
+                if not line.strip():
+                    continue
+                start = number
+            python.append(line)
+    flush(python)
+    flush(sql)   # a last statement without ';'
+    return blocks
+
+
+class _Script:
+    def __init__(self, mgr: "TableManager", out: Console, log: Console):
+        self.mgr = mgr
+        self.out = out
+        self.log = log
+        self.namespace: dict[str, Any] = {"np": np, "pd": pd}
+        mgr.bind(self.namespace)
+        # Tables Python may have changed since they were last pushed
+        self.stale: set[str] = set()
+        # Tables written by SQL and not yet marked pending
+        self.written: set[str] = set()
+
+    def _render(self, value: Any) -> None:
+        if isinstance(value, pd.DataFrame):
+            render.render_df(self.out, value, render.MAX_ROWS)
+        else:
+            self.out.print(value)
+
+    def reached(self, names: set[str]) -> set[str]:
+        """Tables that code using `names` could change: the tables it names,
+        tables bound to other names it uses (also inside a list, tuple, set or
+        dict), and the tables reached by functions it calls."""
+        frames = {id(df): name for name, df in self.mgr.tables.items()}
+        reached: set[str] = set()
+        seen: set[str] = set()
+        todo = list(names)
+        while todo:
+            name = todo.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            if name in self.mgr.tables:
+                reached.add(name)
+                continue
+            value = self.namespace.get(name)
+            if isinstance(value, dict):
+                values = list(value.values())
+            elif isinstance(value, (list, tuple, set)):
+                values = list(value)
+            else:
+                values = [value]
+            for v in values:
+                if id(v) in frames:
+                    reached.add(frames[id(v)])
+                code = getattr(v, "__code__", None)
+                if code is not None:
+                    todo.extend(code_names(code))
+        return reached
+
+    def sync(self) -> None:
+        """Bring both sides fully up to date (before /commands and at the end)."""
+        timer = self.mgr.timings
+        if self.stale:
+            with timer.phase("push"):
+                self.mgr.push_all(self.stale)
+            self.stale.clear()
+        if self.written:
+            with timer.phase("pull"):
+                self.mgr.refresh(self.written)
+                self.mgr.bind(self.namespace)
+            self.written.clear()
+
+    def run_meta(self, block: MetaCommand) -> None:
+        self.sync()
+        with self.mgr.timings.phase("execute"):
+            out = block.execute(self.mgr)
+        if out is not None:
+            self._render(out)
+        if block.raw.split()[0] == "/clear_all":
+            self.namespace = {"np": np, "pd": pd}
+        self.mgr.bind(self.namespace)
+
+    def run_python(self, block: PythonStmt) -> None:
+        timer = self.mgr.timings
+        names = block.names()
+        with timer.phase("pull"):
+            if self.written:
+                self.mgr.refresh(self.written)
+                self.written.clear()
+                self.mgr.bind(self.namespace)
+            if isinstance(self.namespace.get("_"), QueryResult) and "_" in names:
+                self.namespace["_"] = self.namespace["_"].frame()
+            if self.mgr.materialize(names_reached(names, self.namespace)):
+                self.mgr.bind(self.namespace)
+        # Like a notebook cell, a block that ends in an expression shows its value
+        tree = ast.parse(block.code, "<script>")
+        last = tree.body.pop() if tree.body and isinstance(tree.body[-1], ast.Expr) else None
+        result = None
+        try:
+            with timer.phase("execute"):
+                exec(compile(tree, "<script>", "exec"), self.namespace)     # noqa: S102 exec is intended
+                if last is not None:
+                    expr = compile(ast.Expression(last.value), "<script>", "eval")
+                    result = self.namespace["_"] = eval(expr, self.namespace)
+        finally:
+            self.stale |= self.reached(names)
+        if result is not None:
+            with timer.phase("render"):
+                self._render(result)
+
+    def run_sql(self, block: SqlBlock) -> None:
+        timer = self.mgr.timings
+        sql = block.sql
+        # Tables the statement reaches, also through views and triggers; if
+        # that can't be worked out, every stale table is pushed
+        used = self.mgr.tables_used(sql) if self.stale else set()
+        needed = set(self.stale) if used is None else self.stale & used
+        if needed:
+            with timer.phase("push"):
+                self.mgr.push_all(needed)
+            self.stale -= needed
+        with self.mgr.track_writes() as written, timer.phase("execute"):
+            try:
+                if sql.split()[0].upper() in _QUERY_WORDS:
+                    result = self.mgr.stream(sql)
+                    self.namespace["_"] = result.frame() if result.complete else result
+                else:
+                    result = None
+                    self.mgr.execute(sql)
+            finally:
+                self.written |= written
+        if result is not None:
+            with timer.phase("render"):
+                page = result.page(0)
+                self._render(page.frame)
+                if page.has_more:
+                    self.out.print(f"[grey62]First {len(page.frame)} rows; "
+                                   "use _ in Python for all of them.[/]")
+        for hint in self.mgr.advisor.take_hints():
+            self.log.print(f"[grey50]Hint: {hint}[/]")
+
+
+def run_script(mgr: "TableManager", blocks: list[tuple[int, Block]], out: Console,
+               log: Console, save_dir: Path | None = None) -> int:
+    """Run the blocks of a script in order and return an exit status: 0, or
+    1 after the first block that fails. /exit ends the script early, saving
+    the tables to save_dir like the REPL does (unless it is None)."""
+    script = _Script(mgr, out, log)
+    timer = mgr.timings
+    status = 0
+    try:
+        for number, (line, block) in enumerate(blocks, 1):
+            kind = {MetaCommand: "meta", SqlBlock: "sql", PythonStmt: "python"}[type(block)]
+            timer.start()
+            timer.kind = kind
+            try:
+                if isinstance(block, MetaCommand):
+                    script.run_meta(block)
+                elif isinstance(block, SqlBlock):
+                    script.run_sql(block)
+                else:
+                    script.run_python(block)
+            except SystemExit:
+                if save_dir is not None:
+                    script.sync()
+                    mgr.save_all_to_temp(save_dir)
+                break
+            except Exception as e:
+                log.print(f"[red]Error in block {number} ({kind}, line {line}): "
+                          f"{type(e).__name__}: {e}[/]")
+                status = 1
+                break
+            finally:
+                log.print(f"[grey50]#{number} {kind} (line {line}): {timer.finish()}[/]",
+                          soft_wrap=True)
+    finally:
+        # Leave the database (e.g. a workspace file) matching the DataFrames
+        script.sync()
+    return status
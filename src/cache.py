@@ -0,0 +1,112 @@
+"""
+LRU cache of query results.
+
+Entries are keyed on normalized SQL text and remember the version of every
+table the query read (see TableManager.versions); an entry only counts as a
+hit while all of those tables are unchanged. Total size is bounded by the
+in-memory size of the cached DataFrames.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+import re
+from typing import Mapping
+
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+
+# Default memory budget for cached results
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# String literals and quoted identifiers, which normalization must leave alone
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+# Queries whose result can differ between runs over unchanged tables:
+# non-deterministic functions, and reads of the engine's own catalog
+_UNCACHEABLE = re.compile(
+    r"\b(?:random\w*|changes|total_changes|last_insert_rowid|now|current_\w+"
+    r"|uuid\w*|gen_random_uuid|sqlite_master|sqlite_schema|sqlite_temp_master"
+    r"|information_schema|duckdb_\w+)\b|'now'",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """Cache key for sql: whitespace collapsed, keywords and identifiers
+    lower-cased and trailing semicolons dropped, quoted text kept verbatim."""
+    parts = _QUOTED.split(sql.strip().rstrip(";").strip())
+    # split() with a capturing group alternates plain text and quoted text
+    for i in range(0, len(parts), 2):
+        parts[i] = " ".join(parts[i].split()).lower()
+    return "".join(parts)
+
+
+def is_cacheable(sql: str) -> bool:
+    return _UNCACHEABLE.search(sql) is None
+
+
+@dataclass
+class _Entry:
+    frame: pd.DataFrame
+    versions: dict[str, int]   # table -> version when the result was computed
+    nbytes: int
+
+
+class ResultCache:
+    """LRU map from normalized SQL to result DataFrame, bounded by max_bytes."""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, sql: str, versions: Mapping[str, int]) -> pd.DataFrame | None:
+        """Cached result for sql if every table it read still has the version
+        it had then (a table that no longer exists never matches)."""
+        key = normalize_sql(sql)
+        entry = self._entries.get(key)
+        if entry is not None and any(versions.get(t) != v for t, v in entry.versions.items()):
+            self._evict(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Shallow copy: edits to the returned frame copy-on-write instead of
+        # changing the cached one
+        return entry.frame.copy(deep=False)
+
+    def put(self, sql: str, frame: pd.DataFrame, versions: Mapping[str, int]) -> None:
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return   # would evict everything else
+        key = normalize_sql(sql)
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = _Entry(frame.copy(deep=False), dict(versions), nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        self.nbytes -= self._entries.pop(key).nbytes
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "n/a"
+        return (f"{len(self)} result(s), {self.nbytes / 1024 ** 2:.1f} of "
+                f"{self.max_bytes / 1024 ** 2:.0f} MiB; "
+                f"{self.hits} hit(s), {self.misses} miss(es), hit rate {rate}")
@@ -7,64 +7,114 @@ between Python and SQL, plus `/meta` commands.
 
 from __future__ import annotations
 
+import argparse
+import cProfile
+import io
+import pstats
 import sqlite3
 import sys
 from typing import Dict, Any
 
-import numpy as np
-import pandas as pd
 from prompt_toolkit import PromptSession
-from prompt_toolkit.history import FileHistory
+from prompt_toolkit.history import FileHistory, ThreadedHistory
 from prompt_toolkit.patch_stdout import patch_stdout
-from prompt_toolkit.completion import WordCompleter
 from prompt_toolkit.key_binding import KeyBindings
 from rich.console import Console
-from rich.table import Table
 from pathlib import Path  # Import Path
 
+from .batch import run_script, split_script
+from .cache import CACHE_MAX_BYTES, is_cacheable
+from .engines import ENGINES, create_manager
+from .lazy import lazy_import
 from .manager import TableManager
-from .router import classify, MetaCommand, SqlBlock, PythonStmt
+from . import render
+from .completer import TableCompleter
+from .jobs import BackgroundQuery, Cancelled, inline_jobs, run_job
+from .results import Page, QueryResult, StaleResult
+from .router import classify, MetaCommand, SqlBlock, PythonStmt, names_reached
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 console = Console()
 # Expand the tilde in the history file path
 HISTORY_FILE = Path("~/.sqlplayground_history").expanduser()
-HISTORY = FileHistory(str(HISTORY_FILE)) # Pass the expanded path string
 
 # Define the temporary directory path relative to this file
 TEMP_TABLE_DIR = Path(__file__).parent / "TEMP_TABLES"
 
-def _build_completer(tbl_mgr: TableManager) -> WordCompleter:
-    words = set(tbl_mgr.tables.keys()) | {
-        "SELECT", "FROM", "WHERE", "LIMIT", "INSERT", "UPDATE", "PRAGMA",
-        "table_info", "CREATE", "DROP", "DELETE", "COALESCE", "AS", "GROUP BY", "ORDER BY",
-        "JOIN", "LEFT JOIN", "RANDOM()", "LAG()", "OVER()", "COUNT()", 
-        "SUM()", "AVG()", "MAX()", "MIN()", "DISTINCT", "PRECEDING", "CURRENT ROW",
-        "HAVING", "CASE", "WHEN","THEN", "ELSE", "END", "CROSS JOIN", "NULLIF", 
-        "WITH", "RECURSIVE", "UNION", "EXCEPT", "INTERSECT", "JSON_EXTRACT()", "LIKE"}
-    # words |= set(dir(np)) | set(dir(pd)) - uncomment to add numpy/pandas functions to auto-completer
-    # include column names from all active tables
-    for df in tbl_mgr.tables.values():
-        words |= set(map(str, df.columns))
-    return WordCompleter(list(words), ignore_case=True)
+# Functions listed by /profile
+PROFILE_TOP = 20
 
+# Statements /bg accepts: queries only, so nothing needs refreshing afterwards
+BACKGROUND_WORDS = ("SELECT", "WITH", "VALUES", "PRAGMA", "EXPLAIN")
 
 def _render_df(df: pd.DataFrame | None) -> None:
-    if df is None or df.empty:
-        console.print("[grey50]No results.[/]")
+    render.render_df(console, df, render.MAX_ROWS)
+
+
+def _render_page(page: Page, result: QueryResult) -> None:
+    _render_df(page.frame)
+    if page.start == 0 and not page.has_more:
         return
-    table = Table(show_header=True, header_style="bold cyan")
-    for col in df.columns:
-        table.add_column(str(col))
-    for _, row in df.head(50).iterrows():          # cap preview
-        table.add_row(*map(lambda x: str(x)[:40], row))
-    console.print(table)
-    if len(df) > 50:
-        console.print(f"[grey62]... {len(df) - 50} more rows[/]")
+    hints = ["/next for more"] if page.has_more else []
+    if page.start > 0:
+        hints.append("/prev")
+    if not result.complete:
+        hints.append("use _ to load all rows")
+    end = page.start + len(page.frame)
+    console.print(f"[grey62]Rows {page.start + 1}-{end}. {', '.join(hints)}[/]")
+
+
+def _print_profile(profiler: cProfile.Profile) -> None:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(PROFILE_TOP)
+    console.print(out.getvalue().strip(), markup=False, highlight=False, soft_wrap=True)
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="sql", description="Interactive Python + SQL playground")
+    parser.add_argument("--engine", choices=ENGINES, default="sqlite",
+                        help="SQL engine: 'sqlite' mirrors tables into SQLite (default), "
+                             "'duckdb' queries the DataFrames in place")
+    parser.add_argument("--max-rows", type=int, default=render.MAX_ROWS, metavar="N",
+                        help=f"rows shown per result page (default: {render.MAX_ROWS})")
+    parser.add_argument("--workspace", type=Path, metavar="PATH",
+                        help="keep tables in this SQLite file so they persist across sessions")
+    parser.add_argument("--cache-mb", type=int, default=CACHE_MAX_BYTES // 1024 ** 2, metavar="MB",
+                        help="memory for cached query results; 0 disables the cache "
+                             f"(default: {CACHE_MAX_BYTES // 1024 ** 2})")
+    parser.add_argument("-f", "--file", metavar="SCRIPT",
+                        help="run a script of Python, SQL and /commands without the prompt "
+                             "and exit ('-' reads standard input); timings go to stderr")
+    return parser.parse_args(argv)
 
 
-def main() -> None:
-    conn = sqlite3.connect(":memory:", check_same_thread=False)
-    tables = TableManager(conn, TEMP_TABLE_DIR)
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    try:
+        tables = create_manager(args.engine, TEMP_TABLE_DIR, args.workspace)
+    except (RuntimeError, ValueError, sqlite3.Error) as e:
+        console.print(f"[red]Error: {e}[/]")
+        sys.exit(1)
+    render.MAX_ROWS = tables.page_size = args.max_rows
+    tables.result_cache.max_bytes = args.cache_mb * 1024 ** 2
+
+    if args.file is not None:
+        log = Console(stderr=True)
+        try:
+            script = sys.stdin.read() if args.file == "-" else Path(args.file).read_text()
+        except OSError as e:
+            log.print(f"[red]Error: {e}[/]")
+            sys.exit(1)
+        try:
+            status = run_script(tables, split_script(script), console, log,
+                                None if args.workspace else TEMP_TABLE_DIR)
+        except KeyboardInterrupt:
+            log.print("[yellow]Interrupted.[/]")
+            status = 130
+        sys.exit(status)
 
     # --- Add custom key bindings ---
     kb = KeyBindings()
@@ -89,53 +139,78 @@ def main() -> None:
         event.current_buffer.validate_and_handle()
     # -----------------------------
 
-    psession = PromptSession(history=HISTORY, completer=_build_completer(tables),
+    # Completion index, updated incrementally as tables change
+    completer = TableCompleter()
+    completer.sync(tables.table_columns())
+    # Past entries are read on a background thread instead of before the first prompt
+    history = ThreadedHistory(FileHistory(str(HISTORY_FILE)))
+    psession = PromptSession(history=history, completer=completer,
                              multiline=True,
                              prompt_continuation="... ",
                              key_bindings=kb) # Pass bindings to session
 
-    banner = "[italic cyan]SQL-playground — mix Python & SQL.  /help for commands[/]"
+    banner = f"[italic cyan]SQL-playground ({args.engine}) — mix Python & SQL.  /help for commands[/]"
     console.print(banner)
+    if args.workspace:
+        console.print(f"[grey50]Workspace {args.workspace}: {len(tables.pending)} table(s) restored.[/]")
 
     # Start with core modules + empty tables dict, update as tables are added/removed
-    globals_ns: Dict[str, Any] = {"np": np, "pd": pd, **tables.tables}
+    globals_ns: Dict[str, Any] = {"np": np, "pd": pd}
+    tables.bind(globals_ns)
 
-    while True:
-        prompt = f"(tables: {list(tables.tables)}) >> "
-        try:
-            # with patch_stdout(): # Removed for testing
-            text = psession.prompt(prompt)
-        except KeyboardInterrupt:
-            console.print("\n[bold]Interrupted. Use /exit or Ctrl-D to quit.[/]")
-            continue # Go back to prompt
-        except EOFError:
-            console.print("\n[bold]Bye![/]")
-            sys.exit(0)
+    timer = tables.timings
 
-        block = classify(text)
+    def handle(text: str) -> None:
+        """Run one submitted block, timing each phase into `timer`."""
+        nonlocal globals_ns
+        with timer.phase("classify"):
+            block = classify(text)
 
         # -- META ----------------------------------------------------------------
         if isinstance(block, MetaCommand):
+            timer.kind = "meta"
             try:
-                out = block.execute(tables)
-                if isinstance(out, pd.DataFrame):
-                    _render_df(out)
-                elif out is not None: # Could be list of tables or help string
-                    console.print(out)
+                # On the worker thread: /load and /save_all can take a while
+                with timer.phase("execute"):
+                    out = run_job(lambda: block.execute(tables), tables, console, block.raw.split()[0])
+                with timer.phase("render"):
+                    if isinstance(out, Page):
+                        _render_page(out, tables.last_result)
+                    elif isinstance(out, (str, list)):
+                        console.print(out)   # checked first: pd.DataFrame would import pandas
+                    elif isinstance(out, pd.DataFrame):
+                        _render_df(out)
+                    elif out is not None: # Could be list of tables or help string
+                        console.print(out)
                 # Reset Python context on clear_all
                 if block.raw.strip() == "/clear_all":
                     globals_ns = {"np": np, "pd": pd}
                 # Update globals and completer
-                globals_ns.update(tables.tables)
-                psession.completer = _build_completer(tables)
+                tables.bind(globals_ns)
+                with timer.phase("completer"):
+                    completer.sync(tables.table_columns())
             except (ValueError, FileNotFoundError, sqlite3.Error) as e:
                 console.print(f"[red]Error: {e}[/]")
+            except Cancelled:
+                console.print("[yellow]Cancelled.[/]")
+                tables.bind(globals_ns)
             except SystemExit:
+                if args.workspace:
+                    # Every change is already committed to the workspace file
+                    console.print(f"[grey50]Tables kept in workspace {args.workspace}.[/]")
+                    console.print("\n[bold]Bye![/]")
+                    sys.exit(0)
                 # --- Save tables to TEMP_TABLE_DIR on exit ---
                 console.print(f"[grey50]Saving tables to {TEMP_TABLE_DIR}...[/]")
+                saved: set[str] = set()
                 try:
-                    tables.save_all_to_temp(TEMP_TABLE_DIR)
+                    run_job(lambda: tables.save_all_to_temp(TEMP_TABLE_DIR, saved=saved), tables,
+                            console, "Saving tables")
                     console.print(f"[grey50]Saved {len(tables.tables)} table(s).[/]")
+                except Cancelled:
+                    unsaved = [name for name in tables.list() if name not in saved]
+                    console.print(f"[yellow]Save cancelled; files already written are complete. "
+                                  f"Not saved: {', '.join(unsaved) or 'none'}.[/]")
                 except Exception as e:
                     console.print(f"[red]Error saving tables: {e}[/]")
                 # ----------------------------------------------
@@ -144,67 +219,224 @@ def main() -> None:
             except Exception as e: # Catch unexpected errors
                  console.print(f"[bold red]Unexpected Error:[/]\n[red]{type(e).__name__}: {e}[/]")
                  console.print_exception(max_frames=1)
-            continue
+            return
 
         # -- PYTHON --------------------------------------------------------------
         if isinstance(block, PythonStmt):
+            timer.kind = "python"
+            with timer.phase("pull"):
+                # A streamed SQL result is materialized into `_` on first use
+                if isinstance(globals_ns.get("_"), QueryResult) and "_" in block.names():
+                    try:
+                        globals_ns["_"] = run_job(globals_ns["_"].frame, tables, console, "Fetching")
+                    except Cancelled:
+                        console.print("[yellow]Cancelled.[/]")
+                        return
+                    except StaleResult as e:
+                        del globals_ns["_"]
+                        console.print(f"[red]Error: {e}[/]")
+                        return
+                # Pending tables the code names are pulled up front, so it sees real
+                # DataFrames; any other use goes through their proxies
+                if tables.materialize(names_reached(block.names(), globals_ns)):
+                    tables.bind(globals_ns)
             try:
                 # Try to compile as expression
                 expr_code = compile(block.code, '<input>', 'eval')
             except SyntaxError:
-                # Not an expression; execute as statement
-                try:
-                    exec(block.code, globals_ns)     # noqa: S102 exec is intended
-                except Exception as py_exec_e:
-                    console.print("[bold red]>>> Python Execution Error:[/]")
-                    console.print(f"[red]{type(py_exec_e).__name__}: {py_exec_e}[/]")
-                    console.print("[bold red]>>> Traceback:[/]")
-                    console.print_exception(max_frames=10)
-            else:
-                # It's an expression; evaluate and display result
-                result = eval(expr_code, globals_ns)
-                globals_ns['_'] = result
-                if result is not None:
-                    if isinstance(result, pd.DataFrame):
-                        _render_df(result)
-                    else:
-                        console.print(result)
+                expr_code = None   # Not an expression; execute as statement
+            try:
+                # Python runs on this (main) thread, where Ctrl-C raises KeyboardInterrupt
+                if expr_code is None:
+                    with timer.phase("execute"):
+                        exec(block.code, globals_ns)     # noqa: S102 exec is intended
+                else:
+                    # It's an expression; evaluate and display result
+                    with timer.phase("execute"):
+                        result = eval(expr_code, globals_ns)
+                    globals_ns['_'] = result
+                    if result is not None:
+                        with timer.phase("render"):
+                            if isinstance(result, pd.DataFrame):
+                                _render_df(result)
+                            else:
+                                console.print(result)
+            except KeyboardInterrupt:
+                console.print("[yellow]Interrupted.[/]")
+            except Exception as py_exec_e:
+                console.print("[bold red]>>> Python Execution Error:[/]")
+                console.print(f"[red]{type(py_exec_e).__name__}: {py_exec_e}[/]")
+                console.print("[bold red]>>> Traceback:[/]")
+                console.print_exception(max_frames=10)
             finally:
                 # Always push changes after Python execution attempt
                 try:
-                    tables.push_all()
+                    with timer.phase("push"):
+                        run_job(tables.push_all, tables, console, "Syncing tables")
+                except Cancelled:
+                    console.print("[yellow]Sync cancelled; changed tables will be pushed next time.[/]")
                 except sqlite3.Error as e:
                     console.print(f"[red]DB sync error after Python: {e}[/]")
-            continue
+                # Cheap when no columns changed: only altered tables are re-indexed
+                with timer.phase("completer"):
+                    completer.sync(tables.table_columns())
+            return
 
         # -- SQL -----------------------------------------------------------------
         if isinstance(block, SqlBlock):
+            timer.kind = "sql"
             sql = block.sql
             first_word = sql.strip().split()[0].upper()
             df_result = None
-            if first_word in ("SELECT", "PRAGMA", "WITH", "EXPLAIN"):
-                try:
-                    df_result = pd.read_sql_query(sql, conn)
+            first_page = None
+            # Identical queries over unchanged tables are answered from the cache
+            cacheable = first_word in ("SELECT", "WITH") and is_cacheable(sql)
+            if cacheable and tables.result_cache.max_bytes:
+                with timer.phase("execute"):
+                    df_result = tables.result_cache.get(sql, tables.versions)
+                if df_result is not None:
+                    tables.close_result()
+                    tables.last_result = None
                     globals_ns["_"] = df_result
-                    # _render_df(df_result)
-                except Exception as e:
-                    console.print(f"[red]SQL Error: {type(e).__name__}: {e}[/]")
-            else:
+                    with timer.phase("render"):
+                        _render_df(df_result)
+                    console.print("[grey50](cached result)[/]")
+                    return
+            with tables.track_writes() as written, timer.phase("execute"):
+                if first_word in ("SELECT", "PRAGMA", "WITH", "EXPLAIN"):
+                    try:
+                        # Fetch only the first page; the full DataFrame is built
+                        # when `_` is used or the result is paged to the end.
+                        result = run_job(lambda: tables.stream(sql), tables, console)
+                        if result.complete:
+                            df_result = result.frame()
+                            globals_ns["_"] = df_result
+                        else:
+                            first_page = result.page(0)
+                            globals_ns["_"] = result
+                    except Cancelled:
+                        console.print("[yellow]Cancelled.[/]")
+                    except Exception as e:
+                        console.print(f"[red]SQL Error: {type(e).__name__}: {e}[/]")
+                else:
+                    try:
+                        run_job(lambda: tables.execute(sql), tables, console)
+                        console.print("[green]OK.[/]")
+                    except Cancelled:
+                        console.print("[yellow]Cancelled.[/]")
+                    except Exception as e:
+                        console.print(f"[red]SQL Error: {type(e).__name__}: {e}[/]")
+
+                # Only complete results are cached; longer ones stay streamed
+                if cacheable and df_result is not None and not written:
+                    versions = tables.read_versions(sql)
+                    if versions is not None:
+                        tables.result_cache.put(sql, df_result, versions)
+
+            # Tables the SQL could have modified (none for plain SELECTs) become
+            # proxies, pulled again only when Python uses them
+            if written:
                 try:
-                    conn.executescript(sql)
-                    conn.commit()
-                    console.print("[green]OK.[/]")
+                    with timer.phase("pull"):
+                        tables.refresh(written)
+                        tables.bind(globals_ns)
+                    with timer.phase("completer"):
+                        completer.sync(tables.table_columns())
                 except sqlite3.Error as e:
-                    console.print(f"[red]SQL Error: {type(e).__name__}: {e}[/]")
+                    console.print(f"[red]DB sync error after SQL: {e}[/]")
+
+            with timer.phase("render"):
+                if first_page is not None:
+                    _render_page(first_page, result)
+                elif df_result is not None:
+                    _render_df(df_result)
+                for hint in tables.advisor.take_hints():
+                    console.print(f"[grey50]Hint: {hint}[/]")
+
+    # Query started with /bg; other commands wait for it before using the engine
+    background: BackgroundQuery | None = None
+
+    def collect(job: BackgroundQuery) -> None:
+        try:
+            df = job.result()
+        except Exception as e:
+            if job.cancelled:
+                console.print("[yellow]Background query cancelled.[/]")
+            else:
+                console.print(f"[red]Background query failed: {type(e).__name__}: {e}[/]")
+            return
+        globals_ns["_"] = df
+        console.print(f"[grey50]Background query done after {job.elapsed():.1f}s: "
+                      f"{len(df):,} row(s) in _[/]")
+
+    def run_background(arg: str) -> BackgroundQuery | None:
+        """/bg [<query>|cancel]; returns the query started, if any."""
+        if not arg:
+            console.print(str(background) if background is not None else "No background query.")
+        elif arg == "cancel":
+            if background is None:
+                console.print("No background query.")
+            else:
+                background.cancel()
+        elif background is not None:
+            console.print("[red]Error: A background query is already running (/bg cancel stops it).[/]")
+        elif arg.split()[0].upper() not in BACKGROUND_WORDS:
+            console.print("[red]Error: Only queries (SELECT, WITH, ...) can run in the background.[/]")
+        else:
+            console.print("[grey50]Running in the background; the result goes to _ when done "
+                          "(/bg shows progress).[/]")
+            return BackgroundQuery(arg.rstrip().rstrip(";"), tables)
+        return None
 
+    while True:
+        if background is not None and background.done():
+            collect(background)
+            background = None
+        prompt = f"(tables: {tables.list()}) >> "
+        try:
+            # with patch_stdout(): # Removed for testing
+            text = psession.prompt(prompt)
+        except KeyboardInterrupt:
+            console.print("\n[bold]Interrupted. Use /exit or Ctrl-D to quit.[/]")
+            continue # Go back to prompt
+        except EOFError:
+            if background is not None:
+                background.cancel()
+            console.print("\n[bold]Bye![/]")
+            sys.exit(0)
+
+        stripped = text.strip()
+        if stripped == "/bg" or stripped.startswith("/bg "):
+            background = run_background(stripped[3:].strip()) or background
+            continue
+        if background is not None:
+            # The connection is busy: wait (Ctrl-C leaves the query running)
             try:
-                tables.refresh_all()
-                globals_ns.update(tables.tables)
-                psession.completer = _build_completer(tables)
-            except sqlite3.Error as e:
-                console.print(f"[red]DB sync error after SQL: {e}[/]")
+                background.wait(console)
+            except Cancelled:
+                console.print("[yellow]Still running in the background; /bg cancel stops it.[/]")
+                continue
+            collect(background)
+            background = None
 
-            if df_result is not None:
-                _render_df(df_result)
+        # /profile <command> runs one command under cProfile
+        profiler = None
+        if text.lstrip().startswith("/profile"):
+            text = text.lstrip().removeprefix("/profile").strip()
+            if not text:
+                console.print("[red]Error: Usage: /profile <SQL, Python or /command>[/]")
+                continue
+            profiler = cProfile.Profile()
 
-            continue 
\ No newline at end of file
+        timer.start()
+        if profiler is None:
+            handle(text)
+        else:
+            # Jobs run on this thread so the profiler sees the SQL work too
+            with inline_jobs():
+                profiler.runcall(handle, text)
+        breakdown = timer.finish()
+        if timer.show:
+            console.print(f"[grey50]{breakdown}[/]", soft_wrap=True)
+        if profiler is not None:
+            _print_profile(profiler)
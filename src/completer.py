@@ -0,0 +1,145 @@
+"""
+Prompt completer backed by a persistent prefix index.
+
+The index is updated per table, and only when that table's columns change,
+instead of being rebuilt from every column of every table after each command.
+Columns of tables mentioned in the current input are offered first.
+"""
+
+from __future__ import annotations
+import re
+from typing import Iterable, Mapping, Sequence
+
+from prompt_toolkit.completion import CompleteEvent, Completer, Completion
+from prompt_toolkit.document import Document
+
+SQL_KEYWORDS = (
+    "SELECT", "FROM", "WHERE", "LIMIT", "INSERT", "UPDATE", "PRAGMA",
+    "table_info", "CREATE", "DROP", "DELETE", "COALESCE", "AS", "GROUP BY", "ORDER BY",
+    "JOIN", "LEFT JOIN", "RANDOM()", "LAG()", "OVER()", "COUNT()",
+    "SUM()", "AVG()", "MAX()", "MIN()", "DISTINCT", "PRECEDING", "CURRENT ROW",
+    "HAVING", "CASE", "WHEN", "THEN", "ELSE", "END", "CROSS JOIN", "NULLIF",
+    "WITH", "RECURSIVE", "UNION", "EXCEPT", "INTERSECT", "JSON_EXTRACT()", "LIKE",
+)
+
+_IDENTIFIER = re.compile(r"\w+")
+
+
+class PrefixTrie:
+    """Case-insensitive prefix index of words, reference counted so the same
+    word (e.g. a column shared by several tables) can be added more than once."""
+
+    __slots__ = ("children", "words")
+
+    def __init__(self):
+        self.children: dict[str, PrefixTrie] = {}
+        self.words: dict[str, int] = {}   # words ending at this node -> refcount
+
+    def add(self, word: str) -> None:
+        node = self
+        for ch in word.lower():
+            node = node.children.setdefault(ch, PrefixTrie())
+        node.words[word] = node.words.get(word, 0) + 1
+
+    def remove(self, word: str) -> None:
+        path = [self]
+        for ch in word.lower():
+            node = path[-1].children.get(ch)
+            if node is None:
+                return
+            path.append(node)
+        node = path[-1]
+        if word not in node.words:
+            return
+        node.words[word] -= 1
+        if node.words[word] == 0:
+            del node.words[word]
+        # Prune branches that no longer lead to any word
+        for parent, ch in zip(reversed(path[:-1]), reversed(word.lower())):
+            child = parent.children[ch]
+            if child.words or child.children:
+                break
+            del parent.children[ch]
+
+    def starting_with(self, prefix: str) -> Iterable[str]:
+        node = self
+        for ch in prefix.lower():
+            node = node.children.get(ch)
+            if node is None:
+                return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield from node.words
+            stack.extend(node.children.values())
+
+
+class TableCompleter(Completer):
+    """Completes SQL keywords, table names and column names."""
+
+    def __init__(self, keywords: Iterable[str] = SQL_KEYWORDS):
+        self._trie = PrefixTrie()
+        self._keywords = set(keywords)
+        for word in self._keywords:
+            self._trie.add(word)
+        self._columns: dict[str, Sequence[str]] = {}    # table -> columns as last indexed
+        self._tables_of: dict[str, set[str]] = {}       # column -> tables having it
+
+    def sync(self, tables: Mapping[str, Sequence[str]]) -> None:
+        """Bring the index in line with `tables` (table -> column names, e.g.
+        TableManager.table_columns()), touching only tables that were added,
+        dropped, or whose columns changed."""
+        for name in set(self._columns) - set(tables):
+            self._remove_table(name)
+        for name, columns in tables.items():
+            old = self._columns.get(name)
+            if old is not None and (old is columns or list(old) == list(columns)):
+                continue
+            if old is not None:
+                self._remove_table(name)
+            self._add_table(name, columns)
+
+    def _add_table(self, name: str, columns: Sequence[str]) -> None:
+        self._columns[name] = columns
+        self._trie.add(name)
+        for col in set(map(str, columns)):
+            self._trie.add(col)
+            self._tables_of.setdefault(col, set()).add(name)
+
+    def _remove_table(self, name: str) -> None:
+        columns = self._columns.pop(name)
+        self._trie.remove(name)
+        for col in set(map(str, columns)):
+            self._trie.remove(col)
+            owners = self._tables_of[col]
+            owners.discard(name)
+            if not owners:
+                del self._tables_of[col]
+
+    def _rank(self, word: str, mentioned: set[str]) -> tuple[int, str]:
+        owners = self._tables_of.get(word, set())
+        if owners & mentioned:
+            return 0, word.lower()   # column of a table the statement uses
+        if word in self._columns:
+            return 1, word.lower()
+        if word in self._keywords:
+            return 2, word.lower()
+        return 3, word.lower()
+
+    def _meta(self, word: str, mentioned: set[str]) -> str:
+        owners = self._tables_of.get(word)
+        if owners:
+            return "column of " + ", ".join(sorted(owners & mentioned or owners)[:3])
+        if word in self._columns:
+            return "table"
+        return "keyword" if word in self._keywords else ""
+
+    def get_completions(self, document: Document,
+                        complete_event: CompleteEvent) -> Iterable[Completion]:
+        prefix = document.get_word_before_cursor()
+        if not prefix and not complete_event.completion_requested:
+            return
+        mentioned = set(_IDENTIFIER.findall(document.text)) & set(self._columns)
+        for word in sorted(self._trie.starting_with(prefix), key=lambda w: self._rank(w, mentioned)):
+            yield Completion(word, start_position=-len(prefix),
+                             display_meta=self._meta(word, mentioned))
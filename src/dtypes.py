@@ -0,0 +1,137 @@
+"""
+Column dtypes across a SQL round trip.
+
+SQLite only knows integers, floats and text, so a pulled table comes back as
+int64, float64 and strings whatever it was before: categoricals, small
+integers, booleans and datetimes all grow. restore_dtypes() converts the
+columns of a pulled table back to the dtypes they had when it was last synced
+from pandas, wherever the values still fit. dtypes_to_json() and
+dtypes_from_json() let an on-disk workspace keep them across sessions.
+plain_nbytes() estimates what a table would take with the plain dtypes, for
+the /memory report.
+"""
+
+from __future__ import annotations
+import json
+import sys
+from typing import Mapping
+
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Size of a Python str object beyond its characters (ASCII)
+_STR_OVERHEAD = sys.getsizeof("")
+# Characters in a datetime as SQLite stores it ("2024-01-02 03:04:05.500000")
+_DATETIME_CHARS = 26
+
+
+def _restore(s: pd.Series, dtype) -> pd.Series:
+    """s converted to dtype; raises ValueError/TypeError if values don't fit."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Values added by SQL become extra categories instead of NaN
+        new = pd.Index(s.dropna().unique()).difference(dtype.categories)
+        categories = dtype.categories.append(new) if len(new) else dtype.categories
+        return s.astype(pd.CategoricalDtype(categories, ordered=dtype.ordered))
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return pd.to_datetime(s, format="ISO8601", utc=True).dt.tz_convert(dtype.tz)
+    if isinstance(dtype, np.dtype):
+        if dtype.kind == "M":
+            return pd.to_datetime(s, format="ISO8601").astype(dtype)
+        if dtype.kind == "m":
+            return pd.to_timedelta(s, unit="ns").astype(dtype)
+        if dtype.kind in "iub":
+            values = pd.to_numeric(s)
+            present = values.dropna()
+            if (present != present.round()).any():
+                raise ValueError("not whole numbers")
+            if dtype.kind in "iu":
+                info = np.iinfo(dtype)
+                if len(present) and (present.min() < info.min or present.max() > info.max):
+                    raise ValueError("out of range")
+            if present.size < len(values):   # NULLs: the nullable version of the type
+                if dtype.kind == "b":
+                    return values.astype("boolean")
+                return values.astype(dtype.name.replace("uint", "UInt").replace("int", "Int"))
+            return values.astype(dtype)
+    return s.astype(dtype)
+
+
+def restore_dtypes(df: pd.DataFrame, dtypes: Mapping[str, object]) -> pd.DataFrame:
+    """Convert columns of a pulled table back to their earlier dtypes where
+    the values fit; columns that don't (or are new) keep their pulled dtype."""
+    for col, dtype in dtypes.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        try:
+            df[col] = _restore(df[col], dtype)
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return df
+
+
+def dtypes_to_json(dtypes: pd.Series) -> str:
+    """dtypes (column -> dtype) as JSON text, for a workspace to keep: a
+    dtype's name, or for a categorical its categories and ordered flag.
+    Dtypes that can't be written this way are left out."""
+    specs = []
+    for col, dtype in dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            spec = {"categories": dtype.categories.tolist(), "ordered": bool(dtype.ordered)}
+        else:
+            spec = str(dtype)
+        try:
+            specs.append([str(col), json.loads(json.dumps(spec))])
+        except (TypeError, ValueError):
+            pass   # e.g. categories that are timestamps
+    return json.dumps(specs)
+
+
+def dtypes_from_json(text: str) -> pd.Series:
+    """The dtypes written by dtypes_to_json, rebuilt without running any code
+    from the file; ones this pandas doesn't know are left out."""
+    dtypes = {}
+    for col, spec in json.loads(text):
+        try:
+            if isinstance(spec, dict):
+                dtypes[col] = pd.CategoricalDtype(spec["categories"], ordered=spec["ordered"])
+            else:
+                dtypes[col] = pd.api.types.pandas_dtype(spec)
+        except (TypeError, ValueError, KeyError):
+            pass
+    return pd.Series(dtypes, dtype=object)
+
+
+def _text_nbytes(n: int, chars: int) -> int:
+    """Memory of n text values of `chars` (ASCII) characters in all, held the
+    way a plain read_sql_query holds text on this pandas: an Arrow string
+    array (8-byte offsets and a validity bitmap) for pandas 3's default str
+    dtype, otherwise a str object per value in an object column."""
+    if getattr(pd.Series(["a"]).dtype, "storage", None) == "pyarrow":
+        return (n + 1) * 8 + chars + (n + 7) // 8
+    return n * (8 + _STR_OVERHEAD) + chars
+
+
+def plain_nbytes(df: pd.DataFrame) -> int:
+    """Estimated deep memory of df as read back from SQLite without restored
+    dtypes: 8 bytes per number, and text (also for categories and
+    datetimes) in the dtype pandas gives it (see _text_nbytes)."""
+    total = int(df.index.memory_usage(deep=True))
+    for _, s in df.items():
+        dtype = s.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Every row gets its category's text
+            counts = np.bincount(s.cat.codes[s.cat.codes >= 0], minlength=len(dtype.categories))
+            lengths = dtype.categories.astype(str).str.len().to_numpy()
+            total += _text_nbytes(len(s), int((counts * lengths).sum()))
+        elif dtype.kind in "OSUT" or pd.api.types.is_string_dtype(dtype):
+            if pd.api.types.infer_dtype(s, skipna=True) == "string":
+                total += _text_nbytes(len(s), int(s.str.len().fillna(0).sum()))
+            else:
+                total += int(s.memory_usage(index=False, deep=True))
+        elif dtype.kind == "M":
+            total += _text_nbytes(len(s), len(s) * _DATETIME_CHARS)
+        else:
+            total += len(s) * 8
+    return total
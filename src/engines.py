@@ -0,0 +1,312 @@
+"""
+SQL engine backends for the playground.
+
+`TableManager` itself is the SQLite engine: every DataFrame is copied into an
+in-memory SQLite database and synced back and forth. `DuckDBTableManager`
+instead registers the DataFrames with DuckDB, which scans them in place, so
+tables are not duplicated and pushes cost nothing per row.
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+import re
+import sqlite3
+from typing import Iterable, Iterator, Sequence
+
+from .lazy import lazy_import
+from .dtypes import restore_dtypes
+from .manager import (STATEMENT_CACHE_SIZE, TableManager, _fingerprint, _hash_rows, _shallow_copy,
+                      _slices, _untouched)
+from .parallel import FrameCursor
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+ENGINES = ("sqlite", "duckdb")
+
+# Statements that modify the table named right after the keyword
+_WRITE_TARGET = re.compile(
+    r"\b(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?"
+    r"|ALTER\s+TABLE|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+\"?(\w+)\"?",
+    re.IGNORECASE,
+)
+_IDENTIFIER = re.compile(r"\w+")
+
+
+def create_manager(engine: str, temp_dir: Path | None = None,
+                   workspace: Path | None = None) -> TableManager:
+    """Build a TableManager for the given engine name (see ENGINES). With a
+    workspace path, tables live in that SQLite file and survive the session."""
+    match engine:
+        case "sqlite":
+            conn = sqlite3.connect(workspace or ":memory:", check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            return TableManager(conn, temp_dir)
+        case "duckdb":
+            if workspace is not None:
+                raise ValueError("--workspace is only supported with the sqlite engine")
+            return DuckDBTableManager(temp_dir)
+        case _:
+            raise ValueError(f"Unknown engine '{engine}'. Choose from: {', '.join(ENGINES)}")
+
+
+class DuckDBTableManager(TableManager):
+    """TableManager backed by DuckDB.
+
+    Managed DataFrames are registered as DuckDB views over the pandas objects
+    (no copy). A registered view is read-only, so before a statement writes to
+    a managed table it is materialized into a native DuckDB table; after the
+    refresh pulls it back into pandas, the native copy is dropped again.
+    """
+
+    def __init__(self, temp_dir: Path | None = None):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise RuntimeError("The duckdb engine requires the 'duckdb' package "
+                               "(pip install duckdb).") from e
+        super().__init__(duckdb.connect(":memory:"), temp_dir)
+        # While track_writes() is active: write targets seen so far, and the
+        # table list from before the first statement that could write
+        self._written: set[str] | None = None
+        self._tables_before: set[str] | None = None
+        # Shallow copy of each DataFrame as registered (see _unchanged)
+        self._kept: dict[str, pd.DataFrame] = {}
+
+    def _tune_connection(self) -> None:
+        self._in_memory = True
+
+    def progress(self) -> str:
+        if self._progress_note is not None:
+            return super().progress()
+        pct = self.conn.query_progress()
+        return f"{pct:.0f}%" if pct >= 0 else ""
+
+    # Managed tables are views over the DataFrames, which can't be indexed;
+    # DuckDB relies on zone maps and hash joins instead.
+    def create_index(self, table: str, columns) -> str:
+        raise ValueError("Indexes are only supported with the sqlite engine.")
+
+    def drop_index(self, name: str) -> None:
+        raise ValueError("Indexes are only supported with the sqlite engine.")
+
+    def indexes(self) -> pd.DataFrame:
+        return pd.DataFrame(columns=["table", "index", "columns"])
+
+    def _advise(self, sql: str) -> None:
+        pass
+
+    # DuckDB already runs every query on all cores
+    def enable_parallel(self, workers: int | None = None):
+        raise ValueError("Parallel mode is only supported with the sqlite engine; "
+                         "DuckDB already uses every core.")
+
+    # ---------- SQL execution ----------------------------------------------
+    # Any statement on the DuckDB connection discards its pending result, so
+    # every method that runs one closes the last streamed result first.
+    def query(self, sql: str) -> pd.DataFrame:
+        self.close_result()
+        return self.conn.execute(sql).df()
+
+    def execute(self, sql: str) -> None:
+        self.close_result()
+        self._prepare_writes(sql)
+        self.conn.execute(sql)
+
+    def _prepare_writes(self, sql: str) -> None:
+        """Materialize the managed tables sql writes to, and record them
+        while track_writes() is active."""
+        if self._written is not None and self._tables_before is None:
+            self._tables_before = self._db_tables()
+        # Identifiers are case-insensitive; report the managed table's own spelling
+        managed = {name.lower(): name for name in [*self.tables, *self.pending]}
+        targets = {managed.get(m.group(1).lower(), m.group(1)) for m in _WRITE_TARGET.finditer(sql)}
+        for name in targets & set(self.tables):
+            self._materialize(name)
+        if self._written is not None:
+            self._written |= targets
+
+    def _param_cursor(self, query: str, params) -> FrameCursor:
+        # Any other statement (even listing tables for track_writes, or one
+        # run by Python code between chunks) would discard the pending
+        # result, so it is fetched right away
+        self._prepare_writes(query)
+        return FrameCursor(self.conn.execute(query, params).df())
+
+    def _returns_rows(self, cursor, written: frozenset[str]) -> bool:
+        # Statements without RETURNING report the rows they changed as "Count"
+        return not (written and [d[0] for d in cursor.description] == ["Count"])
+
+    def _fetch_frame(self, cursor: FrameCursor) -> pd.DataFrame:
+        return cursor.frame
+
+    def _fetch_chunks(self, cursor: FrameCursor, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        return _slices(cursor.frame, chunk_rows)
+
+    def _query_chunks(self, sql: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        result = self.conn.execute(sql)
+        # DuckDB hands out results in vectors of 2048 rows
+        vectors = max(chunk_rows // 2048, 1)
+        chunk = result.fetch_df_chunk(vectors)
+        while True:
+            yield chunk
+            if len(chunk) < vectors * 2048 or not len(chunk := result.fetch_df_chunk(vectors)):
+                break
+
+    def _open_cursor(self, sql: str):
+        return self.conn.execute(sql)
+
+    def _close_cursor(self, cursor) -> None:
+        pass   # the "cursor" is the connection itself
+
+    def _materialize(self, name: str) -> None:
+        """Turn the registered view `name` into a native, writable DuckDB table."""
+        self.conn.unregister(name)
+        self.conn.register("__playground_src", self.tables[name])
+        try:
+            self.conn.execute(f'CREATE TABLE "{name}" AS SELECT * FROM __playground_src')
+        finally:
+            self.conn.unregister("__playground_src")
+
+    def _append_rows(self, name: str, chunk: pd.DataFrame, create: bool,
+                     added: Sequence[str] = ()) -> None:
+        """Copy one chunk of an import into a native DuckDB table."""
+        self.conn.register("__playground_src", chunk)
+        try:
+            if create:
+                self.conn.execute(f'CREATE TABLE "{name}" AS SELECT * FROM __playground_src')
+            else:
+                # Columns are typed by the table; add new ones (`added`) and
+                # widen any the import widened (see ingest._cast)
+                have = {row[0]: row[1] for row in self.conn.execute(f'DESCRIBE "{name}"').fetchall()}
+                for col, col_type, *_ in self.conn.execute(
+                        "DESCRIBE SELECT * FROM __playground_src").fetchall():
+                    if col not in have:
+                        self.conn.execute(f'ALTER TABLE "{name}" ADD COLUMN "{col}" {col_type}')
+                    elif have[col] != col_type:
+                        self.conn.execute(f'ALTER TABLE "{name}" ALTER COLUMN "{col}" TYPE {col_type}')
+                self.conn.execute(f'INSERT INTO "{name}" BY NAME SELECT * FROM __playground_src')
+        finally:
+            self.conn.unregister("__playground_src")
+
+    def _drop(self, name: str) -> None:
+        self.close_result()
+        self._kept.pop(name, None)
+        self.conn.unregister(name)
+        self.conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+
+    def _db_tables(self) -> set[str]:
+        self.close_result()
+        try:
+            rows = self.conn.execute(
+                "SELECT table_name FROM information_schema.tables WHERE table_schema = 'main'"
+            ).fetchall()
+        except Exception as e:
+            raise sqlite3.Error(f"Failed to list DuckDB tables: {e}")
+        return {row[0] for row in rows}
+
+    @contextmanager
+    def track_writes(self) -> Iterator[set[str]]:
+        """Collect write targets of statements run through execute().
+
+        DuckDB has no authorizer hook, so targets come from the statement text;
+        tables created by the block are picked up by refresh() regardless.
+        """
+        written: set[str] = set()
+        self._written = written
+        try:
+            yield written
+        finally:
+            # Only blocks that ran execute() can have created or dropped tables
+            if self._tables_before is not None:
+                written |= self._db_tables() ^ self._tables_before
+            self._written = None
+            self._tables_before = None
+            for name in written:
+                self._bump(name)
+
+    def tables_read(self, sql: str) -> set[str] | None:
+        """Tables named anywhere in sql (case-insensitively), or None if it
+        names none. DuckDB has no authorizer hook, so this over-approximates
+        from the statement text; a table it misses could go stale unnoticed,
+        hence None rather than an empty set."""
+        known = {name.lower(): name for name in [*self.tables, *self._db_tables()]}
+        read = {known[word.lower()] for word in _IDENTIFIER.findall(sql) if word.lower() in known}
+        return read or None
+
+    def _db_views(self) -> set[str]:
+        return set()   # redefinitions aren't tracked, so results over views aren't cached
+
+    def tables_used(self, sql: str, params=()) -> set[str] | None:
+        """Managed tables named in sql, or None when it also names a view or
+        another table, which could read any of them."""
+        named = {word.lower() for word in _IDENTIFIER.findall(sql)}
+        managed = {name.lower(): name for name in [*self.tables, *self.pending]}
+        if any(name.lower() in named and name.lower() not in managed for name in self._db_tables()):
+            return None
+        return {managed[word] for word in named if word in managed}
+
+    # ---------- sync helpers -----------------------------------------------
+    def _push(self, name: str, row_hashes: np.ndarray | None = None) -> bool:
+        """(Re-)register the DataFrame; DuckDB reads it in place."""
+        if name not in self.tables:
+            return False
+        self._register(name)
+        df = self.tables[name]
+        self._record(name, df, _hash_rows(df) if row_hashes is None else row_hashes, None)
+        return False
+
+    def _register(self, name: str) -> None:
+        self.close_result()
+        try:
+            self.conn.register(name, self.tables[name])
+        except Exception as e:
+            raise sqlite3.Error(f"Failed to register table '{name}' with DuckDB: {e}")
+        kept = _shallow_copy(self.tables[name])
+        if kept is not None:
+            self._kept[name] = kept
+
+    def _unchanged(self, name: str, df: pd.DataFrame) -> bool:
+        """True if df certainly hasn't changed since it was registered."""
+        return _untouched(df, self._kept.get(name))
+
+    def push_all(self, names: Iterable[str] | None = None) -> None:
+        # Registering is O(columns), and in-place pandas edits (copy-on-write)
+        # are not visible through an existing registration, so a table is
+        # re-registered unless it is provably untouched. Unchanged tables keep
+        # their version, so cached results stay valid; only tables that
+        # changed count as pushed.
+        for name, df in self.tables.items():
+            if names is not None and name not in names:
+                continue
+            if self._unchanged(name, df):
+                self.sync_stats.skipped += 1
+                continue
+            row_hashes = _hash_rows(df)
+            snap = self._synced.get(name)
+            fp = _fingerprint(df, row_hashes)
+            if fp is not None and snap is not None and snap.fingerprint == fp:
+                self._register(name)
+                self.sync_stats.skipped += 1
+            else:
+                self._push(name, row_hashes)
+                self.sync_stats.pushed += 1
+
+    def _pull(self, name: str) -> None:
+        self.close_result()
+        try:
+            df = self.conn.execute(f'SELECT * FROM "{name}"').df()
+        except Exception:
+            if self._cancelled or name in self._db_tables():
+                raise   # interrupted, or failed with the table still there
+            self.tables.pop(name, None)
+            self._synced.pop(name, None)
+            self._forget_dtypes(name)
+            self._bump(name)
+            return
+        # Drop the native copy (if the table was written by SQL) and serve the
+        # pulled DataFrame in place from now on.
+        self._drop(name)
+        self.tables[name] = restore_dtypes(df, self._dtypes.get(name, {}))
+        self._push(name)
@@ -0,0 +1,179 @@
+"""
+Chunked writers for `/export`.
+
+A table or query result arrives as an iterator of DataFrame chunks and is
+written out one chunk at a time, so exporting a result far larger than memory
+only ever holds one chunk. Like saved tables, the file is written next to its
+destination and renamed into place when complete.
+
+Parquet and Feather files have one schema, taken from the first chunk. When a
+later chunk doesn't fit it (rows from SQLite can change type midway), the
+column is widened as /import does and the part already written is copied into
+a file with the wider schema.
+"""
+
+from __future__ import annotations
+import io
+import os
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .ingest import _COMPRESSORS, as_text
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+EXPORT_FORMATS = (".csv", ".jsonl", ".parquet", ".feather")
+_ALIASES = {".ndjson": ".jsonl", ".arrow": ".feather"}
+
+
+def export_format(path: Path) -> tuple[str, str | None]:
+    """(format suffix, compression suffix or None) of a file to export to,
+    e.g. ('.csv', '.gz') for out.csv.gz."""
+    suffixes = [s.lower() for s in path.suffixes]
+    compression = suffixes.pop() if suffixes and suffixes[-1] in _COMPRESSORS else None
+    fmt = suffixes[-1] if suffixes else ""
+    fmt = _ALIASES.get(fmt, fmt)
+    if fmt not in EXPORT_FORMATS or (compression and fmt in (".parquet", ".feather")):
+        raise ValueError(f"Can't export to '{path.name}'. Use one of: "
+                         f"{', '.join(EXPORT_FORMATS)} (.csv and .jsonl optionally "
+                         f"{'/'.join(_COMPRESSORS)} compressed)")
+    return fmt, compression
+
+
+def _write_text(chunks: Iterable[pd.DataFrame], fmt: str, handle: io.TextIOBase,
+                on_chunk: Callable[[int], None]) -> None:
+    for i, chunk in enumerate(chunks):
+        if fmt == ".csv":
+            chunk.to_csv(handle, header=i == 0, index=False)
+        elif len(chunk):
+            chunk.to_json(handle, orient="records", lines=True, date_format="iso")
+        on_chunk(len(chunk))
+
+
+def _arrow_errors() -> tuple[type[Exception], ...]:
+    import pyarrow as pa
+    return pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError
+
+
+def _arrow_type(s: pd.Series):
+    """Arrow type of column s, or None if Arrow can't tell (e.g. mixed values)."""
+    import pyarrow as pa
+    try:
+        return pa.Array.from_pandas(s).type
+    except _arrow_errors():
+        return None
+
+
+def _arrow_table(chunk: pd.DataFrame, schema):
+    """chunk as an Arrow table of the given schema; values of any type go
+    into its text columns, as strings."""
+    import pyarrow as pa
+    try:
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+    except _arrow_errors():
+        text = [f.name for f in schema if pa.types.is_string(f.type)]
+        if not text:
+            raise
+        chunk = chunk.assign(**{name: as_text(chunk[name]) for name in text})
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def _widened(schema, chunk: pd.DataFrame):
+    """schema with each column widened to hold chunk as well, the way
+    /import widens (integer -> float64 -> string)."""
+    import pyarrow as pa
+    numeric = lambda t: pa.types.is_integer(t) or pa.types.is_floating(t) or pa.types.is_boolean(t)
+    for i, field in enumerate(schema):
+        got = _arrow_type(chunk[field.name])
+        if got == field.type or pa.types.is_string(field.type) or \
+                (got is not None and pa.types.is_null(got)):
+            continue
+        wider = pa.float64() if got is not None and numeric(got) and numeric(field.type) else pa.string()
+        if wider != field.type:
+            schema = schema.set(i, pa.field(field.name, wider))
+    return schema
+
+
+def _write_arrow(chunks: Iterable[pd.DataFrame], fmt: str, path: Path,
+                 on_chunk: Callable[[int], None]) -> None:
+    try:
+        import pyarrow as pa
+        from pyarrow import ipc, parquet
+    except ImportError as e:
+        raise RuntimeError(f"Exporting {fmt} files requires the 'pyarrow' package "
+                           "(pip install pyarrow).") from e
+
+    def open_writer(schema):
+        return (parquet.ParquetWriter(path, schema) if fmt == ".parquet"
+                else ipc.new_file(path, schema))
+
+    def rewrite(schema):
+        """Copy what was written so far into a new file with the wider schema."""
+        old = path.with_name(f"{path.name}.old")
+        os.replace(path, old)
+        try:
+            if fmt == ".parquet":
+                batches = parquet.ParquetFile(old).iter_batches()
+            else:
+                reader = ipc.open_file(old)
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            writer = open_writer(schema)
+            try:
+                for batch in batches:
+                    writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+            except BaseException:
+                writer.close()
+                raise
+            return writer
+        finally:
+            old.unlink(missing_ok=True)
+
+    writer = schema = None
+    try:
+        for chunk in chunks:
+            if schema is None:
+                # A column that is all NULL so far is written as text
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                for name in [f.name for f in schema if pa.types.is_null(f.type)]:
+                    schema = schema.set(schema.get_field_index(name), pa.field(name, pa.string()))
+            while True:
+                try:
+                    table = _arrow_table(chunk, schema)
+                    break
+                except _arrow_errors():
+                    # Later rows don't fit the types so far (e.g. 5.5 in a
+                    # column of whole numbers): widen them for the whole file
+                    wider = _widened(schema, chunk)
+                    if wider.equals(schema):
+                        raise
+                    schema = wider
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                        writer = rewrite(schema)
+            if writer is None:
+                writer = open_writer(schema)
+            writer.write_table(table)
+            on_chunk(len(chunk))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_chunks(chunks: Iterable[pd.DataFrame], path: Path,
+                 on_chunk: Callable[[int], None] = lambda rows: None) -> None:
+    """Write chunks (the first one fixes the columns) to path, in the format
+    given by its suffix, calling on_chunk(rows) after each."""
+    fmt, compression = export_format(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        if fmt in (".parquet", ".feather"):
+            _write_arrow(chunks, fmt, tmp, on_chunk)
+        else:
+            opener = _COMPRESSORS.get(compression, open)
+            with opener(tmp, "wt", encoding="utf-8", newline="") as handle:
+                _write_text(chunks, fmt, handle, on_chunk)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
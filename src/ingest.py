@@ -0,0 +1,128 @@
+"""
+Chunked readers for `/import`.
+
+Files are streamed in chunks of a bounded number of rows, so a file much
+larger than memory can be loaded into the database. Column types are taken
+from the first chunk (the sample) and every later chunk is cast to them; when
+later rows don't fit (e.g. a fractional value in a column sampled as whole
+numbers), the column is widened from then on (Int64 -> float64 -> str).
+A key that first appears in a later chunk of a JSON lines file adds a column.
+"""
+
+from __future__ import annotations
+import bz2
+import gzip
+import io
+import lzma
+from pathlib import Path
+from typing import IO, Iterator
+
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Rows per chunk; also the sample the column types are inferred from
+IMPORT_CHUNK_ROWS = 100_000
+
+IMPORT_FORMATS = (".csv", ".tsv", ".txt", ".jsonl", ".ndjson", ".parquet")
+_COMPRESSORS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+# What a column can be widened to when later rows don't fit its current type
+_WIDER = {"Int64": "float64", "float64": "str", "boolean": "str"}
+
+
+def import_format(path: Path) -> tuple[str, str | None]:
+    """(format suffix, compression suffix or None) of a file to import, e.g.
+    ('.csv', '.gz') for data.csv.gz."""
+    suffixes = [s.lower() for s in path.suffixes]
+    compression = suffixes.pop() if suffixes and suffixes[-1] in _COMPRESSORS else None
+    fmt = suffixes[-1] if suffixes else ""
+    if fmt not in IMPORT_FORMATS or (compression and fmt == ".parquet"):
+        raise ValueError(f"Can't import '{path.name}'. Supported files: "
+                         f"{', '.join(IMPORT_FORMATS)} (text formats optionally "
+                         f"{'/'.join(_COMPRESSORS)} compressed)")
+    return fmt, compression
+
+
+def _sampled_dtype(s: pd.Series) -> str:
+    """Type to hold column s in every chunk: nullable where pandas would
+    switch to float or object as soon as a chunk has a missing value."""
+    kind = s.dtype.kind
+    if kind in "iu":
+        return "Int64"
+    if kind == "f":
+        return "float64"
+    if kind == "b":
+        return "boolean"
+    return "str"
+
+
+def as_text(s: pd.Series) -> pd.Series:
+    """s as strings, keeping missing values missing (pandas 2's astype(str)
+    would turn them into 'nan')."""
+    return s.astype("str").where(s.notna(), None)
+
+
+def _cast(chunk: pd.DataFrame, dtypes: dict[str, str]) -> pd.DataFrame:
+    """Cast chunk to dtypes, widening (and remembering) any that don't fit."""
+    for col, dtype in dtypes.items():
+        while True:
+            try:
+                if chunk[col].dtype != dtype:
+                    chunk[col] = as_text(chunk[col]) if dtype == "str" else chunk[col].astype(dtype)
+                break
+            except (ValueError, TypeError):
+                dtype = dtypes[col] = _WIDER[dtype]   # str always fits
+    return chunk
+
+
+def _text_chunks(path: Path, fmt: str, compression: str | None,
+                 chunk_rows: int) -> Iterator[tuple[pd.DataFrame, float]]:
+    size = path.stat().st_size or 1
+    with open(path, "rb") as raw:
+        stream: IO[bytes] = _COMPRESSORS[compression](raw) if compression else raw
+        is_json = fmt in (".jsonl", ".ndjson")
+        text = io.TextIOWrapper(stream, encoding="utf-8", newline=None if is_json else "")
+        if is_json:
+            reader = pd.read_json(text, lines=True, chunksize=chunk_rows)
+        else:
+            reader = pd.read_csv(text, sep="\t" if fmt == ".tsv" else ",", chunksize=chunk_rows)
+        with reader:
+            columns = dtypes = None
+            for chunk in reader:
+                if dtypes is None:
+                    columns = list(chunk.columns)
+                    dtypes = {col: _sampled_dtype(chunk[col]) for col in columns}
+                elif is_json and list(chunk.columns) != columns:
+                    # JSON lines may leave out keys or add new ones; a new key
+                    # becomes a new column, typed (and widened) like the rest
+                    for col in chunk.columns:
+                        if col not in dtypes:
+                            columns.append(col)
+                            dtypes[col] = _sampled_dtype(chunk[col])
+                    chunk = chunk.reindex(columns=columns)
+                # Measured on the raw file, so this works for compressed input too
+                yield _cast(chunk, dtypes), raw.tell() / size
+
+
+def _parquet_chunks(path: Path, chunk_rows: int) -> Iterator[tuple[pd.DataFrame, float]]:
+    try:
+        from pyarrow import parquet
+    except ImportError as e:
+        raise RuntimeError("Importing Parquet files requires the 'pyarrow' package "
+                           "(pip install pyarrow).") from e
+    file = parquet.ParquetFile(path)
+    total = file.metadata.num_rows or 1
+    done = 0
+    # Parquet files carry their schema, so no types need inferring
+    for batch in file.iter_batches(batch_size=chunk_rows):
+        done += batch.num_rows
+        yield batch.to_pandas(), done / total
+
+
+def iter_chunks(path: Path, chunk_rows: int = IMPORT_CHUNK_ROWS) -> Iterator[tuple[pd.DataFrame, float]]:
+    """Yield (chunk, fraction of the file read so far) for a file to import."""
+    fmt, compression = import_format(path)
+    if fmt == ".parquet":
+        return _parquet_chunks(path, chunk_rows)
+    return _text_chunks(path, fmt, compression, chunk_rows)
@@ -0,0 +1,134 @@
+"""
+Run long database work on a worker thread so the REPL can show live
+progress and cancel it cleanly with Ctrl-C.
+
+run_job() waits for the work; a BackgroundQuery (`/bg <query>`) doesn't, and
+the prompt takes the next command while it runs. There is one worker thread,
+so the connection is never used by two jobs at once.
+"""
+
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from contextlib import contextmanager
+import time
+from typing import TYPE_CHECKING, Callable, Iterator, TypeVar
+
+from rich.console import Console
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from .manager import TableManager
+
+T = TypeVar("T")
+
+# Quick statements finish before any status line is shown
+STATUS_DELAY = 0.3
+# How often the status line is refreshed
+REFRESH_INTERVAL = 0.1
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sql-worker")
+# Set by inline_jobs(): run jobs on the calling thread
+_inline = False
+
+
+class Cancelled(Exception):
+    """The user pressed Ctrl-C while a job was running."""
+
+
+@contextmanager
+def inline_jobs() -> Iterator[None]:
+    """Run jobs directly on the calling thread inside the block, without
+    progress or cancellation, e.g. so a profiler on that thread sees them."""
+    global _inline
+    previous, _inline = _inline, True
+    try:
+        yield
+    finally:
+        _inline = previous
+
+
+def run_job(fn: Callable[[], T], mgr: "TableManager", console: Console,
+            label: str = "Running") -> T:
+    """Run fn() on the worker thread and wait for it, showing the engine's
+    progress after STATUS_DELAY. Ctrl-C interrupts the running statement and
+    raises Cancelled once the worker has stopped."""
+    mgr.reset_progress()
+    if _inline:
+        return fn()
+    future = _executor.submit(fn)
+    try:
+        return _wait(future, mgr, console, label)
+    except KeyboardInterrupt:
+        mgr.interrupt()
+        try:
+            future.result()
+        except Exception:
+            pass   # the statement's "interrupted" error
+        raise Cancelled() from None
+
+
+def _wait(future: "Future[T]", mgr: "TableManager", console: Console, label: str) -> T:
+    try:
+        return future.result(timeout=STATUS_DELAY)
+    except TimeoutError:
+        pass
+    with console.status(f"{label}...") as status:
+        while True:
+            try:
+                return future.result(timeout=REFRESH_INTERVAL)
+            except TimeoutError:
+                status.update(f"{label}... {mgr.progress()}  [grey50](Ctrl-C to cancel)[/]")
+
+
+class BackgroundQuery:
+    """A query left running on the worker thread while the prompt stays
+    usable; its result is collected with result() once done()."""
+
+    def __init__(self, sql: str, mgr: "TableManager"):
+        self.sql = sql
+        self._mgr = mgr
+        self.cancelled = False
+        self.started = time.monotonic()
+        self.finished: float | None = None
+        mgr.reset_progress()
+        self._future = _executor.submit(self._run)
+        self._future.add_done_callback(self._on_done)
+
+    def _run(self) -> "pd.DataFrame":
+        try:
+            if self.cancelled:   # cancel() before the statement started
+                raise Cancelled()
+            return self._mgr.query(self.sql)
+        finally:
+            self._mgr.reset_progress()   # so cancel() can't abort the next statement
+
+    def _on_done(self, future: Future) -> None:
+        self.finished = time.monotonic()
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def result(self) -> "pd.DataFrame":
+        """The result; raises the query's error (e.g. "interrupted" after cancel())."""
+        return self._future.result()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self._mgr.interrupt()
+
+    def wait(self, console: Console) -> None:
+        """Wait for the query with a progress line. Ctrl-C stops waiting, not
+        the query, and raises Cancelled."""
+        try:
+            _wait(self._future, self._mgr, console, "Waiting for the background query")
+        except KeyboardInterrupt:
+            raise Cancelled() from None
+        except Exception:
+            pass   # reported by result()
+
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def __str__(self) -> str:
+        state = "done" if self.done() else f"running, {self._mgr.progress()}"
+        return f"Background query ({state}, {self.elapsed():.1f}s): {self.sql}"
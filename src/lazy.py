@@ -0,0 +1,29 @@
+"""
+Deferred imports for heavy dependencies.
+
+`np = lazy_import("numpy")` binds a module object whose code only runs on the
+first attribute access, so starting the REPL doesn't pay for numpy and pandas
+until a DataFrame is actually needed.
+"""
+
+from __future__ import annotations
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """The module `name`, imported on first attribute access. Returns the real
+    module if it is already imported, and raises ImportError right away if it
+    is not installed."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
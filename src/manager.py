@@ -4,17 +4,396 @@ mutations and pulls fresh copies after SQL execution.
 """
 
 from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-import pandas as pd
+import hashlib
+import importlib.util
+import os
 import sqlite3
-from typing import List
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, MutableMapping, Sequence
+
+from .advisor import IndexAdvisor
+from .cache import ResultCache
+from .dtypes import dtypes_from_json, dtypes_to_json, plain_nbytes, restore_dtypes
+from .export import export_format, write_chunks
+from .ingest import IMPORT_CHUNK_ROWS, iter_chunks
+from .lazy import lazy_import
+from .parallel import FrameCursor, ParallelExecutor
+from .proxy import TableProxy
+from .sqlfunc import SqlFunction
+from .timings import CommandTimings
+from .results import PAGE_SIZE, QueryResult
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Default auto-save directory (same location the CLI uses)
+DEFAULT_TEMP_DIR = Path(__file__).parent / "TEMP_TABLES"
+
+# Table file formats, most preferred first. Feather (Arrow IPC) is written
+# uncompressed so it can be memory-mapped on load; .pkl is still read so
+# tables saved by older sessions keep loading.
+TABLE_SUFFIXES = (".feather", ".parquet", ".pkl")
+
+
+# Authorizer actions that modify a table: action -> index of the table-name argument
+_WRITE_ACTIONS = {
+    sqlite3.SQLITE_INSERT: 0,
+    sqlite3.SQLITE_UPDATE: 0,
+    sqlite3.SQLITE_DELETE: 0,
+    sqlite3.SQLITE_CREATE_TABLE: 0,
+    sqlite3.SQLITE_DROP_TABLE: 0,
+    sqlite3.SQLITE_ALTER_TABLE: 1,   # (database, table)
+    # Redefining a view changes what reading it returns (see read_versions)
+    sqlite3.SQLITE_CREATE_VIEW: 0,
+    sqlite3.SQLITE_DROP_VIEW: 0,
+    sqlite3.SQLITE_CREATE_TEMP_VIEW: 0,
+    sqlite3.SQLITE_DROP_TEMP_VIEW: 0,
+}
+
+# SQLite VM instructions between progress callbacks (see progress())
+PROGRESS_INTERVAL = 10_000
+
+# Threads reading/writing table files at once; Arrow and Parquet (de)serialization
+# release the GIL, so these overlap
+IO_WORKERS = min(8, os.cpu_count() or 1)
+
+# On-disk workspaces: bytes of the database file memory-mapped, and page cache size
+WORKSPACE_MMAP_BYTES = 1024 ** 3
+WORKSPACE_CACHE_KIB = 64 * 1024
+# Workspace table keeping each table's pandas dtypes across sessions; not
+# listed as a user table
+DTYPES_TABLE = "__playground_dtypes"
+
+# Delta pushes stop paying off once this fraction of rows has changed
+DELTA_MAX_CHANGED_FRACTION = 0.5
+
+# Statement texts sql() remembers (see TableManager.sql); also the size of
+# the sqlite3 connection's prepared-statement cache
+STATEMENT_CACHE_SIZE = 256
+
+
+@dataclass
+class SyncStats:
+    """Running counters for push_all: tables rewritten, delta-synced, or skipped as unchanged."""
+    pushed: int = 0
+    delta: int = 0
+    skipped: int = 0
+    rows_inserted: int = 0
+    rows_updated: int = 0
+    rows_deleted: int = 0
+
+    def __str__(self) -> str:
+        return (f"{self.pushed} full, {self.delta} delta, {self.skipped} skipped "
+                f"(rows: +{self.rows_inserted} ~{self.rows_updated} -{self.rows_deleted})")
+
+
+@dataclass
+class _Snapshot:
+    """What a table looked like in SQLite as of its last push/pull."""
+    fingerprint: str | None
+    schema: list[tuple[str, str]]
+    index: pd.Index | None = None           # row labels at sync time
+    row_hashes: np.ndarray | None = None    # per-row content hash, aligned with index
+    rowids: np.ndarray | None = None        # SQLite rowid of each row, aligned with index
+    frame: pd.DataFrame | None = None       # shallow copy of the synced DataFrame (see _untouched)
+
+
+@dataclass
+class _Statement:
+    """What sql() learned about a statement text the first time it ran."""
+    used: set[str] | None     # tables it reaches (see tables_used)
+    written: frozenset[str]   # tables it modifies
+
+
+def _slices(df: pd.DataFrame, rows: int) -> Iterator[pd.DataFrame]:
+    """df in pieces of up to `rows` rows (at least one, so an empty frame
+    still has its columns)."""
+    for start in range(0, max(len(df), 1), rows):
+        yield df.iloc[start:start + rows]
+
+
+def _schema(df: pd.DataFrame) -> list[tuple[str, str]]:
+    return [(str(c), str(t)) for c, t in df.dtypes.items()]
+
+
+def _hash_rows(df: pd.DataFrame) -> np.ndarray | None:
+    """Per-row content hashes (index excluded), or None when the frame holds
+    unhashable values (lists, dicts, ...), in which case the table is always
+    treated as changed.
+    """
+    try:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except Exception:
+        return None
+
+
+def _fingerprint(df: pd.DataFrame, row_hashes: np.ndarray | None) -> str | None:
+    """Content hash of a DataFrame (values, index, column names and dtypes)."""
+    if row_hashes is None:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(_schema(df)).encode())
+    h.update(pd.util.hash_pandas_object(df.index).to_numpy().tobytes())
+    h.update(row_hashes.tobytes())
+    return h.hexdigest()
+
+
+def _copy_on_write() -> bool:
+    """Copy-on-write is always on from pandas 3; earlier versions have to opt
+    in. Without it an edit can change data a shallow copy shares (see
+    _untouched)."""
+    return int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+
+
+def _shallow_copy(df: pd.DataFrame) -> pd.DataFrame | None:
+    """A copy of df sharing its data, for _untouched; None without copy-on-write."""
+    return df.copy(deep=False) if _copy_on_write() else None
+
+
+def _untouched(df: pd.DataFrame, kept: pd.DataFrame | None) -> bool:
+    """True if df certainly hasn't changed since `kept` was made from it by
+    _shallow_copy, without looking at the data. The copy shares df's data, so
+    with copy-on-write any edit gives df new blocks (with new reference
+    trackers) or new axes; False only means "hash to find out"."""
+    if kept is None:
+        return False
+    try:
+        if not (df.index.is_(kept.index) and df.columns.is_(kept.columns)):
+            return False
+        blocks, kept_blocks = df._mgr.blocks, kept._mgr.blocks
+        return (len(blocks) == len(kept_blocks)
+                and all(b.refs is k.refs for b, k in zip(blocks, kept_blocks)))
+    except Exception:   # private pandas internals moved or changed: fall back to hashing
+        return False
+
+
+# SQLite column types by pandas' inferred dtype, as DataFrame.to_sql declares them
+_SQLITE_TYPES = {
+    "string": "TEXT",
+    "floating": "REAL",
+    "integer": "INTEGER",
+    "timedelta64": "INTEGER",
+    "datetime64": "TIMESTAMP",
+    "datetime": "TIMESTAMP",
+    "date": "DATE",
+    "time": "TIME",
+    "boolean": "INTEGER",
+}
+
+# Rows per executemany batch when bulk loading; bounds the Python objects
+# alive at once (throughput is flat from ~50K rows up).
+BULK_CHUNK_ROWS = 100_000
+
+
+def _quote(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _create_table_sql(name: str, df: pd.DataFrame) -> str:
+    """Typed CREATE TABLE statement for df, matching DataFrame.to_sql's column types."""
+    columns = [_column_sql(col, df[col]) for col in df.columns]
+    return f"CREATE TABLE {_quote(name)} ({', '.join(columns)})"
+
+
+def _column_sql(col: str, s: pd.Series) -> str:
+    """Column definition (name and type) for s, as in _create_table_sql."""
+    inferred = pd.api.types.infer_dtype(s, skipna=True)
+    if inferred == "complex":
+        raise ValueError("Complex datatypes not supported")
+    return f"{_quote(col)} {_SQLITE_TYPES.get(inferred, 'TEXT')}"
+
+
+def _sqlite_values(s: pd.Series) -> list:
+    """Column values as plain Python objects sqlite3 can bind, stored the way
+    DataFrame.to_sql stores them (NULL for missing, ISO text for datetimes).
+    """
+    kind = s.dtype.kind
+    if kind in "iub" and isinstance(s.dtype, np.dtype):
+        return s.to_numpy().tolist()            # NumPy converts to Python scalars in C
+    if kind == "f" and isinstance(s.dtype, np.dtype):
+        arr = s.to_numpy()
+        mask = np.isnan(arr)
+        if not mask.any():
+            return arr.tolist()
+        values = arr.astype(object)
+        values[mask] = None
+        return values.tolist()
+    if kind == "M" and isinstance(s.dtype, np.dtype):
+        arr = s.to_numpy()
+        whole = arr.astype("datetime64[ns]").view(np.int64) % 1_000_000_000 == 0
+        # to_sql's isoformat(" ") omits the fraction when it is zero
+        text = np.datetime_as_string(arr, unit="s")
+        if not whole.all():
+            text = np.where(whole, text, np.datetime_as_string(arr, unit="us"))
+        text = np.strings.replace(text, "T", " ").astype(object)
+        text[np.isnat(arr)] = None
+        return text.tolist()
+    if kind == "M":   # tz-aware
+        s = s.map(lambda v: v.isoformat(" "), na_action="ignore")
+    elif kind == "m":
+        s = s.map(lambda v: v.value, na_action="ignore")
+    values = s.astype(object)
+    return values.where(s.notna(), None).tolist()
+
+
+def _sqlite_rows(df: pd.DataFrame, rowids: np.ndarray | None = None) -> Iterator[tuple]:
+    """Row tuples for executemany, built column-wise, optionally with a trailing rowid."""
+    columns = [_sqlite_values(df.iloc[:, i]) for i in range(df.shape[1])]
+    if rowids is not None:
+        columns.append(rowids.tolist())
+    return zip(*columns)
+
+
+def _has_pyarrow() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _write_table(df: pd.DataFrame, path: Path) -> None:
+    """Write df in the format given by path's suffix. The file is written next
+    to its destination and renamed into place, so readers (and memory maps of
+    the previous version) never see a half-written file."""
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        match path.suffix:
+            case ".feather":
+                import pyarrow as pa
+                from pyarrow import feather
+                feather.write_feather(pa.Table.from_pandas(df), tmp, compression="uncompressed")
+            case ".parquet":
+                df.to_parquet(tmp)
+            case ".pkl":
+                df.to_pickle(tmp)
+            case _:
+                raise ValueError(f"Unsupported table file type '{path.suffix}'. "
+                                 f"Use one of: {', '.join(TABLE_SUFFIXES)}")
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _read_table(path: Path, columns: List[str] | None = None) -> pd.DataFrame:
+    """Read a table file, optionally only some columns. Feather files are
+    memory-mapped, so column data is paged in from disk as it is used."""
+    match path.suffix:
+        case ".feather":
+            from pyarrow import feather
+            table = feather.read_table(path, columns=columns, memory_map=True)
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        case ".parquet":
+            return pd.read_parquet(path, columns=columns)
+        case _:
+            df = pd.read_pickle(path)
+            if not isinstance(df, pd.DataFrame):
+                 raise TypeError(f"Loaded object from {path} is not a pandas DataFrame.")
+            return df[columns] if columns else df
 
 
 class TableManager:
-    def __init__(self, conn: sqlite3.Connection, temp_dir: Path):
+    def __init__(self, conn: sqlite3.Connection, temp_dir: Path | None = None):
         self.conn = conn
         self.tables: dict[str, pd.DataFrame] = {}
-        self.temp_dir = temp_dir # Store the path to the temp directory
+        self.temp_dir = temp_dir if temp_dir is not None else DEFAULT_TEMP_DIR
+        # State of each table as of its last push/pull, used by push_all to skip
+        # unchanged tables and to send only changed rows for the rest.
+        self._synced: dict[str, _Snapshot] = {}
+        self.sync_stats = SyncStats()
+        # Set to False to always rewrite whole tables on push
+        self.delta_sync = True
+        # Most recent streamed query result (see stream()) and its page size
+        self.last_result: QueryResult | None = None
+        self.page_size = PAGE_SIZE
+        self._progress_ticks = 0
+        # Progress of file work (load_many, save_all_to_temp, import_file),
+        # shown by progress() instead of statement steps while set
+        self._progress_note: str | None = None
+        # Set by interrupt(); long Python-side loops check it between chunks
+        self._cancelled = False
+        # Bumped whenever a table's contents in the database may have changed;
+        # cached query results are only reused while these are unchanged
+        self.versions: dict[str, int] = {}
+        self.result_cache = ResultCache()
+        # Phase timings of REPL commands, reported by /stats
+        self.timings = CommandTimings()
+        # Suggests indexes for queries that keep scanning the same table
+        self.advisor = IndexAdvisor()
+        # Worker processes for aggregates over large tables (see
+        # enable_parallel); None while parallel mode is off
+        self.parallel: ParallelExecutor | None = None
+        # Column dtypes of each table as last synced from pandas; a pulled
+        # table gets them back (see dtypes.restore_dtypes). Kept while the
+        # table is pending, dropped with the table.
+        self._dtypes: dict[str, pd.Series] = {}
+        # Tables in the database that haven't been pulled into pandas yet
+        # (written by SQL, or restored from an on-disk workspace), with their
+        # column names. They are bound to the namespace as TableProxy objects.
+        self.pending: dict[str, list[str]] = {}
+        # Statements run by sql(), most recently used last
+        self._statements: OrderedDict[str, _Statement] = OrderedDict()
+        self._tune_connection()
+        if not self._in_memory:
+            self.pending = {name: self._db_columns(name) for name in self._db_tables()}
+            self._load_dtypes()
+
+    def _tune_connection(self) -> None:
+        """Pragmas for bulk loading. Durability is moot for an in-memory database;
+        an on-disk workspace uses WAL, which stays consistent with synchronous=NORMAL."""
+        files = [row[2] for row in self.conn.execute("PRAGMA database_list")]
+        self._in_memory = files[0] == ""
+        if self._in_memory:
+            self.conn.execute("PRAGMA synchronous = OFF")
+        else:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.execute(f"PRAGMA mmap_size = {WORKSPACE_MMAP_BYTES}")
+            self.conn.execute(f"PRAGMA cache_size = -{WORKSPACE_CACHE_KIB}")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.conn.set_progress_handler(self._on_progress, PROGRESS_INTERVAL)
+
+    # ---------- progress and cancellation ------------------------------------
+    def _on_progress(self) -> int:
+        self._progress_ticks += 1
+        return 1 if self._cancelled else 0   # non-zero aborts the statement
+
+    def reset_progress(self) -> None:
+        self._progress_ticks = 0
+        self._progress_note = None
+        self._cancelled = False
+
+    def progress(self) -> str:
+        """Work done by the statement(s) or table files handled since reset_progress()."""
+        if self._progress_note is not None:
+            return self._progress_note
+        return f"{self._progress_ticks * PROGRESS_INTERVAL:,} steps"
+
+    def _table_progress(self, on_progress: Callable[[int, int], None] | None,
+                        done: int, total: int) -> None:
+        self._progress_note = f"{done}/{total} tables"
+        if on_progress is not None:
+            on_progress(done, total)
+
+    def interrupt(self) -> None:
+        """Abort the running statement (safe to call from another thread)."""
+        self._cancelled = True
+        self.conn.interrupt()
+
+    # ---------- parallel mode ------------------------------------------------
+    def enable_parallel(self, workers: int | None = None) -> ParallelExecutor:
+        """Answer aggregate queries over large tables with `workers` processes
+        (default: one per CPU), each holding a row range of the table."""
+        if workers is not None and workers < 1:
+            raise ValueError("Need at least one worker.")
+        self.disable_parallel()
+        self.parallel = ParallelExecutor(workers)
+        return self.parallel
+
+    def disable_parallel(self) -> None:
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
 
     # ---------- public API for the router / meta-commands ------------------
     def create(self, name: str, df: pd.DataFrame | None = None) -> None:
@@ -23,164 +402,858 @@ class TableManager:
         """
         if not name.isidentifier():
             raise ValueError(f"Invalid table name: '{name}'. Must be valid Python identifier.")
-        if name in self.tables:
+        if name in self.tables or name in self.pending:
              raise ValueError(f"Table '{name}' already exists.")
 
         # Use provided df or create an empty one
         self.tables[name] = df if df is not None else pd.DataFrame()
         self._push(name)
 
-    def load(self, name: str) -> None:
-        """Loads a table by name, assuming it exists as <name>.pkl in the temp dir."""
-        if not name.isidentifier():
-             raise ValueError(f"Invalid table name: '{name}'.")
+    def load(self, name: str, columns: List[str] | None = None) -> None:
+        """Loads a table by name from the temp dir (<name>.feather, .parquet or
+        legacy .pkl), optionally reading only the given columns."""
+        self.load_many([name], columns)
 
-        # Construct the expected path in the temp directory
-        path = self.temp_dir / f"{name}.pkl"
+    def load_many(self, names: List[str], columns: List[str] | None = None,
+                  on_progress: Callable[[int, int], None] | None = None) -> None:
+        """Load several tables, reading their files concurrently. Pushes to the
+        database happen one at a time on the calling thread as reads finish.
+        All readable tables are loaded; the first error is raised afterwards."""
+        for name in names:
+            if not name.isidentifier():
+                raise ValueError(f"Invalid table name: '{name}'.")
+        paths = {name: self._table_file(name) for name in names}
+        error: Exception | None = None
+        self._table_progress(on_progress, 0, len(names))
+        with ThreadPoolExecutor(max_workers=min(IO_WORKERS, len(names)) or 1) as pool:
+            futures = {pool.submit(_read_table, path, columns): name
+                       for name, path in paths.items()}
+            for done, future in enumerate(as_completed(futures), 1):
+                name = futures[future]
+                try:
+                    # Replaces any table of the same name, unlike create()
+                    self.tables[name] = future.result()
+                    self.pending.pop(name, None)
+                    self._push(name)   # Push to DB immediately after loading
+                except Exception as e:
+                    # Catch potential pickle/Arrow errors, missing columns, etc.
+                    error = error or RuntimeError(
+                        f"Failed to load table '{name}' from {paths[name]}: {e}")
+                self._table_progress(on_progress, done, len(names))
+                if self._cancelled:
+                    for future in futures:
+                        future.cancel()   # files not started yet are skipped
+                    raise sqlite3.OperationalError("interrupted")
+        if error is not None:
+            raise error
 
-        if not path.exists():
-             # Provide a more specific error message
-             raise FileNotFoundError(f"Table file not found at expected location: {path}")
+    def import_file(self, name: str, path: str | Path,
+                    chunk_rows: int = IMPORT_CHUNK_ROWS) -> int:
+        """Stream a CSV/TSV, JSON lines or Parquet file into a new table,
+        chunk_rows rows at a time, and return the number of rows imported.
 
-        try:
-            # Only need to handle pickle now, as that's what we save
-            df = pd.read_pickle(path)
+        Only one chunk is in memory at a time. The table is left pending
+        (pulled into pandas when Python first uses it); if the import fails
+        or is interrupted, the partly written table is dropped.
+        """
+        if not name.isidentifier():
+            raise ValueError(f"Invalid table name: '{name}'. Must be valid Python identifier.")
+        if name in self.tables or name in self.pending or name in self._db_tables():
+            raise ValueError(f"Table '{name}' already exists.")
+        path = Path(path)
+        if not path.is_file():
+            raise FileNotFoundError(f"File not found: {path}")
+        chunks = iter_chunks(path, chunk_rows)
 
-            if not isinstance(df, pd.DataFrame):
-                 raise TypeError(f"Loaded object from {path} is not a pandas DataFrame.")
+        self.close_result()
+        rows = 0
+        columns: list[str] = []
+        try:
+            for chunk, fraction in chunks:
+                if self._cancelled:
+                    raise sqlite3.OperationalError("interrupted")
+                # Later chunks can bring new columns (keys new to a JSON lines file)
+                added = [str(c) for c in chunk.columns if str(c) not in columns]
+                self._append_rows(name, chunk, create=not columns,
+                                  added=added if columns else [])
+                columns += added
+                rows += len(chunk)
+                self._progress_note = f"{rows:,} rows ({fraction:.0%})"
+        except Exception as e:
+            if columns:
+                self._drop(name)
+            raise RuntimeError(f"Failed to import '{path}' into table '{name}': {e}") from e
+        if not columns:
+            raise ValueError(f"'{path}' has no columns to import.")
+        self.pending[name] = columns
+        self._bump(name)
+        return rows
 
-            # Use create to handle adding/replacing in manager and pushing to DB
-            # If table exists, create will raise ValueError, which is okay for load.
-            # We might want a different behavior? Overwrite on load?
-            # For now, let's just update the in-memory dict and push.
-            # This avoids the Table already exists error from self.create()
-            self.tables[name] = df
-            self._push(name) # Push to DB immediately after loading
+    def _append_rows(self, name: str, chunk: pd.DataFrame, create: bool,
+                     added: Sequence[str] = ()) -> None:
+        """Insert one chunk of an import, creating the table from the first
+        and adding the `added` columns first."""
+        cols = ", ".join(_quote(c) for c in chunk.columns)
+        placeholders = ", ".join("?" * chunk.shape[1])
+        with self.conn:   # one transaction per chunk keeps the journal small
+            if create:
+                self.conn.execute(_create_table_sql(name, chunk))
+            for col in added:
+                self.conn.execute(f"ALTER TABLE {_quote(name)} ADD COLUMN {_column_sql(col, chunk[col])}")
+            self.conn.executemany(f"INSERT INTO {_quote(name)} ({cols}) VALUES ({placeholders})",
+                                  _sqlite_rows(chunk))
 
-        except Exception as e:
-            # Catch potential pickle errors, etc.
-            raise RuntimeError(f"Failed to load table '{name}' from {path}: {e}")
+    def _table_file(self, name: str) -> Path:
+        """Saved file for `name` in the temp dir, in the most preferred format present."""
+        candidates = [self.temp_dir / f"{name}{suffix}" for suffix in TABLE_SUFFIXES]
+        path = next((p for p in candidates if p.exists()), None)
+        if path is None:
+             # Provide a more specific error message
+             raise FileNotFoundError(f"Table file not found at expected location: {candidates[0]}")
+        return path
 
     def save(self, name: str, path: str | Path) -> None:
+        self.materialize([name])
         if name not in self.tables:
              raise ValueError(f"Table '{name}' not found.")
         path = Path(path)
-        if path.suffix != ".pkl":
-             # For simplicity, only supporting pickle for save initially
-             # Could add .parquet, .csv with more options later
-             raise ValueError("Can only save to '.pkl' files currently.")
+        if path.suffix not in TABLE_SUFFIXES:
+             raise ValueError(f"Can only save to {', '.join(TABLE_SUFFIXES)} files currently.")
         try:
-             self.tables[name].to_pickle(path)
+             _write_table(self.tables[name], path)
         except Exception as e:
             raise RuntimeError(f"Failed to save table '{name}' to {path}: {e}")
 
 
-    def export(self, name: str, path: str | Path) -> None:
-        if name not in self.tables:
+    def export(self, name: str, path: str | Path) -> int:
+        """Write a table to a .csv, .jsonl, .parquet or .feather file (text
+        formats optionally .gz/.bz2/.xz compressed); returns the row count.
+        A table held in pandas is written from its DataFrame, keeping its
+        dtypes; a pending one is streamed from the database without pulling it."""
+        if name in self.tables:
+            df = self.tables[name]
+            chunks = (df.iloc[start:start + BULK_CHUNK_ROWS]
+                      for start in range(0, max(len(df), 1), BULK_CHUNK_ROWS))
+            return self._export_chunks(chunks, path, f"table '{name}'")
+        if name not in self.pending:
             raise ValueError(f"Table '{name}' not found.")
+        return self.export_query(f"SELECT * FROM {_quote(name)}", path)
+
+    def export_query(self, sql: str, path: str | Path) -> int:
+        """Write the result of a query to a file like export(), fetching it
+        from the cursor BULK_CHUNK_ROWS rows at a time."""
+        return self._export_chunks(self._query_chunks(sql, BULK_CHUNK_ROWS), path, "query result")
+
+    def _export_chunks(self, chunks: Iterable[pd.DataFrame], path: str | Path, what: str) -> int:
         path = Path(path)
-        if path.suffix != ".csv":
-             raise ValueError("Can only export to '.csv' files currently.")
+        export_format(path)   # unsupported file types are a usage error
+        self.close_result()
+        rows = 0
+
+        def on_chunk(n: int) -> None:
+            nonlocal rows
+            rows += n
+            self._progress_note = f"{rows:,} rows"
+            if self._cancelled:
+                raise sqlite3.OperationalError("interrupted")
+
         try:
-            self.tables[name].to_csv(path, index=False)
+            write_chunks(chunks, path, on_chunk)
         except Exception as e:
-            raise RuntimeError(f"Failed to export table '{name}' to {path}: {e}")
+            raise RuntimeError(f"Failed to export {what} to {path}: {e}") from e
+        return rows
 
+    def _query_chunks(self, sql: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """Result of sql as DataFrames of up to chunk_rows rows (at least one,
+        so an empty result still has its columns)."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql)
+            if cursor.description is None:
+                raise ValueError("Only statements that return rows can be exported.")
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchmany(chunk_rows)
+            while True:
+                yield pd.DataFrame.from_records(rows, columns=columns)
+                if len(rows) < chunk_rows or not (rows := cursor.fetchmany(chunk_rows)):
+                    break
+        finally:
+            cursor.close()
 
     def schema(self, name: str) -> pd.DataFrame:
          if name not in self.tables:
              # Check DB directly in case it was created purely via SQL
-             cursor = self.conn.cursor()
-             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (name,))
-             if cursor.fetchone() is None:
+             if name not in self._db_tables():
                  raise ValueError(f"Table '{name}' not found in Python or database.")
              # For now, just show schema from DB if it exists there.
          try:
-             return pd.read_sql_query(f"PRAGMA table_info('{name}')", self.conn)
+             return self.query(f"PRAGMA table_info('{name}')")
          except Exception as e:
              raise RuntimeError(f"Failed to get schema for table '{name}': {e}")
 
 
+    def create_index(self, table: str, columns: Sequence[str]) -> str:
+        """Create an index on columns of a table and return its name. Indexes
+        are kept when the table is pushed again (see _replace)."""
+        known = self.table_columns().get(table)
+        if known is None:
+            raise ValueError(f"Table '{table}' not found.")
+        if not columns:
+            raise ValueError("No columns given to index.")
+        missing = [c for c in columns if c not in known]
+        if missing:
+            raise ValueError(f"Table '{table}' has no column(s) {', '.join(missing)}.")
+        name = f"ix_{table}_{'_'.join(columns)}"
+        self.close_result()
+        try:
+            with self.conn:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table)} "
+                                  f"({', '.join(_quote(c) for c in columns)})")
+        except sqlite3.Error as e:
+            raise sqlite3.Error(f"Failed to create index on '{table}': {e}")
+        return name
+
+    def drop_index(self, name: str) -> None:
+        if name not in set(self.indexes()["index"]):
+            raise ValueError(f"Index '{name}' not found.")
+        self.close_result()
+        with self.conn:
+            self.conn.execute(f"DROP INDEX {_quote(name)}")
+
+    def indexes(self) -> pd.DataFrame:
+        """Indexes on tables in the database (not those SQLite makes for
+        PRIMARY KEY/UNIQUE constraints), with their columns."""
+        rows = self.conn.execute(
+            "SELECT tbl_name, name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            "ORDER BY tbl_name, name"
+        ).fetchall()
+        return pd.DataFrame(
+            [(table, name, ", ".join(r[2] for r in self.conn.execute(f"PRAGMA index_info({_quote(name)})")))
+             for table, name in rows],
+            columns=["table", "index", "columns"])
+
+    def _advise(self, sql: str) -> None:
+        """Feed the query plan of sql to the index advisor; in auto mode,
+        create the indexes it asks for before the query runs."""
+        try:
+            plan = [row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+        except sqlite3.Error:
+            return   # the query itself will report the error
+        for table, columns in self.advisor.observe(sql, plan, self.table_columns()):
+            cols = ", ".join(columns)
+            if self.advisor.auto:
+                name = self.create_index(table, columns)
+                self.advisor.hint(f"Created index {name} on {table}({cols}) for repeated scans.")
+            else:
+                self.advisor.hint(f"Queries keep scanning '{table}' for {cols}; "
+                                  f"/index {table} {','.join(columns)} would avoid that.")
+
     def list(self) -> List[str]:
-        return sorted(list(self.tables))
+        return sorted(list(self.tables) + list(self.pending))
+
+    def table_columns(self) -> dict[str, Sequence[str]]:
+        """Column names of every table, including ones not pulled into pandas yet."""
+        return {**self.pending, **{name: df.columns for name, df in self.tables.items()}}
+
+    def memory(self) -> pd.DataFrame:
+        """Deep memory use of each table held in pandas, next to an estimate
+        of what it would take with the plain dtypes read back from SQLite."""
+        rows = []
+        for name, df in sorted(self.tables.items()):
+            used, plain = int(df.memory_usage(index=True, deep=True).sum()), plain_nbytes(df)
+            rows.append((name, len(df), used / 1024 ** 2, plain / 1024 ** 2,
+                         1 - used / plain if plain else 0.0))
+        report = pd.DataFrame(rows, columns=["table", "rows", "memory_mb", "plain_mb", "saved"])
+        if len(report) > 1:
+            report.loc[len(report)] = ["(total)", report.rows.sum(), report.memory_mb.sum(),
+                                       report.plain_mb.sum(),
+                                       1 - report.memory_mb.sum() / report.plain_mb.sum()
+                                       if report.plain_mb.sum() else 0.0]
+        return report.round({"memory_mb": 2, "plain_mb": 2, "saved": 3})
+
+    def materialize(self, names: Iterable[str]) -> List[str]:
+        """Pull pending tables among `names` into pandas; returns those pulled."""
+        pulled = [name for name in names if name in self.pending]
+        for name in pulled:
+            self._pull(name)
+            del self.pending[name]   # only once pulled: a failed pull leaves it pending
+        return pulled
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """The DataFrame for `name`, pulling it from the database if pending."""
+        self.materialize([name])
+        if name not in self.tables:
+            raise ValueError(f"Table '{name}' not found.")
+        return self.tables[name]
+
+    def bind(self, namespace: MutableMapping[str, Any]) -> None:
+        """Bind every table into `namespace`: loaded tables as DataFrames,
+        pending ones as TableProxy objects that load on first use. A `sql`
+        function (see sql()) is added unless the name is already taken."""
+        namespace.update(self.tables)
+        if "sql" not in namespace:
+            namespace["sql"] = SqlFunction(self, namespace)
+        for name in self.pending:
+            current = namespace.get(name)
+            if not (isinstance(current, TableProxy) and current._proxy_mgr is self):
+                namespace[name] = TableProxy(self, name, namespace)
 
     def clear(self, name: str) -> None:
         """Remove a table from the manager and drop it from the database."""
-        if name not in self.tables:
+        if name not in self.tables and name not in self.pending:
             raise ValueError(f"Table '{name}' not found.")
         # Remove from in-memory dict
-        del self.tables[name]
+        self.tables.pop(name, None)
+        self.pending.pop(name, None)
+        self._synced.pop(name, None)
+        self._forget_dtypes(name)
         # Drop table in SQLite
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(f"DROP TABLE IF EXISTS {name}")
-            self.conn.commit()
+            self._drop(name)
         except Exception as e:
             raise sqlite3.Error(f"Failed to drop table '{name}': {e}")
 
     def clear_all(self) -> None:
         """Remove all tables from the manager and drop them from the database."""
-        for name in list(self.tables.keys()):
+        for name in self.list():
             self.clear(name)
 
+    # ---------- SQL execution ----------------------------------------------
+    def query(self, sql: str) -> pd.DataFrame:
+        """Run a row-returning statement (SELECT, PRAGMA, ...) and return its result."""
+        return pd.read_sql_query(sql, self.conn)
+
+    def execute(self, sql: str) -> None:
+        """Run one or more non-query statements."""
+        self.close_result()
+        self.conn.executescript(sql)
+        self.conn.commit()
+
+    def stream(self, sql: str) -> QueryResult:
+        """Run a query and return its result, fetched from the cursor a page at
+        a time; it becomes `last_result` for paging."""
+        self.close_result()
+        if self.parallel is not None:
+            frame = self.parallel.run(self, sql)
+            if frame is not None:
+                self.last_result = QueryResult(sql, lambda _: FrameCursor(frame),
+                                               self._close_cursor, self.page_size)
+                return self.last_result
+        self._advise(sql)
+        self.last_result = QueryResult(sql, self._open_cursor, self._close_cursor, self.page_size,
+                                       versions=lambda: self.read_versions(sql))
+        return self.last_result
+
+    def close_result(self) -> None:
+        """Release the cursor of a partially read result. SQLite refuses to drop
+        or replace a table while a statement reading it is still open."""
+        if self.last_result is not None:
+            self.last_result.close()
+
+    def sql(self, query: str, params: Sequence | Mapping | None = None,
+            chunksize: int | None = None, records: bool = False,
+            namespace: MutableMapping[str, Any] | None = None) -> Any:
+        """Run one statement with bound parameters: a sequence for `?`
+        placeholders, a mapping for `:name` ones. This is the `sql` function
+        bound into the Python namespace.
+
+        A query returns a DataFrame, or a NumPy record array with
+        records=True; with `chunksize`, a generator of those of up to that
+        many rows each. Other statements return None. Tables the statement
+        modifies become pending, as after a SQL command, and are rebound in
+        `namespace` if given.
+
+        Statements are remembered by text, so a loop running the same one
+        pays for its analysis once: the tables it reaches and writes are
+        worked out on its first run only (with SQLite, the authorizer that
+        tracks them forces the statement to be compiled again, bypassing
+        the connection's prepared-statement cache). DataFrames it reaches
+        are pushed before every run if they changed.
+        """
+        if chunksize is not None and chunksize < 1:
+            raise ValueError("chunksize must be a positive number of rows.")
+        stmt = self._statements.get(query)
+        used = stmt.used if stmt is not None else None
+        if used is None:
+            # Not analysed yet, or it couldn't be (e.g. its table didn't exist)
+            used = self.tables_used(query, () if params is None else params)
+            if stmt is not None:
+                stmt.used = used
+        # Untouched tables are skipped without hashing them (see push_all)
+        self.push_all(used)
+        self.close_result()
+        if stmt is None:
+            with self.track_writes() as written:
+                cursor = self._param_cursor(query, params)
+            stmt = _Statement(used, frozenset(written))
+            self._statements[query] = stmt
+            if len(self._statements) > STATEMENT_CACHE_SIZE:
+                self._statements.popitem(last=False)
+        else:
+            self._statements.move_to_end(query)
+            cursor = self._param_cursor(query, params)
+
+        if not self._returns_rows(cursor, stmt.written):
+            self._close_cursor(cursor)
+            frames = None
+        elif stmt.written:
+            # RETURNING rows: read them all before the writes are committed
+            frame = self._fetch_frame(cursor)
+            frames = iter([frame]) if chunksize is None else _slices(frame, chunksize)
+        elif chunksize:
+            frames = self._fetch_chunks(cursor, chunksize)
+        else:
+            frames = iter([self._fetch_frame(cursor)])
+        if stmt.written:
+            self.conn.commit()
+            self.refresh(stmt.written)
+            if namespace is not None:
+                self.bind(namespace)
+        if frames is None:
+            return None
+        if records:
+            frames = (frame.to_records(index=False) for frame in frames)
+        return frames if chunksize else next(frames)
+
+    def _param_cursor(self, query: str, params: Sequence | Mapping | None) -> Any:
+        """Cursor that has run query with params (see sql())."""
+        return self.conn.cursor().execute(query, () if params is None else params)
+
+    def _returns_rows(self, cursor: Any, written: frozenset[str]) -> bool:
+        return cursor.description is not None
+
+    def _fetch_frame(self, cursor: Any) -> pd.DataFrame:
+        """All remaining rows of a query cursor as one DataFrame; closes it."""
+        try:
+            columns = [d[0] for d in cursor.description]
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=columns,
+                                             coerce_float=True)
+        finally:
+            self._close_cursor(cursor)
+
+    def _fetch_chunks(self, cursor: Any, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """Rows of a query cursor as DataFrames of up to chunk_rows rows (at
+        least one); closes the cursor when done or when the iterator is."""
+        columns = [d[0] for d in cursor.description]
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+                if len(rows) < chunk_rows:
+                    break
+        finally:
+            self._close_cursor(cursor)
+
+    def _open_cursor(self, sql: str) -> Any:
+        return self.conn.cursor().execute(sql)
+
+    def _close_cursor(self, cursor: Any) -> None:
+        cursor.close()
+
+    def _drop(self, name: str) -> None:
+        self.close_result()
+        self._bump(name)
+        cursor = self.conn.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {name}")
+        self.conn.commit()
+
     # ---------- sync helpers -----------------------------------------------
-    def _push(self, name: str) -> None:
+    def _push(self, name: str, row_hashes: np.ndarray | None = None) -> bool:
+        """Sync one table to SQLite. Returns True if only changed rows were sent."""
         if name not in self.tables:
-             return
+             return False
         df = self.tables[name]
+        if row_hashes is None:
+            row_hashes = _hash_rows(df)
         # Skip push for DataFrames with no columns to avoid SQL CREATE TABLE syntax error
         if len(df.columns) == 0:
-            return
+            self._synced[name] = _Snapshot(_fingerprint(df, row_hashes), _schema(df))
+            self._bump(name)
+            return False
+        self.close_result()
         try:
-            df.to_sql(name, self.conn, if_exists="replace",
-                      index=False, method="multi")
-            self.conn.commit() # Commit changes
+            if self.delta_sync and self._push_delta(name, df, row_hashes):
+                return True
+            self._replace(name, df)
         except Exception as e:
+            # Forget the old snapshot so the next push_all retries this table in full
+            self._synced.pop(name, None)
             raise sqlite3.Error(f"Failed to push table '{name}' to SQLite: {e}")
+        # Rows go in order into a fresh table, so rowids are 1..n
+        self._record(name, df, row_hashes, np.arange(1, len(df) + 1, dtype=np.int64))
+        return False
+
+    def _replace(self, name: str, df: pd.DataFrame) -> None:
+        """Drop and recreate `name` from df in one transaction: typed CREATE TABLE,
+        then executemany over column-wise tuples in BULK_CHUNK_ROWS slices."""
+        cols = ", ".join(_quote(c) for c in df.columns)
+        placeholders = ", ".join("?" * df.shape[1])
+        insert = f"INSERT INTO {_quote(name)} ({cols}) VALUES ({placeholders})"
+        # The rollback journal only costs time for an in-memory database: the
+        # table is rewritten in full anyway, and dropped below if loading fails.
+        unjournaled = self._in_memory and not self.conn.in_transaction
+        if unjournaled:
+            self.conn.execute("PRAGMA journal_mode = OFF")
+        try:
+            with self.conn:   # commit on success, roll back on error
+                if not self.conn.in_transaction:
+                    self.conn.execute("BEGIN")
+                # Dropping the table drops its indexes; rebuild them afterwards
+                # (which is also faster than updating them row by row)
+                indexes = [sql for (sql,) in self.conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? "
+                    "AND sql IS NOT NULL", (name,))]
+                self.conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+                self.conn.execute(_create_table_sql(name, df))
+                for start in range(0, len(df), BULK_CHUNK_ROWS):
+                    self.conn.executemany(insert, _sqlite_rows(df.iloc[start:start + BULK_CHUNK_ROWS]))
+                for sql in indexes:
+                    try:
+                        self.conn.execute(sql)
+                    except sqlite3.OperationalError:
+                        pass   # an indexed column is gone
+        except Exception:
+            if unjournaled:
+                self.conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+            raise
+        finally:
+            if unjournaled:
+                self.conn.execute("PRAGMA journal_mode = MEMORY")
+
+    def _push_delta(self, name: str, df: pd.DataFrame, row_hashes: np.ndarray | None) -> bool:
+        """Send only inserted/updated/deleted rows, keyed on SQLite rowid.
+        Returns False (nothing written) when a full replace is needed instead:
+        no usable snapshot, changed schema, non-unique index, rows reordered
+        or inserted mid-frame, or too many changes.
+        """
+        snap = self._synced.get(name)
+        if (snap is None or snap.rowids is None or row_hashes is None
+                or snap.schema != _schema(df)
+                or not df.index.is_unique or not snap.index.is_unique):
+            return False
 
+        # Position of each current row label in the snapshot (-1 = new row)
+        pos = snap.index.get_indexer(df.index)
+        is_new = pos == -1
+        kept = ~is_new
+        # Rowids follow the frame's row order; a reorder, or rows inserted
+        # before the last surviving one, can only be mirrored by a rewrite
+        kept_at = np.flatnonzero(kept)
+        if len(kept_at) and (np.any(np.diff(pos[kept_at]) < 0)
+                             or is_new[:kept_at[-1]].any()):
+            return False
+        is_changed = np.zeros(len(df), dtype=bool)
+        is_changed[kept] = snap.row_hashes[pos[kept]] != row_hashes[kept]
+        still_there = np.zeros(len(snap.index), dtype=bool)
+        still_there[pos[kept]] = True
+        deleted = snap.rowids[~still_there]
 
-    def push_all(self) -> None:
-        for name in self.tables:
-            self._push(name) # _push now includes error handling
+        n_changes = int(is_new.sum() + is_changed.sum() + len(deleted))
+        if n_changes > DELTA_MAX_CHANGED_FRACTION * max(len(df), 1):
+            return False
+
+        rowids = np.empty(len(df), dtype=np.int64)
+        rowids[kept] = snap.rowids[pos[kept]]
+        next_rowid = int(snap.rowids.max(initial=0)) + 1
+        rowids[is_new] = np.arange(next_rowid, next_rowid + int(is_new.sum()))
+
+        table = _quote(name)
+        cols = [_quote(c) for c in df.columns]
+        with self.conn:   # one transaction, rolled back on error
+            if len(deleted):
+                self.conn.executemany(f"DELETE FROM {table} WHERE rowid = ?",
+                                      [(int(r),) for r in deleted])
+            if is_changed.any():
+                assignments = ", ".join(f"{c} = ?" for c in cols)
+                self.conn.executemany(
+                    f"UPDATE {table} SET {assignments} WHERE rowid = ?",
+                    _sqlite_rows(df[is_changed], rowids[is_changed]))
+            if is_new.any():
+                placeholders = ", ".join("?" * (len(cols) + 1))
+                self.conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(cols)}, rowid) VALUES ({placeholders})",
+                    _sqlite_rows(df[is_new], rowids[is_new]))
+
+        self.sync_stats.rows_inserted += int(is_new.sum())
+        self.sync_stats.rows_updated += int(is_changed.sum())
+        self.sync_stats.rows_deleted += len(deleted)
+        self._record(name, df, row_hashes, rowids)
+        return True
+
+    def _record(self, name: str, df: pd.DataFrame, row_hashes: np.ndarray | None,
+                rowids: np.ndarray | None) -> None:
+        """Remember what was just synced for `name`."""
+        self._synced[name] = _Snapshot(_fingerprint(df, row_hashes), _schema(df),
+                                       df.index, row_hashes, rowids, _shallow_copy(df))
+        previous = self._dtypes.get(name)
+        self._dtypes[name] = df.dtypes
+        if not self._in_memory and (previous is None or not previous.equals(df.dtypes)):
+            # A workspace keeps them too, for the tables it restores next session
+            with self.conn:
+                self.conn.execute(f"INSERT OR REPLACE INTO {DTYPES_TABLE} VALUES (?, ?)",
+                                  (name, dtypes_to_json(df.dtypes)))
+        self._bump(name)
+
+    def _load_dtypes(self) -> None:
+        """Read the dtypes a workspace recorded for its tables (see _record)."""
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {DTYPES_TABLE} "
+                          "(name TEXT PRIMARY KEY, dtypes TEXT NOT NULL)")
+        self.conn.commit()
+        for name, text in self.conn.execute(f"SELECT name, dtypes FROM {DTYPES_TABLE}"):
+            if name in self.pending:
+                try:
+                    self._dtypes[name] = dtypes_from_json(text)
+                except (TypeError, ValueError):
+                    pass   # not written by dtypes_to_json: plain dtypes
+
+    def _forget_dtypes(self, name: str) -> None:
+        if self._dtypes.pop(name, None) is not None and not self._in_memory:
+            with self.conn:
+                self.conn.execute(f"DELETE FROM {DTYPES_TABLE} WHERE name = ?", (name,))
+
+    def _bump(self, name: str) -> None:
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+    def push_all(self, names: Iterable[str] | None = None) -> None:
+        """Push tables (all, or those among `names`) whose contents changed
+        since their last sync; skip the rest. A frame that provably wasn't
+        touched since (see _untouched) is skipped without hashing it; that
+        check is only trusted for hashable contents, as values such as lists
+        can be changed in place."""
+        for name, df in self.tables.items():
+            if names is not None and name not in names:
+                continue
+            snap = self._synced.get(name)
+            if snap is not None and snap.fingerprint is not None and _untouched(df, snap.frame):
+                self.sync_stats.skipped += 1
+                continue
+            row_hashes = _hash_rows(df)
+            fp = _fingerprint(df, row_hashes)
+            if fp is not None and snap is not None and snap.fingerprint == fp:
+                snap.frame = _shallow_copy(df)   # so the next check is cheap again
+                self.sync_stats.skipped += 1
+                continue
+            if self._push(name, row_hashes): # _push now includes error handling
+                self.sync_stats.delta += 1
+            else:
+                self.sync_stats.pushed += 1
 
     def _pull(self, name: str) -> None:
         try:
-            self.tables[name] = pd.read_sql_query(f"SELECT * FROM {name}", self.conn)
+            try:
+                df = pd.read_sql_query(f'SELECT rowid AS "__rowid__", * FROM "{name}"', self.conn)
+                rowids = df.pop("__rowid__").to_numpy(dtype=np.int64)
+            except Exception:
+                # e.g. WITHOUT ROWID tables: pull plainly, next push is a full replace
+                df = pd.read_sql_query(f"SELECT * FROM {name}", self.conn)
+                rowids = None
+            df = restore_dtypes(df, self._dtypes.get(name, {}))
+            self.tables[name] = df
+            self._record(name, df, _hash_rows(df), rowids)
         except Exception as e:
+             # An interrupted read, or one that failed while the table is still
+             # there, must not lose it
+             if self._cancelled or name in self._db_tables():
+                 raise
              # If table doesn't exist in DB (e.g., dropped via SQL)
              # Should we remove from self.tables? Yes.
              if name in self.tables:
                  del self.tables[name]
+             self._synced.pop(name, None)
+             self._forget_dtypes(name)
+             self._bump(name)
+
+    def _db_tables(self) -> set[str]:
+        """User tables currently in the database (SQLite's internal tables and
+        DTYPES_TABLE excluded)."""
+        try:
+            rows = self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' "
+                "AND name <> ?", (DTYPES_TABLE,)).fetchall()
+        except Exception as e:
+             raise sqlite3.Error(f"Failed to query database master table: {e}")
+        return {row[0] for row in rows}
+
+    def _db_views(self) -> set[str]:
+        rows = self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'view' "
+            "UNION SELECT name FROM sqlite_temp_master WHERE type = 'view'").fetchall()
+        return {row[0] for row in rows}
+
+    def _db_columns(self, name: str) -> list[str]:
+        rows = self.conn.execute(f"PRAGMA table_info({_quote(name)})").fetchall()
+        return [row[1] for row in rows]
+
+    @contextmanager
+    def track_writes(self) -> Iterator[set[str]]:
+        """Collect the names of tables that SQL run inside the block may
+        modify, and bump their versions.
+
+        Uses an authorizer callback, which SQLite invokes while preparing each
+        statement, so read-only queries yield an empty set.
+        """
+        written: set[str] = set()
+
+        def authorizer(action, arg1, arg2, db_name, trigger):
+            pos = _WRITE_ACTIONS.get(action)
+            # Tables in other attached databases (e.g. the scratch database
+            # parallel mode splits tables in) are not managed
+            if pos is not None and db_name in (None, "main", "temp"):
+                table = (arg1, arg2)[pos]
+                if table and not table.startswith("sqlite_"):
+                    written.add(table)
+            return sqlite3.SQLITE_OK
+
+        self.conn.set_authorizer(authorizer)
+        try:
+            yield written
+        finally:
+            self.conn.set_authorizer(None)
+            # Right away, not at the refresh: scripts defer that (see batch)
+            for name in written:
+                self._bump(name)
+
+    def tables_read(self, sql: str) -> set[str] | None:
+        """Tables a single statement reads, or None if it can't be prepared.
+
+        Preparing `EXPLAIN <sql>` runs the authorizer for every table the
+        statement reads (views resolved to their base tables) without
+        executing it.
+        """
+        return self._explain_tables(sql, (), writes=False)
+
+    def tables_used(self, sql: str, params: Sequence | Mapping = ()) -> set[str] | None:
+        """Tables a single statement reads or writes, directly or through
+        views and triggers, or None if it can't be prepared (see tables_read)."""
+        return self._explain_tables(sql, params, writes=True)
+
+    def _explain_tables(self, sql: str, params: Sequence | Mapping,
+                        writes: bool) -> set[str] | None:
+        found: set[str] = set()
+
+        def authorizer(action, arg1, arg2, db_name, trigger):
+            if action == sqlite3.SQLITE_READ and arg1:
+                found.add(arg1)
+                if trigger:
+                    found.add(trigger)   # the view (or trigger) doing the reading
+            elif writes and (pos := _WRITE_ACTIONS.get(action)) is not None:
+                table = (arg1, arg2)[pos]
+                if table and not table.startswith("sqlite_"):
+                    found.add(table)
+            return sqlite3.SQLITE_OK
+
+        self.close_result()
+        self.conn.set_authorizer(authorizer)
+        try:
+            self.conn.execute(f"EXPLAIN {sql}", params).close()
+        except sqlite3.Error:
+            return None
+        finally:
+            self.conn.set_authorizer(None)
+        return found
+
+    def read_versions(self, sql: str) -> dict[str, int] | None:
+        """Current version of each table and view sql reads, to validate a
+        cached result; None when the result must not be cached (reads
+        something other than managed tables and views over them, or can't
+        be analysed). A view's version is bumped when it is redefined."""
+        read = self.tables_read(sql)
+        if read is None:
+            return None
+        other = read - set(self.tables) - set(self.pending)
+        if other and not other <= self._db_views():
+            return None
+        return {name: self.versions.get(name, 0) for name in read}
+
+    def refresh(self, names: Iterable[str]) -> None:
+        """Mark the given tables (e.g. those a SQL statement wrote) and newly
+        created ones as pending, so each is pulled only when Python next uses
+        it; tables that no longer exist are dropped."""
+        names = set(names)
+        if not names:
+            return   # nothing written, nothing to pull
+        db_tables = self._db_tables()
+        for name in set(self.tables) - db_tables:
+            del self.tables[name]
+            self._synced.pop(name, None)
+            self._forget_dtypes(name)
+            self._bump(name)
+        for name in set(self.pending) - db_tables:
+            del self.pending[name]
+            self._forget_dtypes(name)
+            self._bump(name)
+        for name in (names & db_tables) | (db_tables - set(self.tables) - set(self.pending)):
+            # The database copy is now the current one; nothing to pull until it's used
+            self.tables.pop(name, None)
+            self._synced.pop(name, None)
+            self.pending[name] = self._db_columns(name)
+            self._bump(name)
 
     def refresh_all(self) -> None:
         # Get tables currently known to the manager
         managed_tables = set(self.tables.keys())
 
         # Get tables actually in the database
-        try:
-            db_tables_df = pd.read_sql_query("SELECT name FROM sqlite_master WHERE type='table'", self.conn)
-            db_tables = set(db_tables_df['name'])
-        except Exception as e:
-             raise sqlite3.Error(f"Failed to query database master table: {e}")
+        db_tables = self._db_tables()
 
         # Tables to remove from manager (exist in manager but not DB)
         to_remove = managed_tables - db_tables
         for name in to_remove:
             del self.tables[name]
+            self._synced.pop(name, None)
+            self._forget_dtypes(name)
+            self._bump(name)
 
-        # Tables to pull/refresh (exist in DB)
+        # Tables to pull/refresh (exist in DB), including pending ones
+        self.pending.clear()
         for name in db_tables:
              self._pull(name) # _pull handles adding/updating self.tables 
 
-    def save_all_to_temp(self, directory: Path) -> None:
-        """Saves all current tables to the specified temp directory as .pkl files."""
+    def save_all_to_temp(self, directory: Path,
+                          on_progress: Callable[[int, int], None] | None = None,
+                          saved: set[str] | None = None) -> None:
+        """Saves all current tables to the temp directory as memory-mappable
+        .feather files (.pkl when pyarrow is missing or can't hold the data),
+        several tables at a time. Each file is written atomically, and its
+        table name added to `saved` if given, so an interrupted save can
+        tell which tables it didn't get to."""
+        for name in list(self.pending):
+            if self._cancelled:
+                raise sqlite3.OperationalError("interrupted")
+            self.materialize([name])
         # Use self.temp_dir consistently
         self.temp_dir.mkdir(parents=True, exist_ok=True) # Ensure directory exists
-        for name, df in self.tables.items():
-            filepath = self.temp_dir / f"{name}.pkl"
-            try:
-                df.to_pickle(filepath)
-                # print(f"DEBUG: Saved {name} to {filepath}") # Optional debug
-            except Exception as e:
-                # Use console.print for errors if available, or just print
-                print(f"[Warning] Failed to auto-save table '{name}' to {filepath}: {e}") 
\ No newline at end of file
+        preferred = ".feather" if _has_pyarrow() else ".pkl"
+        items = list(self.tables.items())
+        self._table_progress(on_progress, 0, len(items))
+        with ThreadPoolExecutor(max_workers=min(IO_WORKERS, len(items)) or 1) as pool:
+            futures = {pool.submit(self._save_to_temp, name, df, preferred): name
+                       for name, df in items}
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    future.result()
+                    if saved is not None:
+                        saved.add(futures[future])
+                except Exception as e:
+                    # Use console.print for errors if available, or just print
+                    print(f"[Warning] Failed to auto-save table '{futures[future]}': {e}")
+                self._table_progress(on_progress, done, len(items))
+                if self._cancelled:
+                    for future in futures:
+                        future.cancel()   # tables not started yet are left unsaved
+                    raise sqlite3.OperationalError("interrupted")
+
+    def _save_to_temp(self, name: str, df: pd.DataFrame, preferred: str) -> None:
+        filepath = self.temp_dir / f"{name}{preferred}"
+        try:
+            _write_table(df, filepath)
+        except Exception:
+            if preferred == ".pkl":
+                raise
+            # e.g. object columns with mixed types that Arrow rejects
+            filepath = filepath.with_suffix(".pkl")
+            _write_table(df, filepath)
+        # Remove copies in other formats so load() can't pick a stale one
+        for suffix in TABLE_SUFFIXES:
+            if suffix != filepath.suffix:
+                (self.temp_dir / f"{name}{suffix}").unlink(missing_ok=True)
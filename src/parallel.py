@@ -0,0 +1,496 @@
+"""
+Parallel execution of aggregate queries over large SQLite tables.
+
+SQLite runs a statement on one core. In parallel mode (`/parallel on`) a pool
+of worker processes each holds one row range of a managed table: a copy of
+those rows in the worker's own in-memory database, or, for an on-disk
+workspace, a view over a rowid range of the workspace file. A query of the
+form
+
+    SELECT <group columns>, SUM|COUNT|MIN|MAX|AVG|TOTAL(...) FROM <table>
+    [WHERE ...] [GROUP BY ...] [ORDER BY <result columns>] [LIMIT n [OFFSET m]]
+
+over a table of at least PARALLEL_MIN_ROWS rows is rewritten into a partial
+aggregate that every worker runs on its range. The partial results are merged
+in pandas: sums and counts added up, minima and maxima combined, and AVG
+computed from the summed TOTAL and COUNT. Anything else (joins, subqueries,
+DISTINCT, HAVING, window functions, ...) runs serially as before, as does a
+query a worker fails on.
+
+A table is split the first time a parallel query reads it and again whenever
+its version changes (see TableManager.versions).
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+import math
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+import os
+from pathlib import Path
+import re
+import sqlite3
+from typing import TYPE_CHECKING, Any
+
+from .cache import normalize_sql
+from .lazy import lazy_import
+
+if TYPE_CHECKING:
+    from .manager import TableManager
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Tables with fewer rows are queried serially: below this, starting the
+# partial queries and merging costs more than it saves
+PARALLEL_MIN_ROWS = 1_000_000
+# Database attached to the main connection while a table is being split
+_SCRATCH = "__partition"
+# How often a wait for the workers checks for Ctrl-C
+_POLL_INTERVAL = 0.1
+
+_AGGREGATES = ("SUM", "COUNT", "MIN", "MAX", "AVG", "TOTAL")
+_ANY_AGGREGATE = re.compile(
+    r"\b(?:SUM|COUNT|MIN|MAX|AVG|TOTAL|GROUP_CONCAT|STRING_AGG|JSON_GROUP_ARRAY"
+    r"|JSON_GROUP_OBJECT|MEDIAN)\s*\(", re.IGNORECASE)
+_SHAPE = re.compile(
+    r"\s*SELECT\s+(?P<select>.+?)\s+FROM\s+(?P<from>.+?)"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+GROUP\s+BY\s+(?P<group>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+(?P<order>.+?))?"
+    r"(?:\s+LIMIT\s+(?P<limit>\d+)(?:\s+OFFSET\s+(?P<offset>\d+))?)?\s*",
+    re.IGNORECASE | re.DOTALL,
+)
+_TABLE = re.compile(r'"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.IGNORECASE)
+# Clauses the merge can't reproduce, at the top level of the query
+_UNSUPPORTED = re.compile(r"\b(?:DISTINCT|ALL|HAVING|WINDOW|UNION|INTERSECT|EXCEPT|JOIN)\b",
+                          re.IGNORECASE)
+# ... or anywhere in it
+_NESTED = re.compile(r"\b(?:SELECT|OVER|DISTINCT|FILTER)\b", re.IGNORECASE)
+_CALL = re.compile(r"\s*(\w+)\s*\(\s*\)\s*", re.IGNORECASE)
+# `expr AS alias`, or `f(...) alias`; matched against the masked item, so a
+# quoted alias shows as its quotes around blanks
+_ALIAS = re.compile(r'(.*?)\s+AS\s+("\s*"|\w+)\s*|(.*\))\s*("\s*"|\w+)\s*',
+                    re.IGNORECASE | re.DOTALL)
+_COLUMN = re.compile(r'(?:"?\w+"?\.)?(?:(\w+)|"([^"]+)")')
+_ORDER_TERM = re.compile(r"(.+?)(?:\s+(ASC|DESC))?\s*", re.IGNORECASE | re.DOTALL)
+
+
+def _mask(sql: str, parens: bool = True) -> str | None:
+    """sql with the insides of quotes (and, if parens, of parentheses)
+    blanked out, same length, so keywords and commas found in it are at the
+    top level. None if sql has comments."""
+    out = []
+    quote = None
+    depth = 0
+    for i, char in enumerate(sql):
+        if quote is not None:
+            closing = char == quote
+            if closing:
+                quote = None
+            out.append(char if closing and not (parens and depth) else " ")
+            continue
+        if char in "'\"`[" and not (parens and depth):
+            quote = "]" if char == "[" else char
+            out.append(char)
+            continue
+        if sql.startswith(("--", "/*"), i):
+            return None
+        if char == "(":
+            depth += 1
+            out.append(char if depth == 1 or not parens else " ")
+        elif char == ")":
+            depth -= 1
+            out.append(char if depth == 0 or not parens else " ")
+        elif parens and depth:
+            out.append(" ")
+            if char in "'\"`[":
+                quote = "]" if char == "[" else char
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def _split(text: str, masked: str) -> list[str]:
+    """text split at the commas of its mask (the top-level ones)."""
+    parts, start = [], 0
+    for m in re.finditer(",", masked):
+        parts.append(text[start:m.start()].strip())
+        start = m.end()
+    return parts + [text[start:].strip()]
+
+
+def _default_name(expr: str) -> str:
+    """Column name SQLite gives a result column without an alias."""
+    m = _COLUMN.fullmatch(expr)
+    return (m[1] or m[2]) if m else expr
+
+
+@dataclass
+class _Plan:
+    """How to run a query as partial aggregates and merge the results."""
+    table: str
+    partial_sql: str
+    groups: int                                        # __g0.. key columns
+    merges: dict[str, str]                             # partial column -> sum/add/min/max
+    outputs: list[tuple[str, str, tuple[str, ...]]]    # (name, kind, partial columns)
+    order: list[tuple[int, bool]] = field(default_factory=list)   # (output, ascending)
+    limit: int | None = None
+    offset: int = 0
+
+
+def plan_query(sql: str) -> _Plan | None:
+    """A plan for running sql as partial aggregates, or None when the merge
+    couldn't reproduce its result (the query then runs serially)."""
+    sql = sql.strip().rstrip(";").rstrip()
+    masked = _mask(sql)
+    quoted_only = _mask(sql, parens=False)
+    if masked is None or ";" in masked:
+        return None
+    m = _SHAPE.fullmatch(masked)
+    if m is None or _UNSUPPORTED.search(masked) or len(_NESTED.findall(quoted_only)) != 1:
+        return None
+    part = {name: sql[m.start(name):m.end(name)] for name in m.groupdict() if m[name] is not None}
+    source = _TABLE.fullmatch(part["from"].strip())
+    if source is None:
+        return None
+
+    # Select list: (expr, alias, aggregate function or None, argument)
+    items = []
+    for text in _split(part["select"], m["select"]):
+        item_mask = _mask(text)
+        alias = None
+        if (a := _ALIAS.fullmatch(item_mask)) is not None:
+            expr_end, alias_at = (a.end(1), a.span(2)) if a[1] is not None else (a.end(3), a.span(4))
+            alias = text[slice(*alias_at)].strip('"')
+            text, item_mask = text[:expr_end].strip(), item_mask[:expr_end].strip()
+        call = _CALL.fullmatch(item_mask)
+        func = call[1].upper() if call is not None and call[1].upper() in _AGGREGATES else None
+        if func is not None:
+            arg = text[text.index("(") + 1:text.rindex(")")].strip()
+            arg_mask = _mask(arg)
+            if arg_mask is None or "," in arg_mask or _ANY_AGGREGATE.search(_mask(arg, parens=False)):
+                return None   # min(a, b) is not an aggregate; nested aggregates are errors
+            items.append((text, alias, func, arg))
+        elif _ANY_AGGREGATE.search(_mask(text, parens=False)):
+            return None       # e.g. SUM(x) / COUNT(*)
+        else:
+            items.append((text, alias, None, None))
+    if not any(func for _, _, func, _ in items):
+        return None
+
+    # Group keys, with ordinals and aliases resolved to expressions
+    groups: list[str] = []
+    if "group" in part:
+        aliases = {alias.lower(): expr for expr, alias, func, _ in items if alias and not func}
+        for term in _split(part["group"], m["group"]):
+            if term.isdigit():
+                k = int(term) - 1
+                if not 0 <= k < len(items) or items[k][2]:
+                    return None
+                term = items[k][0]
+            groups.append(aliases.get(term.strip('"').lower(), term))
+    group_keys = [normalize_sql(g) for g in groups]
+
+    select, merges, outputs = [], {}, []
+    for g, expr in enumerate(groups):
+        select.append(f'{expr} AS "__g{g}"')
+    for i, (expr, alias, func, arg) in enumerate(items):
+        name = alias or _default_name(expr)
+        if func is None:
+            if normalize_sql(expr) not in group_keys:
+                return None   # a bare column outside GROUP BY
+            outputs.append((name, "group", (f"__g{group_keys.index(normalize_sql(expr))}",)))
+        elif func == "AVG":
+            select += [f'TOTAL({arg}) AS "__a{i}s"', f'COUNT({arg}) AS "__a{i}c"']
+            merges.update({f"__a{i}s": "add", f"__a{i}c": "add"})
+            outputs.append((name, "avg", (f"__a{i}s", f"__a{i}c")))
+        else:
+            select.append(f'{func}({arg}) AS "__a{i}"')
+            merges[f"__a{i}"] = {"SUM": "sum", "COUNT": "add", "TOTAL": "add"}.get(func, func.lower())
+            outputs.append((name, "value", (f"__a{i}",)))
+
+    order = []
+    if "order" in part:
+        names = [normalize_sql(name) for name, _, _ in outputs]
+        exprs = [normalize_sql(expr) for expr, _, _, _ in items]
+        for term in _split(part["order"], m["order"]):
+            t = _ORDER_TERM.fullmatch(term)
+            key = normalize_sql(t[1].strip('"'))
+            if t[1].isdigit() and 0 < int(t[1]) <= len(outputs):
+                k = int(t[1]) - 1
+            elif key in names:
+                k = names.index(key)
+            elif normalize_sql(t[1]) in exprs:
+                k = exprs.index(normalize_sql(t[1]))
+            else:
+                return None   # sorting on something that isn't in the result
+            order.append((k, (t[2] or "ASC").upper() == "ASC"))
+
+    partial = f"SELECT {', '.join(select)}\nFROM {part['from']}"
+    if "where" in part:
+        partial += f"\nWHERE {part['where']}"
+    if groups:
+        partial += f"\nGROUP BY {', '.join(str(g + 1) for g in range(len(groups)))}"
+    return _Plan(source[1], partial, len(groups), merges, outputs, order,
+                 int(m["limit"]) if m["limit"] else None, int(m["offset"] or 0))
+
+
+def merge(plan: _Plan, partials: pd.DataFrame) -> pd.DataFrame:
+    """Combine the partial results of every worker into the query's result."""
+    keys = [f"__g{g}" for g in range(plan.groups)]
+    if keys:
+        grouped = partials.groupby(keys, dropna=False, sort=False)
+    else:
+        grouped = partials.groupby(np.zeros(len(partials), dtype=np.int8))
+    merged = {}
+    for column, how in plan.merges.items():
+        values = grouped[column]
+        match how:
+            case "sum":
+                merged[column] = values.sum(min_count=1)   # NULL if every row was NULL
+            case "add":
+                merged[column] = values.sum()
+            case "min":
+                merged[column] = values.min()
+            case "max":
+                merged[column] = values.max()
+    frame = pd.DataFrame(merged)
+    if keys:
+        # Groups in SQLite's order, NULL first
+        frame = frame.reset_index().sort_values(keys, na_position="first", kind="stable")
+    else:
+        frame = frame.reset_index(drop=True)
+
+    columns = []
+    for name, kind, sources in plan.outputs:
+        if kind == "avg":
+            total, count = (frame[c] for c in sources)
+            columns.append(total / count.where(count > 0))
+        else:
+            columns.append(frame[sources[0]])
+    result = pd.concat(columns, axis=1, ignore_index=True) if columns else pd.DataFrame()
+    # Stable sorts from the last key to the first; SQLite puts NULLs first
+    for k, ascending in reversed(plan.order):
+        result = result.sort_values(k, ascending=ascending, kind="stable",
+                                    na_position="first" if ascending else "last")
+    if plan.limit is not None or plan.offset:
+        end = None if plan.limit is None else plan.offset + plan.limit
+        result = result.iloc[plan.offset:end]
+    result.columns = [name for name, _, _ in plan.outputs]
+    return result.reset_index(drop=True)
+
+
+class FrameCursor:
+    """Minimal DB-API cursor over a DataFrame, so a merged result can be
+    paged through like any other (see QueryResult)."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.description = [(str(c), None, None, None, None, None, None) for c in frame.columns]
+        self._rows = iter(frame.itertuples(index=False, name=None))
+
+    def fetchmany(self, n: int) -> list[tuple]:
+        return [row for _, row in zip(range(n), self._rows)]
+
+    def fetchall(self) -> list[tuple]:
+        return list(self._rows)
+
+    def close(self) -> None:
+        self._rows = iter(())
+
+
+def _worker(pipe: Connection) -> None:
+    """Serve the partitions of one worker, a connection per table. Commands
+    come in on pipe; only "sync" and "query" are answered, with ("ok", result)
+    or ("error", message), where the error may come from any command since
+    the last answer."""
+    tables: dict[str, sqlite3.Connection] = {}
+    error = None
+    while (message := pipe.recv()) is not None:
+        command, *args = message
+        result = None
+        try:
+            match command:
+                case "load":     # name, serialized database holding the rows
+                    name, data = args
+                    db = sqlite3.connect(":memory:", check_same_thread=False)
+                    db.deserialize(data)
+                    db.execute("PRAGMA temp_store = MEMORY")   # as on the main connection
+                    if name in tables:
+                        tables.pop(name).close()
+                    tables[name] = db
+                case "view":     # name, database URI, first rowid, last rowid
+                    name, uri, low, high = args
+                    db = sqlite3.connect(f"{uri}?mode=ro", uri=True)
+                    db.execute("PRAGMA temp_store = MEMORY")
+                    # A temp view takes precedence over the table of the same name
+                    db.execute(f'CREATE TEMP VIEW "{name}" AS SELECT * FROM main."{name}" '
+                               f"WHERE rowid BETWEEN {int(low)} AND {int(high)}")
+                    if name in tables:
+                        tables.pop(name).close()
+                    tables[name] = db
+                case "drop":
+                    name, = args
+                    if name in tables:
+                        tables.pop(name).close()
+                case "query" if error is None:
+                    name, sql = args
+                    cursor = tables[name].execute(sql)
+                    result = ([d[0] for d in cursor.description], cursor.fetchall())
+        except sqlite3.Error as e:
+            error = error or str(e)
+        if command in ("sync", "query"):
+            pipe.send(("ok", result) if error is None else ("error", error))
+            error = None
+
+
+class ParallelExecutor:
+    """Pool of worker processes, each with one row range of every table a
+    parallel query has read so far."""
+
+    def __init__(self, workers: int | None = None, min_rows: int = PARALLEL_MIN_ROWS):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_rows = min_rows
+        self.queries = 0          # queries answered by the workers
+        self._pipes: list[Connection] = []
+        self._processes: list[multiprocessing.Process] = []
+        # Partitioned tables: name -> (version partitioned, rows)
+        self._partitions: dict[str, tuple[int, int]] = {}
+
+    def __str__(self) -> str:
+        tables = ", ".join(f"{name} ({rows:,} rows)" for name, (_, rows) in sorted(self._partitions.items()))
+        return (f"on, {self.workers} worker(s), tables of {self.min_rows:,}+ rows; "
+                f"{self.queries} query(ies) run in parallel; partitioned: {tables or 'none'}")
+
+    def _start(self) -> None:
+        if self._processes and all(p.is_alive() for p in self._processes):
+            return
+        self.close()
+        # spawn: forking a process that runs threads (the REPL's job thread) is unsafe
+        context = multiprocessing.get_context("spawn")
+        for _ in range(self.workers):
+            ours, theirs = context.Pipe()
+            process = context.Process(target=_worker, args=(theirs,), daemon=True,
+                                      name="sql-partition")
+            process.start()
+            theirs.close()
+            self._pipes.append(ours)
+            self._processes.append(process)
+
+    def close(self) -> None:
+        """Stop the workers; their partitions are rebuilt on next use."""
+        for process in self._processes:
+            process.kill()
+            process.join()
+        for pipe in self._pipes:
+            pipe.close()
+        self._pipes, self._processes = [], []
+        self._partitions.clear()
+
+    def _gather(self, mgr: "TableManager", label: str) -> list[tuple[str, Any]]:
+        """Wait for one reply from every worker, reporting progress; Ctrl-C
+        (mgr.interrupt()) stops the workers."""
+        replies: dict[Connection, tuple[str, Any]] = {}
+        while len(replies) < len(self._pipes):
+            if mgr._cancelled:
+                self.close()
+                raise sqlite3.OperationalError("interrupted")
+            for pipe in wait([p for p in self._pipes if p not in replies], _POLL_INTERVAL):
+                replies[pipe] = pipe.recv()
+            mgr._progress_note = f"{label}: {len(replies)}/{len(self._pipes)} partitions"
+        return [replies[p] for p in self._pipes]
+
+    def _send_all(self, message: tuple) -> None:
+        for pipe in self._pipes:
+            pipe.send(message)
+
+    def _partition(self, mgr: "TableManager", name: str) -> None:
+        """Give every worker its rowid range of `name`, unless it already has
+        the range of the current version."""
+        version = mgr.versions.get(name, 0)
+        if self._partitions.get(name, (None,))[0] == version:
+            return
+        self._partitions.pop(name, None)
+        low, high, rows = mgr.conn.execute(
+            f'SELECT min(rowid), max(rowid), count(*) FROM "{name}"').fetchone()
+        step = math.ceil((high - low + 1) / self.workers) if rows else 1
+        ranges = [((low or 0) + i * step, (low or 0) + (i + 1) * step - 1) for i in range(self.workers)]
+        if not mgr._in_memory:
+            # Workspace: each worker reads its range of the file in place
+            uri = Path(mgr.conn.execute("PRAGMA database_list").fetchone()[2]).as_uri()
+            for pipe, (first, last) in zip(self._pipes, ranges):
+                pipe.send(("view", name, uri, first, last))
+        else:
+            # Copy each range into a scratch database and ship it whole
+            # (serialized), which is far faster than sending rows
+            for i, (pipe, (first, last)) in enumerate(zip(self._pipes, ranges)):
+                if mgr._cancelled:
+                    self.close()
+                    raise sqlite3.OperationalError("interrupted")
+                mgr._progress_note = f"splitting {name}: {i}/{len(ranges)} partitions"
+                mgr.conn.execute(f"ATTACH DATABASE ':memory:' AS {_SCRATCH}")
+                try:
+                    mgr.conn.execute(f'CREATE TABLE {_SCRATCH}."{name}" AS SELECT * FROM main."{name}" '
+                                     f"WHERE rowid BETWEEN {first} AND {last}")
+                    data = mgr.conn.serialize(name=_SCRATCH)
+                finally:
+                    mgr.conn.execute(f"DETACH DATABASE {_SCRATCH}")
+                pipe.send(("load", name, data))
+                del data
+        self._send_all(("sync",))
+        errors = [reply for status, reply in self._gather(mgr, f"splitting {name}") if status == "error"]
+        if errors:
+            raise sqlite3.OperationalError(errors[0])
+        self._partitions[name] = (version, rows)
+
+    def run(self, mgr: "TableManager", sql: str) -> pd.DataFrame | None:
+        """Result of sql computed by the workers, or None when it should run
+        serially (not a supported aggregate, a small table, a worker error,
+        which the serial run then reports, or partials that can't be merged)."""
+        plan = plan_query(sql)
+        if plan is None:
+            return None
+        name = plan.table
+        try:
+            if name in mgr.tables:
+                rows = len(mgr.tables[name])
+            elif name in mgr.pending:
+                rows = mgr.conn.execute(f'SELECT max(rowid) FROM "{name}"').fetchone()[0] or 0
+            else:
+                return None   # a view, or a table the manager doesn't know
+        except sqlite3.Error:
+            return None       # e.g. a WITHOUT ROWID table
+        if rows < self.min_rows:
+            return None
+
+        self._start()
+        try:
+            # Free the partitions of tables dropped since
+            for gone in set(self._partitions) - set(mgr.tables) - set(mgr.pending):
+                self._send_all(("drop", gone))
+                del self._partitions[gone]
+            self._partition(mgr, name)
+            self._send_all(("query", name, plan.partial_sql))
+            replies = self._gather(mgr, "aggregating")
+        except (EOFError, OSError):
+            self.close()   # a worker died (e.g. out of memory): start over next time
+            return None
+        except sqlite3.OperationalError:
+            if mgr._cancelled:
+                raise
+            self._partitions.pop(name, None)
+            return None
+        if any(status == "error" for status, _ in replies):
+            return None
+        columns = replies[0][1][0]
+        partials = pd.concat([pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+                              for _, (_, rows) in replies], ignore_index=True)
+        try:
+            result = merge(plan, partials)
+        except TypeError:
+            # e.g. a GROUP BY key mixing numbers and text, which pandas can't
+            # sort the way SQLite does
+            return None
+        self.queries += 1
+        return result
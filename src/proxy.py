@@ -0,0 +1,93 @@
+"""
+Lazy stand-ins for tables in the Python namespace.
+
+A table that so far only exists in the database (written by SQL, or restored
+from a workspace) is bound as a TableProxy instead of a DataFrame. The first
+time Python touches it, the proxy pulls the table into pandas, replaces
+itself in the namespace with the real DataFrame and forwards the operation.
+Tables that Python never touches are never pulled, hashed or pushed.
+
+Operators are forwarded too, but pandas functions that insist on a real
+DataFrame would reject a proxy, so the front ends pull every table a command
+names up front, including inside the functions it calls (see
+router.names_reached).
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, MutableMapping
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from .manager import TableManager
+
+
+# Operators forwarded to the DataFrame (see _forward)
+_OPERATORS = (
+    "__add__", "__radd__", "__sub__", "__rsub__", "__mul__", "__rmul__",
+    "__truediv__", "__rtruediv__", "__floordiv__", "__rfloordiv__",
+    "__mod__", "__rmod__", "__pow__", "__rpow__", "__matmul__", "__rmatmul__",
+    "__and__", "__rand__", "__or__", "__ror__", "__xor__", "__rxor__",
+    "__eq__", "__ne__", "__lt__", "__le__", "__gt__", "__ge__",
+    "__neg__", "__pos__", "__abs__", "__invert__",
+)
+
+
+class TableProxy:
+    # Not `_mgr`: pandas reads that attribute of anything frame-like
+    __slots__ = ("_proxy_mgr", "_proxy_name", "_proxy_namespace")
+
+    def __init__(self, mgr: "TableManager", name: str, namespace: MutableMapping[str, Any]):
+        object.__setattr__(self, "_proxy_mgr", mgr)
+        object.__setattr__(self, "_proxy_name", name)
+        object.__setattr__(self, "_proxy_namespace", namespace)
+
+    def _resolve(self) -> "pd.DataFrame":
+        df = self._proxy_mgr.frame(self._proxy_name)
+        # Later lookups of the name get the DataFrame itself
+        if self._proxy_namespace.get(self._proxy_name) is self:
+            self._proxy_namespace[self._proxy_name] = df
+        return df
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._resolve(), attr, value)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._resolve()[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._resolve()[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        del self._resolve()[key]
+
+    def __len__(self) -> int:
+        return len(self._resolve())
+
+    def __iter__(self):
+        return iter(self._resolve())
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._resolve()
+
+    def __array__(self, dtype=None, copy=None):
+        return self._resolve().__array__(dtype, copy=copy)
+
+    def __repr__(self) -> str:
+        # Deliberately doesn't load the table
+        columns = self._proxy_mgr.table_columns().get(self._proxy_name, [])
+        return f"<table '{self._proxy_name}' ({len(columns)} columns, not loaded yet)>"
+
+
+def _forward(op: str):
+    # Operators are looked up on the type, so __getattr__ never sees them
+    def method(self, *args):
+        return getattr(self._resolve(), op)(*args)
+    method.__name__ = op
+    return method
+
+
+for _op in _OPERATORS:
+    setattr(TableProxy, _op, _forward(_op))
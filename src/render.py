@@ -0,0 +1,113 @@
+"""
+DataFrame -> rich Table rendering.
+
+Cells are formatted a column at a time (no per-row Series boxing), and frames
+wider than the terminal keep their leading and trailing columns with an
+elision column in between.
+"""
+
+from __future__ import annotations
+from typing import Callable
+
+from rich.console import Console
+from rich.table import Table
+
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Default preview caps; MAX_ROWS can be changed with `sql --max-rows N`
+MAX_ROWS = 50
+MAX_CELL_WIDTH = 40
+ELLIPSIS = "…"
+
+# Border + padding a rich Table adds around each column
+_COLUMN_OVERHEAD = 3
+
+
+def format_column(s: pd.Series, max_width: int = MAX_CELL_WIDTH) -> pd.Series:
+    """Format a whole column as display strings, truncated to max_width."""
+    if pd.api.types.is_float_dtype(s.dtype):
+        text = s.map("{:.6g}".format, na_action="ignore").astype(object)
+        text = text.where(s.notna(), "NaN")
+    else:
+        text = s.astype(str)
+    too_long = text.str.len() > max_width
+    if too_long.any():
+        text = text.where(~too_long, text.str.slice(0, max_width - 1) + ELLIPSIS)
+    return text
+
+
+def _fit_columns(n_cols: int, width_of: Callable[[int], int], available: int) -> tuple[int, int]:
+    """How many leading and trailing columns fit in `available` characters,
+    leaving room for the elision column when not all of them fit. Columns are
+    measured (and so formatted) only as far as needed."""
+    budget = available - (len(ELLIPSIS) + _COLUMN_OVERHEAD)
+    n_head = n_tail = 0
+    while n_head + n_tail < n_cols:
+        take_head = n_head <= n_tail
+        i = n_head if take_head else n_cols - 1 - n_tail
+        cost = width_of(i) + _COLUMN_OVERHEAD
+        if cost > budget:
+            break
+        budget -= cost
+        if take_head:
+            n_head += 1
+        else:
+            n_tail += 1
+    if n_head + n_tail == n_cols:
+        return n_head + n_tail, 0   # everything fits; no elision column needed
+    return max(n_head, 1), n_tail
+
+
+def build_table(df: pd.DataFrame, width: int, max_rows: int = MAX_ROWS,
+                max_cell_width: int = MAX_CELL_WIDTH) -> tuple[Table, int]:
+    """Rich Table previewing the first max_rows rows of df in `width` characters,
+    and the number of columns left out to make it fit."""
+    preview = df.head(max_rows)
+    headers = [str(c)[:max_cell_width] for c in df.columns]
+    formatted: dict[int, pd.Series] = {}
+
+    def column(i: int) -> pd.Series:
+        if i not in formatted:
+            formatted[i] = format_column(preview.iloc[:, i], max_cell_width)
+        return formatted[i]
+
+    def width_of(i: int) -> int:
+        text = column(i)
+        return max(len(headers[i]), int(text.str.len().max()) if len(text) else 0)
+
+    n_cols = df.shape[1]
+    n_head, n_tail = _fit_columns(n_cols, width_of, width)
+    shown = list(range(n_head)) + list(range(n_cols - n_tail, n_cols))
+    elided = n_cols - len(shown)
+
+    table = Table(show_header=True, header_style="bold cyan")
+    cells = []
+    for pos, i in enumerate(shown):
+        if elided and pos == n_head:
+            table.add_column(ELLIPSIS, style="grey50")
+            cells.append([ELLIPSIS] * len(preview))
+        numeric = pd.api.types.is_numeric_dtype(df.dtypes.iloc[i])
+        table.add_column(headers[i], justify="right" if numeric else "left",
+                         no_wrap=True, max_width=max_cell_width)
+        # Escape "[" so cell text isn't parsed as rich markup
+        cells.append(column(i).str.replace("[", r"\[", regex=False).tolist())
+    for row in zip(*cells):
+        table.add_row(*row)
+    return table, elided
+
+
+def render_df(console: Console, df: pd.DataFrame | None, max_rows: int = MAX_ROWS) -> None:
+    if df is None or df.empty:
+        console.print("[grey50]No results.[/]")
+        return
+    table, hidden_cols = build_table(df, console.width, max_rows)
+    console.print(table)
+    notes = []
+    if len(df) > max_rows:
+        notes.append(f"{len(df) - max_rows} more rows")
+    if hidden_cols:
+        notes.append(f"{hidden_cols} columns not shown")
+    if notes:
+        console.print(f"[grey62]... {', '.join(notes)}[/]")
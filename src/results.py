@@ -0,0 +1,117 @@
+"""
+Streaming query results: rows are fetched from the cursor a page at a time,
+and the full DataFrame is only built when something asks for it.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+
+# Rows fetched (and shown) per page
+PAGE_SIZE = 50
+
+
+@dataclass
+class Page:
+    frame: pd.DataFrame
+    start: int            # row number of the first row in frame
+    has_more: bool        # rows exist after this page
+
+
+class StaleResult(ValueError):
+    """The rest of a result can't be fetched: what it read has changed."""
+
+
+class QueryResult:
+    """Result of a SELECT, fetched lazily from a DB-API cursor.
+
+    `open_cursor(sql)` must return a cursor positioned at the first row and
+    `close_cursor(cursor)` release it. If the cursor is closed before all rows
+    were read (e.g. because the connection had to run a write), the query is
+    re-run from the start the next time more rows are needed. `versions()`,
+    if given, returns the versions of what the query reads (None if unknown);
+    when they differ by then, the re-run would mix in later data, so
+    StaleResult is raised instead.
+    """
+
+    def __init__(self, sql: str, open_cursor: Callable[[str], Any],
+                 close_cursor: Callable[[Any], None], page_size: int = PAGE_SIZE,
+                 versions: Callable[[], Any] | None = None):
+        self.sql = sql
+        self.page_size = page_size
+        self._open_cursor = open_cursor
+        self._close_cursor = close_cursor
+        self._versions = versions
+        self._read_versions = versions() if versions is not None else None
+        self._cursor = open_cursor(sql)
+        self.columns = [d[0] for d in self._cursor.description or []]
+        self._rows: list[tuple] = []
+        self.complete = False
+        self.page_no = 0
+        self._frame: pd.DataFrame | None = None
+        self._fetch(page_size + 1)   # one extra row tells us whether there is more
+
+    def _fetch(self, n: int | None) -> None:
+        """Fetch n more rows (all remaining if None)."""
+        if self.complete:
+            return
+        if self._cursor is None:
+            # Closed early: re-run from the start so all rows come from one run
+            if self._versions is not None and \
+                    (self._read_versions is None or self._versions() != self._read_versions):
+                raise StaleResult("The tables the last query read have changed since, so the "
+                                  "rest of its rows can't be fetched; run it again.")
+            if n is not None:
+                n += len(self._rows)
+            self._cursor = self._open_cursor(self.sql)
+            self.columns = [d[0] for d in self._cursor.description or []]
+            self._rows = []
+        rows = self._cursor.fetchall() if n is None else self._cursor.fetchmany(n)
+        self._rows.extend(rows)
+        if n is None or len(rows) < n:
+            self.complete = True
+            self.close()
+
+    def close(self) -> None:
+        if self._cursor is not None:
+            self._close_cursor(self._cursor)
+            self._cursor = None
+
+    def _to_frame(self, rows: list[tuple]) -> pd.DataFrame:
+        return pd.DataFrame.from_records(rows, columns=self.columns, coerce_float=True)
+
+    def page(self, page_no: int) -> Page:
+        page_no = max(page_no, 0)
+        start = page_no * self.page_size
+        end = start + self.page_size
+        if self._frame is None and len(self._rows) <= end:
+            self._fetch(end + 1 - len(self._rows))
+        n_rows = len(self._frame) if self._frame is not None else len(self._rows)
+        if start >= n_rows and page_no > 0:
+            return self.page(page_no - 1)   # ran past the end: stay on the last page
+        self.page_no = page_no
+        if self._frame is not None:
+            frame = self._frame.iloc[start:end]
+        else:
+            frame = self._to_frame(self._rows[start:end])
+            frame.index = pd.RangeIndex(start, start + len(frame))
+        return Page(frame, start, has_more=n_rows > end)
+
+    def next_page(self) -> Page:
+        return self.page(self.page_no + 1)
+
+    def prev_page(self) -> Page:
+        return self.page(self.page_no - 1)
+
+    def frame(self) -> pd.DataFrame:
+        """The full result as a DataFrame, fetching any remaining rows."""
+        if self._frame is None:
+            self._fetch(None)
+            self._frame = self._to_frame(self._rows)
+            self._rows = []   # the frame is now the only copy
+        return self._frame
@@ -7,15 +7,21 @@ Very small on purpose – keeps cli.py readable.
 """
 
 from __future__ import annotations
+import ast
 import re
+import types
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Mapping
 from pathlib import Path
 
+from .manager import TABLE_SUFFIXES
+
 if TYPE_CHECKING:
     from .manager import TableManager
 
 META_PATTERN = re.compile(r"^/\w+")
+# Start of a query given to /export in place of a table name
+QUERY_PATTERN = re.compile(r"(?:SELECT|WITH|VALUES|PRAGMA)\b", re.IGNORECASE)
 
 
 @dataclass
@@ -31,15 +37,26 @@ class MetaCommand:
                     raise ValueError("Usage: /create <table>")
                 mgr.create(args[0])
             case "/load":
-                if not args:
-                    raise ValueError("Usage: /load <table> [<table2> ...]")
-                loaded = []
-                for table_name in args:
-                    mgr.load(table_name)
-                    loaded.append(table_name)
-                if len(loaded) == 1:
-                    return f"Table '{loaded[0]}' loaded."
-                return f'Loaded tables: {", ".join(loaded)}.'
+                names = [a for a in args if not a.startswith("cols=")]
+                if not names:
+                    raise ValueError("Usage: /load <table> [<table2> ...] [cols=a,b]")
+                # Optional column projection, e.g. /load big cols=a,b
+                columns = None
+                for a in args:
+                    if a.startswith("cols="):
+                        columns = [c for c in a.removeprefix("cols=").split(",") if c]
+                # Files are read concurrently; see TableManager.load_many
+                mgr.load_many(names, columns)
+                if len(names) == 1:
+                    return f"Table '{names[0]}' loaded."
+                return f'Loaded tables: {", ".join(names)}.'
+            case "/import":
+                if len(args) != 2:
+                    raise ValueError("Usage: /import <table> <file.csv|.tsv|.jsonl|.parquet>")
+                name, filename = args
+                # Streamed in chunks; see TableManager.import_file
+                rows = mgr.import_file(name, filename)
+                return f"Imported {rows:,} rows into '{name}'."
             case "/list":
                 return mgr.list()
             case "/clear":
@@ -58,10 +75,10 @@ class MetaCommand:
                 return "All tables cleared."
             case "/save":
                 if len(args) < 1:
-                    raise ValueError("Usage: /save <table> [file.pkl]")
+                    raise ValueError("Usage: /save <table> [file.pkl|file.feather|file.parquet]")
                 name, *file = args
                 filename = file[0] if file else f"{name}.pkl"
-                if not filename.endswith(".pkl"):
+                if Path(filename).suffix not in TABLE_SUFFIXES:
                     filename = f"{Path(filename).stem}.pkl"
                 mgr.save(name, filename)
                 return f"Table '{name}' saved to {filename}"
@@ -70,13 +87,86 @@ class MetaCommand:
                 return f"Saved {len(mgr.tables)} table(s) to {mgr.temp_dir}"
             case "/export":
                 if len(args) < 1:
-                    raise ValueError("Usage: /export <table> [file.csv]")
+                    raise ValueError("Usage: /export <table> [file] | /export <query> <file>")
+                rest = self.raw.strip().split(None, 1)[1]
+                if QUERY_PATTERN.match(rest):
+                    # e.g. /export SELECT * FROM t WHERE x > 1 out.parquet
+                    if len(args) < 2:
+                        raise ValueError("Usage: /export <query> <file>")
+                    sql, filename = rest.rsplit(None, 1)
+                    rows = mgr.export_query(sql.rstrip().rstrip(";"), filename)
+                    return f"Exported {rows:,} rows to {filename}"
                 name, *file = args
                 filename = file[0] if file else f"{name}.csv"
-                if not filename.endswith(".csv"):
-                     filename = f"{Path(filename).stem}.csv"
-                mgr.export(name, filename)
-                return f"Table '{name}' exported to {filename}"
+                # Streamed in chunks; see TableManager.export
+                rows = mgr.export(name, filename)
+                return f"Table '{name}' exported to {filename} ({rows:,} rows)"
+            case "/next" | "/prev":
+                if mgr.last_result is None:
+                    raise ValueError("No query result to page through.")
+                if cmd == "/next":
+                    return mgr.last_result.next_page()
+                return mgr.last_result.prev_page()
+            case "/sync":
+                return f"Sync: {mgr.sync_stats}"
+            case "/stats":
+                match args:
+                    case []:
+                        summary = mgr.timings.summary()
+                        return summary if len(summary) else "No commands timed yet."
+                    case ["on" | "off" as state]:
+                        mgr.timings.show = state == "on"
+                        return f"Per-command timings {'shown' if mgr.timings.show else 'hidden'}."
+                    case ["reset"]:
+                        mgr.timings.reset()
+                        return "Timings reset."
+                    case _:
+                        raise ValueError("Usage: /stats [on|off|reset]")
+            case "/index":
+                match args:
+                    case []:
+                        indexes = mgr.indexes()
+                        return indexes if len(indexes) else "No indexes."
+                    case ["advise"]:
+                        suggestions = mgr.advisor.suggestions()
+                        return suggestions if len(suggestions) else "No repeated scans seen yet."
+                    case ["auto", "on" | "off" as state]:
+                        mgr.advisor.auto = state == "on"
+                        return f"Suggested indexes are {'created automatically' if mgr.advisor.auto else 'only suggested'}."
+                    case ["drop", name]:
+                        mgr.drop_index(name)
+                        return f"Index '{name}' dropped."
+                    case [table, *cols] if cols:
+                        columns = [c for arg in cols for c in arg.split(",") if c]
+                        name = mgr.create_index(table, columns)
+                        return f"Created index {name} on {table}({', '.join(columns)})."
+                    case _:
+                        raise ValueError("Usage: /index [<table> <col>[,<col>...] | drop <index> "
+                                         "| advise | auto on|off]")
+            case "/parallel":
+                match args:
+                    case []:
+                        return f"Parallel mode: {mgr.parallel or 'off'}"
+                    case ["on", *workers] if len(workers) <= 1 and all(w.isdigit() for w in workers):
+                        executor = mgr.enable_parallel(int(workers[0]) if workers else None)
+                        return f"Parallel mode on: {executor.workers} worker(s)."
+                    case ["off"]:
+                        mgr.disable_parallel()
+                        return "Parallel mode off."
+                    case _:
+                        raise ValueError("Usage: /parallel [on [<workers>] | off]")
+            case "/memory":
+                report = mgr.memory()
+                if not len(report):
+                    return "No tables loaded in pandas."
+                return report
+            case "/cache":
+                if args and args[0] == "clear":
+                    mgr.result_cache.clear()
+                    return "Result cache cleared."
+                if args:
+                    raise ValueError("Usage: /cache [clear]")
+                return f"Cache: {mgr.result_cache}"
             case "/schema":
                 if not args:
                      raise ValueError("Usage: /schema <table>")
@@ -85,17 +175,35 @@ class MetaCommand:
                 return (
                     "Meta Commands:\n"
                     "  /create <tbl>         : Create a new empty table\n"
-                    "  /load <tbl> [<tbl>...] : Load table(s) from auto-save directory\n"
+                    "  /load <tbl> [<tbl>...] [cols=a,b] : Load table(s) from auto-save directory\n"
+                    "  /import <tbl> <file>  : Stream a .csv/.tsv/.jsonl/.parquet file (optionally\n"
+                    "                          .gz/.bz2/.xz compressed) into a new table\n"
                     "  /clear <tbl> [<tbl>...] : Remove table(s) from memory and database\n"
                     "  /clear_all            : Remove all tables from memory and database\n"
-                    "  /save <tbl> [f.pkl]   : Save table to .pkl file (default: <tbl>.pkl)\n"
+                    "  /save <tbl> [f.pkl]   : Save table to .pkl/.feather/.parquet file (default: <tbl>.pkl)\n"
                     "  /save_all             : Save all current tables to default directory\n"
-                    "  /export <tbl> [f.csv] : Export table to .csv file (default: <tbl>.csv)\n"
+                    "  /export <tbl> [file]  : Export table to .csv/.jsonl/.parquet/.feather file,\n"
+                    "                          .csv/.jsonl optionally .gz compressed (default: <tbl>.csv)\n"
+                    "  /export <query> <file>: Export a query result, e.g. /export SELECT * FROM t out.parquet\n"
                     "  /list                 : List current tables\n"
                     "  /schema <tbl>         : Show table schema (columns and types)\n"
+                    "  /next, /prev          : Page through the last query result\n"
+                    "  /sync                 : Show how many table pushes were done vs. skipped\n"
+                    "  /index [<tbl> <cols>] : List indexes, or index columns of a table (kept across syncs)\n"
+                    "  /index drop <index>   : Drop an index\n"
+                    "  /index advise         : Show indexes suggested by repeated full scans\n"
+                    "  /index auto on|off    : Create suggested indexes automatically\n"
+                    "  /parallel [on [N]|off]: Run aggregates over large tables on N worker processes\n"
+                    "  /memory               : Show memory used per table, and saved by restoring dtypes\n"
+                    "  /cache [clear]        : Show query cache size and hit rate, or flush it\n"
+                    "  /stats [on|off|reset] : Show time spent per command phase; on/off toggles a\n"
+                    "                          breakdown after every command\n"
+                    "  /bg [<query>|cancel]  : Run a query in the background (result in _), show or stop it\n"
+                    "  /profile <command>    : Run one SQL, Python or /command under cProfile\n"
                     "  /help                 : Show this help message\n"
                     "  /exit                 : Quit the playground\n\n"
-                    "Enter Python code directly, or end with ';' for SQL."
+                    "Enter Python code directly, or end with ';' for SQL. From Python,\n"
+                    "sql(query, params) runs SQL with bound parameters and returns a DataFrame."
                  )
             case "/exit":
                 raise SystemExit
@@ -112,6 +220,56 @@ class SqlBlock:
 class PythonStmt:
     code: str
 
+    def names(self) -> set[str]:
+        """Names the code refers to, including inside nested functions and
+        attribute names (a superset of the globals it reads). Empty if the
+        code doesn't compile."""
+        try:
+            code = compile(self.code, "<input>", "exec")
+        except SyntaxError:
+            return set()
+        return code_names(code)
+
+
+def code_names(code: types.CodeType) -> set[str]:
+    """Global and attribute names used by code, including nested functions."""
+    names: set[str] = set()
+    stack = [code]
+    while stack:
+        code = stack.pop()
+        names.update(code.co_names)
+        stack.extend(c for c in code.co_consts if isinstance(c, types.CodeType))
+    return names
+
+
+def names_reached(names: set[str], namespace: Mapping[str, Any]) -> set[str]:
+    """`names` plus the names used by the functions they are bound to, and
+    by the functions those use, and so on."""
+    reached = set(names)
+    todo = list(names)
+    while todo:
+        value = namespace.get(todo.pop())
+        # Checked by type: looking up __code__ on a TableProxy would pull it
+        if isinstance(value, types.FunctionType):
+            new = code_names(value.__code__) - reached
+            reached |= new
+            todo.extend(new)
+    return reached
+
+
+def opens_python_block(text: str) -> bool:
+    """True if the first line of text is the header of a Python compound
+    statement, e.g. `with open(p) as fh:`, which starts like SQL's WITH."""
+    first = text.lstrip().split("\n", 1)[0]
+    for code in (first, first + "\n    pass"):
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            continue
+        return isinstance(tree.body[0], (ast.With, ast.AsyncWith, ast.For, ast.While, ast.If,
+                                         ast.Try, ast.FunctionDef, ast.ClassDef))
+    return False
+
 
 def classify(text: str) -> MetaCommand | SqlBlock | PythonStmt:
     stripped_text = text.strip()
@@ -127,7 +285,8 @@ def classify(text: str) -> MetaCommand | SqlBlock | PythonStmt:
         return SqlBlock(stripped_text) # Use stripped text for SQL check
     
     # Also treat as SQL block if it starts with common SQL keywords (no semicolon needed)
-    if stripped_text.upper().startswith(("SELECT ", "WITH ", "PRAGMA ", "EXPLAIN ")):
+    if stripped_text.upper().startswith(("SELECT ", "WITH ", "PRAGMA ", "EXPLAIN ")) \
+            and not opens_python_block(stripped_text):
         return SqlBlock(stripped_text)
 
     # Otherwise, it's Python. Use the original text for exec().
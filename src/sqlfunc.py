@@ -0,0 +1,43 @@
+"""
+The `sql()` function bound into the Python namespace.
+
+    sql("SELECT * FROM t WHERE x > ?", (0.5,))            # DataFrame
+    sql("SELECT * FROM t", chunksize=100_000)              # generator of DataFrames
+    sql("SELECT x, y FROM t", records=True)                # NumPy record array
+    for row in rows:
+        sql("INSERT INTO log VALUES (:id, :msg)", row)     # returns None
+
+It runs on the playground's own connection (see TableManager.sql), so Python
+code can query and update tables in a loop without leaving the command.
+Tables a statement modifies are rebound in the namespace, as a SQL command
+would leave them.
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Mapping, MutableMapping, Sequence
+
+if TYPE_CHECKING:
+    from .manager import TableManager
+
+
+class SqlFunction:
+    """sql(query, params=None, chunksize=None, records=False)
+
+    Run one SQL statement with bound parameters (a sequence for `?`
+    placeholders, a mapping for `:name` ones). A query returns a DataFrame,
+    or a NumPy record array with records=True; with chunksize, a generator
+    of those of up to that many rows each. Other statements return None.
+    """
+
+    __slots__ = ("_mgr", "_namespace")
+
+    def __init__(self, mgr: "TableManager", namespace: MutableMapping[str, Any]):
+        self._mgr = mgr
+        self._namespace = namespace
+
+    def __call__(self, query: str, params: Sequence | Mapping | None = None,
+                 chunksize: int | None = None, records: bool = False) -> Any:
+        return self._mgr.sql(query, params, chunksize, records, namespace=self._namespace)
+
+    def __repr__(self) -> str:
+        return "<function sql(query, params=None, chunksize=None, records=False)>"
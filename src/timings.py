@@ -0,0 +1,76 @@
+"""
+Per-command phase timings for the REPL.
+
+Each command is timed in phases (classify, execute, push, pull, completer,
+render). The last command's breakdown can be shown after its result, and
+totals are kept per command kind for `/stats`.
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass
+import time
+from typing import Iterator
+
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+PHASES = ("classify", "execute", "push", "pull", "completer", "render")
+
+
+@dataclass
+class _PhaseStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+class CommandTimings:
+    def __init__(self):
+        self.show = False    # print each command's breakdown after its result
+        self.kind = "other"  # "sql", "python" or "meta"; set while a command runs
+        self._current: dict[str, float] = {}
+        self._started = 0.0
+        self._stats: dict[tuple[str, str], _PhaseStats] = {}
+
+    def start(self) -> None:
+        self.kind = "other"
+        self._current = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the block as part of phase `name` of the current command."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current[name] = self._current.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self) -> str:
+        """Record the current command and return its breakdown as one line."""
+        total = time.perf_counter() - self._started
+        for name, seconds in self._current.items():
+            self._stats.setdefault((self.kind, name), _PhaseStats()).add(seconds)
+        self._stats.setdefault((self.kind, "total"), _PhaseStats()).add(total)
+        parts = [f"{name} {self._current[name] * 1000:.1f}" for name in PHASES if name in self._current]
+        return " · ".join(parts + [f"total {total * 1000:.1f} ms"])
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    def summary(self) -> pd.DataFrame:
+        """Totals per command kind and phase, in milliseconds."""
+        order = {name: i for i, name in enumerate(PHASES + ("total",))}
+        rows = [
+            (kind, name, s.count, s.total * 1000, s.total / s.count * 1000, s.max * 1000)
+            for (kind, name), s in sorted(self._stats.items(), key=lambda kv: (kv[0][0], order[kv[0][1]]))
+        ]
+        frame = pd.DataFrame(rows, columns=["command", "phase", "count", "total_ms", "mean_ms", "max_ms"])
+        return frame.round(2)
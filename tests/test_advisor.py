@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from src.advisor import ADVISE_AFTER, IndexAdvisor
+from src.engines import create_manager
+from src.router import MetaCommand
+
+
+@pytest.fixture
+def mgr(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    mgr.create("t", pd.DataFrame({"a": range(100), "b": [i % 7 for i in range(100)], "c": 1.5}))
+    mgr.create("u", pd.DataFrame({"b": range(7), "label": list("abcdefg")}))
+    return mgr
+
+
+def test_advisor_reads_scans_and_automatic_indexes():
+    advisor = IndexAdvisor()
+    tables = {"t": ["a", "b", "c"], "u": ["b", "label"]}
+    sql = "SELECT * FROM t AS x JOIN u ON x.b = u.b WHERE x.c > 2 AND a = 1"
+    plan = ["SCAN x", "BLOOM FILTER ON u (b=?)", "SEARCH u USING AUTOMATIC COVERING INDEX (b=?)"]
+    for _ in range(ADVISE_AFTER - 1):
+        assert advisor.observe(sql, plan, tables) == []
+    # Equality filters first; the join column is left to the inner table's index
+    assert advisor.observe(sql, plan, tables) == [("t", ("a", "c")), ("u", ("b",))]
+    assert advisor.observe(sql, plan, tables) == []            # suggested once
+    assert advisor.observe("SELECT * FROM t", ["SCAN t"], tables) == []
+    assert advisor.suggestions()["plans"].tolist() == [ADVISE_AFTER + 1] * 2
+
+
+def test_indexes_survive_full_pushes(mgr):
+    MetaCommand("/index t b,a").execute(mgr)
+    mgr.execute("CREATE INDEX by_c ON t (c)")                  # made in SQL
+    mgr.delta_sync = False
+    mgr.tables["t"]["a"] = mgr.tables["t"]["a"] * 2
+    mgr.push_all()
+    assert mgr.indexes().values.tolist() == [["t", "by_c", "c"], ["t", "ix_t_b_a", "b, a"]]
+    plan = mgr.query("EXPLAIN QUERY PLAN SELECT * FROM t WHERE b = 3").detail.tolist()
+    assert plan == ["SEARCH t USING INDEX ix_t_b_a (b=?)"]
+
+    mgr.tables["t"] = mgr.tables["t"].drop(columns="c")
+    mgr.push_all()                                             # by_c can't be rebuilt
+    assert mgr.indexes()["index"].tolist() == ["ix_t_b_a"]
+    with pytest.raises(ValueError, match="no column"):
+        mgr.create_index("t", ["zzz"])
+
+
+def test_repeated_scans_are_indexed_in_auto_mode(mgr):
+    MetaCommand("/index auto on").execute(mgr)
+    sql = "SELECT * FROM t JOIN u ON t.b = u.b WHERE t.a > 10"
+    for _ in range(ADVISE_AFTER):
+        mgr.stream(sql).frame()
+    hints = mgr.advisor.take_hints()
+    assert len(hints) == 2 and "Created index" in hints[0]
+    assert set(mgr.indexes()["index"]) == {"ix_t_a", "ix_u_b"}
+    assert mgr.advisor.take_hints() == []
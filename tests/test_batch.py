@@ -0,0 +1,108 @@
+import io
+
+import pandas as pd
+import pytest
+from rich.console import Console
+
+from src.batch import run_script, split_script
+from src.engines import create_manager
+from src.router import MetaCommand, PythonStmt, SqlBlock
+
+SCRIPT = '''\
+/create t
+t["a"] = range(5)
+q = """
+SELECT this stays Python
+"""
+
+def double(df):
+    df["a"] = df["a"] * 2
+
+-- comment
+SELECT sum(a) AS s FROM t; SELECT 2;
+CREATE TABLE u AS
+  SELECT a FROM t WHERE a > 2;
+update = 1
+double(t)
+SELECT sum(a) AS s FROM t
+'''
+
+
+def _run(mgr, script):
+    out, log = io.StringIO(), io.StringIO()
+    status = run_script(mgr, split_script(script), Console(file=out, width=120),
+                        Console(file=log, width=120))
+    return status, out.getvalue(), log.getvalue()
+
+
+def test_split_script_into_repl_blocks():
+    blocks = split_script(SCRIPT)
+    assert [(line, type(b)) for line, b in blocks] == [
+        (1, MetaCommand), (2, PythonStmt), (11, SqlBlock), (11, SqlBlock),
+        (12, SqlBlock), (14, PythonStmt), (16, SqlBlock),
+    ]
+    assert "SELECT this stays Python" in blocks[1][1].code
+    assert blocks[4][1].sql.endswith("a > 2;")
+
+
+def test_python_with_statement_is_not_sql(tmp_path):
+    path = tmp_path / "name.txt"
+    path.write_text("ada")
+    script = f"x = 1\nwith open({str(path)!r}) as fh:\n    name = fh.read()\nname\nSELECT 1;\n"
+    blocks = split_script(script)
+    assert [(line, type(b)) for line, b in blocks] == [(1, PythonStmt), (5, SqlBlock)]
+    status, out, log = _run(create_manager("sqlite", tmp_path), script)
+    assert status == 0 and "ada" in out
+
+
+def test_tables_sync_only_where_sql_needs_them(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    status, out, log = _run(mgr, SCRIPT)
+    assert status == 0
+    assert "20" in out.splitlines()[-2]            # sum after double(t) reached t
+    assert mgr.pending == {"u": ["a"]}              # never pulled into pandas
+    assert log.count("#") == 7 and "total" in log
+
+    mgr.create("other", pd.DataFrame({"b": [1]}))
+    pushed = mgr.sync_stats.pushed
+    # Python touching only `other`, then SQL naming only t: `other` waits
+    status, _, _ = _run(mgr, 'other["b"] = 2\nSELECT count(*) FROM t;\nx = 1')
+    assert status == 0
+    assert mgr.sync_stats.pushed == pushed + 1      # `other`, at the end only
+    assert mgr.query("SELECT b FROM other").b[0] == 2
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_sql_through_views_and_triggers_sees_python_changes(engine, tmp_path):
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+    mgr = create_manager(engine, tmp_path)
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    mgr.execute("CREATE VIEW v AS SELECT a FROM t")
+    status, out, _ = _run(mgr, 't["a"] = [10, 20, 30]\nSELECT sum(a) AS s FROM v;')
+    assert status == 0 and "60" in out
+    if engine == "sqlite":
+        mgr.create("log", pd.DataFrame({"n": [0]}))
+        mgr.create("u", pd.DataFrame({"b": [0]}))
+        mgr.execute("CREATE TRIGGER tr AFTER INSERT ON u BEGIN INSERT INTO log SELECT count(*) FROM t; END")
+        status, _, _ = _run(mgr, 't.loc[3] = [40]\nINSERT INTO u VALUES (1);')
+        assert status == 0
+        assert mgr.query("SELECT n FROM log").n.tolist() == [0, 4]
+
+
+def test_first_error_stops_the_script(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    status, out, log = _run(mgr, "x = 1\nSELECT * FROM missing;\nprint('not reached')")
+    assert status == 1
+    assert "Error in block 2 (sql, line 2)" in log and "missing" in log
+    assert "not reached" not in out
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_script_on_each_engine(engine, tmp_path):
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+    mgr = create_manager(engine, tmp_path)
+    mgr.create("t", pd.DataFrame({"a": [0, 0]}))
+    status, out, _ = _run(mgr, "t['a'] = [1, 2]\nUPDATE t SET a = a * 10;\nt.a.sum()")
+    assert status == 0 and out.strip().endswith("30")
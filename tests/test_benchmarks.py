@@ -0,0 +1,28 @@
+"""Smoke test so the benchmark suite keeps working as the code changes."""
+
+import json
+
+from benchmarks import parallel, run
+from benchmarks.data import SHAPES
+
+
+def test_generators_are_deterministic():
+    for make in SHAPES.values():
+        assert make(50).equals(make(50))
+
+
+def test_every_operation_runs_and_results_round_trip(tmp_path, capsys):
+    out = tmp_path / "bench.json"
+    run.main(["--rows", "200", "--shapes", "mixed", "--repeat", "1", "--save", str(out)])
+    saved = json.loads(out.read_text())
+    assert {r["op"] for r in saved["results"]} == set(run.OPERATIONS)
+
+    run.main(["--rows", "200", "--shapes", "mixed", "--ops", "push", "--repeat", "1",
+              "--compare", str(out)])
+    assert "vs base" in capsys.readouterr().out
+
+
+def test_parallel_benchmark_runs(capsys):
+    parallel.main(["--rows", "2000", "--workers", "1,2", "--queries", "group_by", "--repeat", "1"])
+    out = capsys.readouterr().out
+    assert out.count("group_by") == 3 and "speedup" in out
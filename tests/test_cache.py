@@ -0,0 +1,90 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.cache import ResultCache, is_cacheable, normalize_sql
+from src.manager import TableManager
+from src.router import classify
+
+
+@pytest.fixture
+def mgr(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    mgr = TableManager(conn, tmp_path)
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    mgr.create("u", pd.DataFrame({"b": [1]}))
+    yield mgr
+    conn.close()
+
+
+def test_normalize_keeps_literals():
+    assert normalize_sql("SELECT  a\nFROM t;") == normalize_sql("select a from T")
+    assert normalize_sql("SELECT 'A  B'") != normalize_sql("SELECT 'a b'")
+
+
+def test_nondeterministic_queries_are_not_cacheable():
+    assert is_cacheable("SELECT sum(a) FROM t")
+    assert not is_cacheable("SELECT random() FROM t")
+    assert not is_cacheable("SELECT date('now')")
+
+
+def test_read_versions_tracks_only_tables_read(mgr):
+    versions = mgr.read_versions("SELECT sum(a) FROM t")
+    assert set(versions) == {"t"}
+    assert mgr.read_versions("SELECT * FROM sqlite_master") is None
+
+
+def test_hit_until_table_changes(mgr):
+    cache = mgr.result_cache
+    sql = "SELECT sum(a) AS s FROM t"
+    cache.put(sql, mgr.query(sql), mgr.read_versions(sql))
+    assert cache.get(sql + ";", mgr.versions).s[0] == 6
+
+    # Pushing an unrelated table keeps the entry valid
+    mgr.tables["u"].loc[1] = [2]
+    mgr.push_all()
+    assert cache.get(sql, mgr.versions) is not None
+
+    mgr.tables["t"].loc[3] = [4]
+    mgr.push_all()
+    assert cache.get(sql, mgr.versions) is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_sql_write_invalidates(mgr):
+    sql = "SELECT count(*) AS n FROM t"
+    mgr.result_cache.put(sql, mgr.query(sql), mgr.read_versions(sql))
+    with mgr.track_writes() as written:
+        mgr.execute("DELETE FROM t WHERE a = 1")
+    mgr.refresh(written)
+    assert mgr.result_cache.get(sql, mgr.versions) is None
+
+
+def test_redefining_a_view_invalidates(mgr):
+    with mgr.track_writes():
+        mgr.execute("CREATE VIEW v AS SELECT a FROM t WHERE a < 3")
+    sql = "SELECT count(*) AS n FROM v"
+    assert set(mgr.read_versions(sql)) == {"t", "v"}
+    mgr.result_cache.put(sql, mgr.query(sql), mgr.read_versions(sql))
+    assert mgr.result_cache.get(sql, mgr.versions).n[0] == 2
+    with mgr.track_writes():
+        mgr.execute("DROP VIEW v; CREATE VIEW v AS SELECT a FROM t")
+    assert mgr.result_cache.get(sql, mgr.versions) is None
+
+
+def test_lru_eviction_by_size():
+    cache = ResultCache(max_bytes=3000)
+    frame = pd.DataFrame({"x": range(100)})   # ~800 bytes + index
+    for i in range(5):
+        cache.put(f"SELECT {i}", frame, {})
+    assert cache.nbytes <= 3000
+    assert cache.get("SELECT 0", {}) is None
+    assert cache.get("SELECT 4", {}) is not None
+
+
+def test_cache_command(mgr):
+    mgr.result_cache.put("SELECT 1", pd.DataFrame({"x": [1]}), {})
+    assert "1 result(s)" in classify("/cache").execute(mgr)
+    classify("/cache clear").execute(mgr)
+    assert len(mgr.result_cache) == 0
@@ -0,0 +1,46 @@
+from src.completer import PrefixTrie, TableCompleter
+from prompt_toolkit.completion import CompleteEvent
+from prompt_toolkit.document import Document
+import pandas as pd
+
+
+def _complete(completer, text):
+    event = CompleteEvent(completion_requested=True)
+    return [c.text for c in completer.get_completions(Document(text), event)]
+
+
+def test_trie_refcounts_and_prunes():
+    trie = PrefixTrie()
+    trie.add("amount")
+    trie.add("amount")
+    trie.add("Age")
+    assert sorted(trie.starting_with("A")) == ["Age", "amount"]
+    trie.remove("amount")
+    assert "amount" in set(trie.starting_with("am"))
+    trie.remove("amount")
+    assert list(trie.starting_with("am")) == []
+    assert "m" not in trie.children["a"].children   # branch pruned
+
+
+def test_columns_of_mentioned_tables_rank_first():
+    completer = TableCompleter(keywords=["SUM()"])
+    completer.sync({
+        "orders": ["order_id", "status"],
+        "users": ["user_id", "signup"],
+    })
+    assert _complete(completer, "SELECT s") == ["SUM()", "signup", "status"]
+    assert _complete(completer, "SELECT * FROM orders WHERE s") == ["status", "SUM()", "signup"]
+
+
+def test_sync_only_reindexes_changed_tables():
+    completer = TableCompleter(keywords=[])
+    df = pd.DataFrame({"a": [1]})
+    completer.sync({"t": df.columns, "u": ["b"]})
+    indexed = completer._columns["t"]
+    completer.sync({"t": df.columns})             # u dropped, t untouched
+    assert completer._columns["t"] is indexed
+    assert _complete(completer, "b") == []
+
+    df["alpha"] = [2]                             # new column
+    completer.sync({"t": df.columns})
+    assert _complete(completer, "al") == ["alpha"]
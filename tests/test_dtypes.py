@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dtypes import plain_nbytes, restore_dtypes
+from src.engines import create_manager
+from src.router import MetaCommand
+
+
+def _frame(n=1000):
+    return pd.DataFrame({
+        "color": pd.Categorical(np.resize(["red", "green", "blue"], n)),
+        "small": np.arange(n, dtype=np.int16),
+        "flag": np.arange(n) % 2 == 0,
+        "when": pd.date_range("2024-01-01", periods=n, freq="min"),
+        "where": pd.date_range("2024-01-01", periods=n, freq="min", tz="Europe/Paris"),
+        "took": pd.to_timedelta(np.arange(n), unit="s"),
+    })
+
+
+def test_dtypes_survive_a_sql_round_trip(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    mgr.create("t", _frame())
+    mgr.execute("UPDATE t SET color = 'purple' WHERE small = 0")
+    mgr.refresh(["t"])
+    df = mgr.frame("t")
+    assert df.dtypes.astype(str).tolist() == _frame().dtypes.astype(str).tolist()
+    assert df.color[0] == "purple" and df.color[1] == "green"   # new value kept
+    pd.testing.assert_frame_equal(df.iloc[1:].reset_index(drop=True),
+                                  _frame().iloc[1:].reset_index(drop=True), check_categorical=False)
+    mgr.push_all()
+    assert mgr.sync_stats.skipped == 1                           # pulled frame is unchanged
+
+
+def test_values_that_no_longer_fit_keep_the_pulled_dtype():
+    pulled = pd.DataFrame({"small": [1.0, None, 70000.0], "flag": [1, 0, None], "half": [0.5, 1, 2]})
+    saved = {"small": np.dtype("int16"), "flag": np.dtype(bool), "half": np.dtype("int64")}
+    df = restore_dtypes(pulled.copy(), saved)
+    assert df.small.dtype == "float64"                           # 70000 overflows int16
+    assert df.flag.dtype == "boolean" and df.flag.isna()[2]      # NULL -> nullable
+    assert df.half.dtype == "float64"                            # not whole numbers
+
+
+def test_memory_report(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    mgr.create("t", _frame())
+    mgr.create("u", pd.DataFrame({"a": [1, 2]}))
+    mgr.create("v", pd.DataFrame({"s": ["abc", "hello", None] * 100}))
+    assert plain_nbytes(mgr.tables["u"]) == mgr.tables["u"].memory_usage(deep=True).sum()
+    # The estimate is what a plain read gives on this pandas (str or object text)
+    for name in ("t", "v"):
+        plain = pd.read_sql_query(f"SELECT * FROM {name}", mgr.conn).memory_usage(deep=True).sum()
+        assert plain_nbytes(mgr.tables[name]) == pytest.approx(plain, rel=0.15)
+    report = MetaCommand("/memory").execute(mgr).set_index("table")
+    assert report.index.tolist() == ["t", "u", "v", "(total)"]
+    assert report.saved["t"] > 0.5 and abs(report.saved["v"]) < 0.05   # nothing restored in v
+    mgr.clear_all()
+    assert MetaCommand("/memory").execute(mgr) == "No tables loaded in pandas."
+
+
+def test_duckdb_pull_restores_dtypes(tmp_path):
+    pytest.importorskip("duckdb")
+    mgr = create_manager("duckdb", tmp_path)
+    mgr.create("t", _frame()[["small", "flag"]])
+    mgr.execute("UPDATE t SET small = small + 1")
+    mgr.refresh(["t"])
+    assert mgr.frame("t").dtypes.astype(str).tolist() == ["int16", "bool"]
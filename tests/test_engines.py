@@ -0,0 +1,103 @@
+from src.engines import create_manager
+import pandas as pd
+import pytest
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown engine"):
+        create_manager("oracle")
+
+
+@pytest.fixture
+def duck_manager(tmp_path):
+    pytest.importorskip("duckdb")
+    mgr = create_manager("duckdb", tmp_path)
+    yield mgr
+    mgr.conn.close()
+
+
+def test_duckdb_queries_registered_frames(duck_manager):
+    duck_manager.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    assert duck_manager.query("SELECT SUM(a) AS s FROM t")["s"].tolist() == [6]
+
+    # Python edits are visible after the next push
+    duck_manager.tables["t"]["b"] = ["x", "y", "z"]
+    duck_manager.push_all()
+    assert duck_manager.query("SELECT b FROM t WHERE a = 2")["b"].tolist() == ["y"]
+
+
+def test_duckdb_writes_are_pulled_back(duck_manager):
+    duck_manager.create("t", pd.DataFrame({"a": [1, 2]}))
+    with duck_manager.track_writes() as written:
+        duck_manager.execute("INSERT INTO t VALUES (3); CREATE TABLE u AS SELECT a * 10 AS b FROM t;")
+    assert written == {"t", "u"}
+
+    duck_manager.refresh(written)
+    assert duck_manager.frame("t")["a"].tolist() == [1, 2, 3]
+    assert duck_manager.frame("u")["b"].tolist() == [10, 20, 30]
+
+    with duck_manager.track_writes() as written:
+        duck_manager.execute("DROP TABLE u")
+    duck_manager.refresh(written)
+    assert duck_manager.list() == ["t"]
+
+
+def test_duckdb_write_targets_are_case_insensitive(duck_manager):
+    duck_manager.create("t", pd.DataFrame({"a": [1, 2]}))
+    with duck_manager.track_writes() as written:
+        duck_manager.execute("UPDATE T SET a = a * 10")
+    assert written == {"t"}
+    duck_manager.refresh(written)
+    assert duck_manager.frame("t")["a"].tolist() == [10, 20]
+
+
+def test_duckdb_read_set_is_case_insensitive(duck_manager):
+    duck_manager.create("t", pd.DataFrame({"a": [1, 2]}))
+    assert duck_manager.read_versions("SELECT count(*) FROM T") == {"t": duck_manager.versions["t"]}
+    assert duck_manager.read_versions("SELECT 42") is None
+
+
+def test_duckdb_push_skips_untouched_frames(duck_manager, monkeypatch):
+    import src.engines as engines
+    duck_manager.create("t", pd.DataFrame({"a": [1, 2, 3], "s": ["x", "y", "z"]}))
+    hashed = []
+    hash_rows = engines._hash_rows
+    monkeypatch.setattr(engines, "_hash_rows", lambda df: hashed.append(1) or hash_rows(df))
+    stats = duck_manager.sync_stats
+    pushed = stats.pushed
+    duck_manager.push_all()
+    assert (hashed, stats.pushed, stats.skipped) == ([], pushed, 1)
+
+    duck_manager.tables["t"].loc[0, "a"] = 100     # in place
+    duck_manager.push_all()
+    assert hashed and stats.pushed == pushed + 1
+    assert duck_manager.query("SELECT sum(a) AS s FROM t").s[0] == 105
+
+
+class _NoInternals:
+    """Stands in for a kept frame on a pandas without the block internals."""
+
+    def __init__(self, df):
+        self.index, self.columns = df.index, df.columns
+
+    @property
+    def _mgr(self):
+        raise RuntimeError("no block manager")
+
+
+def test_duckdb_push_hashes_when_pandas_internals_differ(duck_manager, monkeypatch):
+    import src.engines as engines
+    duck_manager.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    duck_manager._kept["t"] = _NoInternals(duck_manager.tables["t"])
+    hashed = []
+    hash_rows = engines._hash_rows
+    monkeypatch.setattr(engines, "_hash_rows", lambda df: hashed.append(df) or hash_rows(df))
+
+    duck_manager.push_all()
+    assert len(hashed) == 1 and duck_manager.sync_stats.pushed == 0
+
+    duck_manager._kept["t"] = _NoInternals(duck_manager.tables["t"])
+    duck_manager.tables["t"].loc[0, "a"] = 10      # in place
+    duck_manager.push_all()
+    assert len(hashed) == 2
+    assert duck_manager.query("SELECT SUM(a) AS s FROM t")["s"].tolist() == [15]
@@ -0,0 +1,85 @@
+import gzip
+import json
+
+import pandas as pd
+import pytest
+
+from src.engines import create_manager
+from src.router import MetaCommand
+
+
+@pytest.fixture
+def mgr(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    mgr.create("t", pd.DataFrame({"a": range(10), "b": [None] * 5 + list("vwxyz")}))
+    return mgr
+
+
+def test_query_is_streamed_in_chunks(mgr, tmp_path):
+    chunks = list(mgr._query_chunks("SELECT * FROM t", 4))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+
+    path = tmp_path / "out.csv.gz"
+    assert mgr.export_query("SELECT a, b FROM t WHERE a >= 3", path) == 7
+    with gzip.open(path, "rt") as f:
+        assert pd.read_csv(f).a.tolist() == list(range(3, 10))
+    assert mgr.progress() == "7 rows"
+
+
+def test_parquet_and_feather_keep_later_chunks_typed(mgr, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    # Column b is all NULL in the first chunk and text afterwards
+    monkeypatch.setattr("src.manager.BULK_CHUNK_ROWS", 4)
+    mgr.tables.clear()                             # stream t from the database
+    mgr.pending["t"] = ["a", "b"]
+    for name in ("out.parquet", "out.feather"):
+        assert mgr.export("t", tmp_path / name) == 10
+        df = pd.read_parquet(tmp_path / name) if name.endswith("parquet") else pd.read_feather(tmp_path / name)
+        assert df.b.tolist()[5:] == list("vwxyz") and df.b.isna().sum() == 5
+
+
+def test_export_errors_leave_no_file(mgr, tmp_path):
+    with pytest.raises(ValueError, match="Can't export"):
+        mgr.export("t", tmp_path / "out.xlsx")
+    with pytest.raises(ValueError, match="not found"):
+        mgr.export("missing", tmp_path / "out.csv")
+    mgr._cancelled = True                          # as if Ctrl-C was pressed
+    with pytest.raises(RuntimeError, match="interrupted"):
+        mgr.export_query("SELECT * FROM t", tmp_path / "out.csv")
+    assert list(tmp_path.glob("*out*")) == []
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_export_command(engine, tmp_path):
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+    mgr = create_manager(engine, tmp_path)
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    out = tmp_path / "t.jsonl"
+    assert MetaCommand(f"/export t {out}").execute(mgr) == f"Table 't' exported to {out} (3 rows)"
+    assert [json.loads(line)["a"] for line in out.read_text().splitlines()] == [1, 2, 3]
+
+    out = tmp_path / "big.csv"
+    assert MetaCommand(f"/export select a from t where a > 1; {out}").execute(mgr) == \
+        f"Exported 2 rows to {out}"
+    assert out.read_text().split() == ["a", "2", "3"]
+
+
+@pytest.mark.parametrize("name", ["out.parquet", "out.feather"])
+def test_arrow_export_widens_columns_later_chunks_dont_fit(mgr, tmp_path, name, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr("src.manager.BULK_CHUNK_ROWS", 4)
+    # A column without type affinity keeps each value's own type
+    mgr.conn.execute("CREATE TABLE m AS SELECT 1 AS n")
+    mgr.conn.execute("INSERT INTO m VALUES (2), (3), (4), (5.5), (NULL), (7), (8), ('x')")
+    read = pd.read_parquet if name.endswith("parquet") else pd.read_feather
+    assert mgr.export_query("SELECT n FROM m WHERE typeof(n) <> 'text'", tmp_path / name) == 8
+    assert read(tmp_path / name).n.tolist()[3:5] == [4.0, 5.5]
+    assert mgr.export_query("SELECT n FROM m", tmp_path / name) == 9
+    n = read(tmp_path / name).n
+    assert n.isna().sum() == 1 and n.dropna().tolist()[3:] == ["4", "5.5", "7", "8", "x"]
+
+
+def test_query_chunks_end_without_an_empty_chunk(mgr):
+    assert [len(c) for c in mgr._query_chunks("SELECT * FROM t", 5)] == [5, 5]
+    assert [len(c) for c in mgr._query_chunks("SELECT * FROM t WHERE a < 0", 5)] == [0]
@@ -0,0 +1,85 @@
+import gzip
+
+import pandas as pd
+import pytest
+
+from src.engines import create_manager
+from src.ingest import import_format, iter_chunks
+from src.router import MetaCommand
+
+
+@pytest.fixture
+def mgr(tmp_path):
+    return create_manager("sqlite", tmp_path)
+
+
+def test_csv_is_streamed_in_chunks_with_sampled_types(mgr, tmp_path):
+    path = tmp_path / "big.csv"
+    # The first chunk has whole numbers only; later ones a gap, then a fraction
+    path.write_text("id,x,name\n" + "".join(f"{i},{i},n{i}\n" for i in range(10))
+                    + "10,,n10\n11,1.5,n11\n")
+
+    chunks = [chunk for chunk, _ in iter_chunks(path, chunk_rows=5)]
+    assert [len(c) for c in chunks] == [5, 5, 2]
+    assert chunks[0].x.dtype == "Int64" and chunks[1].x.dtype == "Int64"
+    assert chunks[2].x.dtype == "float64"          # widened, not an error
+
+    assert mgr.import_file("big", path, chunk_rows=5) == 12
+    assert mgr.tables == {} and mgr.table_columns() == {"big": ["id", "x", "name"]}
+    df = mgr.frame("big")
+    assert df.x.isna().sum() == 1 and df.x.iloc[-1] == 1.5
+    assert mgr.progress() == "12 rows (100%)"
+
+
+def test_compressed_jsonl_and_parquet(mgr, tmp_path):
+    with gzip.open(tmp_path / "events.jsonl.gz", "wt") as f:
+        f.write('{"a": 1, "b": "x"}\n{"a": 2}\n{"a": 3, "b": "z"}\n')
+    assert mgr.import_file("events", tmp_path / "events.jsonl.gz", chunk_rows=2) == 3
+    assert mgr.query("SELECT count(b) AS n FROM events").n[0] == 2
+
+    pytest.importorskip("pyarrow")
+    pd.DataFrame({"k": range(7)}).to_parquet(tmp_path / "k.parquet")
+    assert mgr.import_file("k", tmp_path / "k.parquet", chunk_rows=3) == 7
+    assert mgr.query("SELECT sum(k) AS s FROM k").s[0] == 21
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_jsonl_key_first_seen_in_a_later_chunk_adds_a_column(engine, tmp_path):
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+    mgr = create_manager(engine, tmp_path)
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"a": 1}\n{"a": 2}\n{"a": 3, "c": 7}\n{"c": 8.5, "a": 4}\n{"a": 5, "c": "x"}\n')
+    assert mgr.import_file("events", path, chunk_rows=2) == 5
+    assert mgr.table_columns() == {"events": ["a", "c"]}
+    df = mgr.frame("events")
+    assert df.a.tolist() == [1, 2, 3, 4, 5]
+    assert df.c.isna().sum() == 2 and [float(v) for v in df.c[2:4]] == [7, 8.5] and df.c[4] == "x"
+
+
+def test_failed_import_leaves_no_table(mgr, tmp_path):
+    path = tmp_path / "t.csv"
+    path.write_text("a\n" + "1\n" * 10)
+    mgr._cancelled = True                          # as if Ctrl-C was pressed
+    with pytest.raises(RuntimeError, match="interrupted"):
+        mgr.import_file("t", path, chunk_rows=3)
+    assert mgr.list() == [] and "t" not in mgr._db_tables()
+
+    mgr.reset_progress()
+    mgr.create("t")
+    with pytest.raises(ValueError, match="already exists"):
+        mgr.import_file("t", path)
+    with pytest.raises(ValueError, match="Can't import"):
+        import_format(tmp_path / "t.xlsx")
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_import_command(engine, tmp_path):
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+    mgr = create_manager(engine, tmp_path)
+    path = tmp_path / "t.tsv"
+    path.write_text("a\tb\n1\tx\n2\ty\n")
+    assert MetaCommand(f"/import t {path}").execute(mgr) == "Imported 2 rows into 't'."
+    assert mgr.frame("t").b.tolist() == ["x", "y"]
+
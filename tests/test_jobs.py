@@ -0,0 +1,76 @@
+import _thread
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytest
+from rich.console import Console
+
+from src import jobs
+from src.jobs import Cancelled, run_job
+from src.manager import TableManager
+
+LONG_QUERY = ("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+              "SELECT count(*) FROM c")
+
+
+@pytest.fixture
+def mgr(tmp_path):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    return TableManager(conn, tmp_path)
+
+
+def test_run_job_returns_result(mgr):
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    assert run_job(lambda: mgr.query("SELECT sum(a) AS s FROM t"), mgr, Console()).s[0] == 6
+
+
+def test_progress_counts_steps(mgr):
+    mgr.reset_progress()
+    mgr.query("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100000) "
+              "SELECT count(*) FROM c")
+    assert mgr.progress() != "0 steps"
+    mgr.reset_progress()
+    assert mgr.progress() == "0 steps"
+
+
+def test_interrupt_stops_running_statement(mgr):
+    mgr.create("t", pd.DataFrame({"a": [1]}))
+    threading.Timer(0.2, mgr.interrupt).start()
+    with pytest.raises(Exception, match="interrupted"):
+        mgr.query(LONG_QUERY)
+    # The connection and tables are still usable afterwards
+    assert mgr.query("SELECT a FROM t").a.tolist() == [1]
+
+
+def test_ctrl_c_cancels_job(mgr, monkeypatch):
+    monkeypatch.setattr(jobs, "STATUS_DELAY", 0.01)
+    # Simulate Ctrl-C arriving on the main thread while the worker runs
+    threading.Timer(0.2, _thread.interrupt_main).start()
+    start = time.monotonic()
+    with pytest.raises(Cancelled):
+        run_job(lambda: mgr.query(LONG_QUERY), mgr, Console(quiet=True))
+    assert time.monotonic() - start < 5
+
+
+def test_background_query(mgr):
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    job = jobs.BackgroundQuery("SELECT sum(a) AS s FROM t", mgr)
+    job.wait(Console(quiet=True))
+    assert job.done() and job.result().s[0] == 6
+
+
+@pytest.mark.parametrize("delay", [0, 0.2])
+def test_background_query_cancel(mgr, delay):
+    # Cancelling before the statement has started must not be lost either
+    job = jobs.BackgroundQuery(LONG_QUERY, mgr)
+    time.sleep(delay)
+    job.cancel()
+    deadline = time.monotonic() + 5
+    while not job.done() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.done()
+    with pytest.raises(Exception):
+        job.result()
+    assert mgr.query("SELECT 1 AS a").a.tolist() == [1]
@@ -0,0 +1,236 @@
+from src.manager import TableManager
+import sqlite3
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def table_manager(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    yield TableManager(conn, tmp_path)
+    conn.close()
+
+
+def test_push_all_skips_unchanged_tables(table_manager):
+    table_manager.create("t1", pd.DataFrame({"a": [1, 2, 3]}))
+    table_manager.create("t2", pd.DataFrame({"b": ["x", "y"]}))
+
+    table_manager.push_all()
+    assert table_manager.sync_stats.pushed == 0
+    assert table_manager.sync_stats.skipped == 2
+
+    # Mutate one table in place; only it should be re-pushed
+    table_manager.tables["t1"].loc[0, "a"] = 99
+    table_manager.push_all()
+    assert table_manager.sync_stats.pushed + table_manager.sync_stats.delta == 1
+    assert table_manager.sync_stats.skipped == 3
+    assert pd.read_sql_query("SELECT a FROM t1", table_manager.conn)["a"].tolist() == [99, 2, 3]
+
+
+def test_push_all_skips_untouched_tables_without_hashing(table_manager, monkeypatch):
+    import src.manager as manager
+    if not manager._copy_on_write():
+        pytest.skip("needs copy-on-write")
+    table_manager.create("t", pd.DataFrame({"a": [1, 2, 3], "s": ["x", "y", "z"]}))
+    table_manager.create("u", pd.DataFrame({"a": [1]}))
+    hashed = []
+    hash_rows = manager._hash_rows
+    monkeypatch.setattr(manager, "_hash_rows", lambda df: hashed.append(df) or hash_rows(df))
+    table_manager.push_all()
+    assert hashed == [] and table_manager.sync_stats.skipped == 2
+
+    table_manager.tables["t"].loc[0, "s"] = "w"      # in place
+    table_manager.push_all(["t"])
+    assert len(hashed) == 1
+    assert _db_rows(table_manager, "t")[0] == (1, "w")
+    table_manager.tables["t"].columns = ["b", "s"]
+    table_manager.push_all(["t"])
+    assert [d[0] for d in table_manager.conn.execute("SELECT * FROM t").description] == ["b", "s"]
+
+
+def test_pulled_tables_are_not_pushed_back(table_manager):
+    table_manager.create("t1", pd.DataFrame({"a": [1, 2]}))
+    table_manager.conn.execute("INSERT INTO t1 VALUES (3)")
+    table_manager.refresh_all()
+    assert table_manager.tables["t1"]["a"].tolist() == [1, 2, 3]
+
+    table_manager.push_all()
+    assert table_manager.sync_stats.pushed == 0
+    assert table_manager.sync_stats.skipped == 1
+
+
+def _db_rows(mgr, name):
+    return mgr.conn.execute(f"SELECT * FROM {name} ORDER BY rowid").fetchall()
+
+
+def test_delta_push_inserts_updates_deletes(table_manager):
+    table_manager.create("t", pd.DataFrame({"a": range(10), "b": list("abcdefghij")}))
+    df = table_manager.tables["t"]
+    df.loc[3, "b"] = "changed"               # update
+    df.loc[10] = [10, "k"]                   # append
+    table_manager.tables["t"] = df.drop(index=[0])  # delete
+    table_manager.push_all()
+
+    stats = table_manager.sync_stats
+    assert (stats.delta, stats.pushed) == (1, 0)
+    assert (stats.rows_inserted, stats.rows_updated, stats.rows_deleted) == (1, 1, 1)
+    expected = list(table_manager.tables["t"].itertuples(index=False, name=None))
+    assert _db_rows(table_manager, "t") == expected
+
+
+def test_delta_push_falls_back_on_schema_change(table_manager):
+    table_manager.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    table_manager.tables["t"]["b"] = [1.5, None, 2.5]
+    table_manager.push_all()
+    assert (table_manager.sync_stats.delta, table_manager.sync_stats.pushed) == (0, 1)
+    assert _db_rows(table_manager, "t") == [(1, 1.5), (2, None), (3, 2.5)]
+
+
+@pytest.mark.parametrize("edit", [
+    lambda df: df.sort_values("a", ascending=False),
+    lambda df: pd.concat([df.iloc[:2], pd.DataFrame({"a": [99]}, index=[100]), df.iloc[2:]]),
+])
+def test_delta_push_keeps_row_order(table_manager, edit):
+    table_manager.create("t", pd.DataFrame({"a": range(10)}))
+    table_manager.tables["t"] = edit(table_manager.tables["t"])
+    table_manager.push_all()
+    assert table_manager.sync_stats.delta == 0
+    assert _db_rows(table_manager, "t") == [(a,) for a in table_manager.tables["t"].a]
+
+
+def test_delta_push_after_sql_changes(table_manager):
+    table_manager.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    table_manager.conn.execute("DELETE FROM t WHERE a = 2")
+    table_manager.conn.commit()
+    table_manager.refresh_all()
+
+    df = table_manager.tables["t"]
+    df.loc[df["a"] == 3, "a"] = 30
+    table_manager.push_all()
+    assert table_manager.sync_stats.delta == 1
+    assert _db_rows(table_manager, "t") == [(1,), (30,)]
+
+
+def test_track_writes_reports_only_modified_tables(table_manager):
+    table_manager.create("t1", pd.DataFrame({"a": [1, 2]}))
+    table_manager.create("t2", pd.DataFrame({"b": [3]}))
+    conn = table_manager.conn
+
+    with table_manager.track_writes() as written:
+        conn.execute("SELECT * FROM t1 JOIN t2").fetchall()
+    assert written == set()
+
+    with table_manager.track_writes() as written:
+        conn.executescript("UPDATE t1 SET a = a + 1; CREATE TABLE t3 AS SELECT * FROM t2; DROP TABLE t2;")
+    assert written == {"t1", "t2", "t3"}
+
+    table_manager.refresh(written)
+    assert table_manager.list() == ["t1", "t3"]
+    assert table_manager.frame("t1")["a"].tolist() == [2, 3]
+    assert table_manager.frame("t3")["b"].tolist() == [3]
+
+
+def test_bulk_push_matches_to_sql(table_manager):
+    df = pd.DataFrame({
+        "i": [1, 2, 3],
+        "f": [0.5, float("nan"), 2.0],
+        "s": ["a", None, "c"],
+        "d": pd.to_datetime(["2024-01-01 00:00:00", None, "2024-01-02 03:04:05.25"], format="ISO8601"),
+        "b": [True, False, True],
+        "n": pd.array([1, None, 3], dtype="Int64"),
+    })
+    table_manager.create("t", df)
+
+    reference = sqlite3.connect(":memory:")
+    df.to_sql("t", reference, index=False)
+    assert _db_rows(table_manager, "t") == _db_rows_conn(reference, "t")
+    assert (table_manager.conn.execute("PRAGMA table_info(t)").fetchall()
+            == reference.execute("PRAGMA table_info(t)").fetchall())
+
+
+def _db_rows_conn(conn, name):
+    return conn.execute(f"SELECT * FROM {name} ORDER BY rowid").fetchall()
+
+
+def test_save_all_and_load_feather_with_projection(table_manager):
+    pytest.importorskip("pyarrow")
+    table_manager.create("t", pd.DataFrame({"a": [1, 2], "b": ["x", "y"], "c": [0.5, 1.5]}))
+    table_manager.save_all_to_temp(table_manager.temp_dir)
+    assert sorted(p.name for p in table_manager.temp_dir.iterdir()) == ["t.feather"]
+
+    table_manager.clear("t")
+    table_manager.load("t", ["a", "c"])
+    assert list(table_manager.tables["t"].columns) == ["a", "c"]
+    assert table_manager.tables["t"]["a"].tolist() == [1, 2]
+
+
+def test_load_legacy_pickle_and_replace_it(table_manager):
+    pytest.importorskip("pyarrow")
+    pd.DataFrame({"a": [1, 2, 3]}).to_pickle(table_manager.temp_dir / "old.pkl")
+    table_manager.load("old")
+    assert table_manager.tables["old"]["a"].tolist() == [1, 2, 3]
+
+    table_manager.save_all_to_temp(table_manager.temp_dir)
+    assert sorted(p.name for p in table_manager.temp_dir.iterdir()) == ["old.feather"]
+
+
+def test_save_all_falls_back_to_pickle(table_manager):
+    pytest.importorskip("pyarrow")
+    # Mixed int/str object column: Arrow can't store it
+    table_manager.create("mixed", pd.DataFrame({"a": [1, "two", 3.0]}, dtype=object))
+    table_manager.save_all_to_temp(table_manager.temp_dir)
+    assert sorted(p.name for p in table_manager.temp_dir.iterdir()) == ["mixed.pkl"]
+
+
+def test_load_many_reads_concurrently_and_pushes_all(table_manager):
+    frames = {f"t{i}": pd.DataFrame({"a": range(i, i + 100)}) for i in range(5)}
+    for name, df in frames.items():
+        table_manager.create(name, df)
+    seen = []
+    table_manager.save_all_to_temp(table_manager.temp_dir, on_progress=lambda d, n: seen.append((d, n)))
+    assert seen[-1] == (5, 5)
+    assert not list(table_manager.temp_dir.glob(".*.tmp"))
+
+    table_manager.clear_all()
+    table_manager.load_many(list(frames))
+    assert table_manager.progress() == "5/5 tables"
+    for name, df in frames.items():
+        assert table_manager.query(f"SELECT sum(a) AS s FROM {name}").s[0] == df.a.sum()
+
+
+def test_load_many_loads_readable_tables_then_raises(table_manager):
+    table_manager.create("good", pd.DataFrame({"a": [1]}))
+    table_manager.save_all_to_temp(table_manager.temp_dir)
+    table_manager.clear("good")
+    (table_manager.temp_dir / "bad.pkl").write_bytes(b"not a pickle")
+
+    with pytest.raises(RuntimeError, match="bad"):
+        table_manager.load_many(["good", "bad"])
+    assert table_manager.list() == ["good"]
+
+
+def test_cancelled_save_keeps_pending_tables(table_manager):
+    table_manager.create("t", pd.DataFrame({"a": range(1000)}))
+    table_manager.create("u", pd.DataFrame({"b": [1]}))
+    table_manager.refresh(["t", "u"])              # both pending, as after SQL writes
+    table_manager.interrupt()                      # as if Ctrl-C was pressed
+    saved = set()
+    with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+        table_manager.save_all_to_temp(table_manager.temp_dir, saved=saved)
+    assert saved == set() and table_manager.list() == ["t", "u"]
+    assert list(table_manager.temp_dir.glob("*")) == []
+
+    table_manager.reset_progress()
+    table_manager.save_all_to_temp(table_manager.temp_dir, saved=saved)
+    assert saved == {"t", "u"}
+
+
+def test_interrupted_pull_keeps_the_table(table_manager):
+    table_manager.create("t", pd.DataFrame({"a": range(200_000)}))
+    table_manager.refresh(["t"])
+    table_manager.interrupt()
+    with pytest.raises(Exception, match="interrupted"):
+        table_manager.materialize(["t"])
+    table_manager.reset_progress()
+    assert list(table_manager.pending) == ["t"]
+    assert table_manager.frame("t").a.sum() == sum(range(200_000))
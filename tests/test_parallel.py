@@ -0,0 +1,125 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rich.console import Console
+
+from src.batch import run_script, split_script
+from src.engines import create_manager
+from src.parallel import plan_query
+from src.router import MetaCommand
+
+QUERIES = [
+    "SELECT count(*) FROM t WHERE x > 0.5",
+    "SELECT sum(x), avg(y) AS mean_y, min(name), max(y), total(x) FROM t",
+    "SELECT k, SUM(x) AS s, COUNT(*), AVG(y) FROM t GROUP BY k",
+    "SELECT name, k % 3 AS m, max(x) FROM t GROUP BY 1, m ORDER BY m DESC, 1",
+    'SELECT sum(x) "Sum x" FROM t AS z WHERE z.name = \'b\' GROUP BY k ORDER BY "Sum x" LIMIT 5 OFFSET 2;',
+]
+
+
+def _frame(n=20_000):
+    rng = np.random.default_rng(0)
+    x = rng.random(n)
+    x[::7] = np.nan
+    return pd.DataFrame({"k": rng.integers(0, 50, n), "x": x, "y": rng.normal(size=n),
+                         "name": np.array(["a", "b", None], dtype=object)[rng.integers(0, 3, n)]})
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT k, sum(x) FROM t GROUP BY k HAVING sum(x) > 1",
+    "SELECT count(DISTINCT k) FROM t",
+    "SELECT k, sum(x) / count(*) FROM t GROUP BY k",
+    "SELECT k, sum(x) FROM t",                          # k is not grouped
+    "SELECT sum(x) FROM t JOIN u USING (k)",
+    "SELECT sum(x) FROM t WHERE k IN (SELECT k FROM u)",
+    "SELECT max(x, y) FROM t",                          # scalar max
+    "SELECT k, sum(x) FROM t GROUP BY k ORDER BY avg(y)",
+    "SELECT * FROM t",
+])
+def test_queries_the_merge_cannot_reproduce_run_serially(sql):
+    assert plan_query(sql) is None
+
+
+def test_partial_query():
+    plan = plan_query("SELECT k % 3 AS m, avg(y), count(*) FROM t WHERE x > 'a, FROM' GROUP BY m;")
+    assert plan.table == "t"
+    assert plan.partial_sql == ('SELECT k % 3 AS "__g0", TOTAL(y) AS "__a1s", COUNT(y) AS "__a1c", '
+                                "COUNT(*) AS \"__a2\"\nFROM t\nWHERE x > 'a, FROM'\nGROUP BY 1")
+    assert [name for name, _, _ in plan.outputs] == ["m", "avg(y)", "count(*)"]
+
+
+@pytest.mark.parametrize("workspace", [False, True])
+def test_parallel_results_match_serial(workspace, tmp_path):
+    mgr = create_manager("sqlite", tmp_path, tmp_path / "ws.sqlite" if workspace else None)
+    mgr.create("t", _frame())
+    executor = mgr.enable_parallel(3)
+    executor.min_rows = 1000
+    try:
+        for n, sql in enumerate(QUERIES, 1):
+            pd.testing.assert_frame_equal(mgr.stream(sql).frame(), mgr.query(sql), check_dtype=False)
+            assert executor.queries == n
+        # Unsupported shapes and small tables fall back to the serial path
+        mgr.create("u", pd.DataFrame({"k": [1, 2]}))
+        assert mgr.stream("SELECT k, sum(x) FROM t GROUP BY k HAVING count(*) > 1").frame().shape == (50, 2)
+        assert mgr.stream("SELECT sum(k) FROM u").frame().iloc[0, 0] == 3
+        assert executor.queries == len(QUERIES)
+
+        # A changed table is split again
+        mgr.execute("UPDATE t SET x = 100 WHERE k = 3")
+        mgr.refresh(["t"])
+        sql = "SELECT k, max(x) AS top FROM t GROUP BY k ORDER BY top DESC LIMIT 1"
+        assert mgr.stream(sql).frame().values.tolist() == [[3, 100.0]]
+    finally:
+        mgr.disable_parallel()
+
+
+def test_unmergeable_groups_run_serially(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    mgr.create("t", pd.DataFrame({"x": np.arange(3000)}))
+    # A column without type affinity keeps numbers and text apart
+    mgr.execute("CREATE TABLE m AS SELECT CASE WHEN x % 3 = 0 THEN x % 2 ELSE 'a' END AS g, x FROM t")
+    mgr.refresh(["m"])
+    executor = mgr.enable_parallel(2)
+    executor.min_rows = 1000
+    try:
+        sql = "SELECT g, sum(x) FROM m GROUP BY g"
+        pd.testing.assert_frame_equal(mgr.stream(sql).frame(), mgr.query(sql))
+        assert executor.queries == 0
+    finally:
+        mgr.disable_parallel()
+
+
+def test_script_writes_invalidate_partitions(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    mgr.create("t", _frame(5000))
+    executor = mgr.enable_parallel(2)
+    executor.min_rows = 1000
+    out = io.StringIO()
+    try:
+        mgr.stream("SELECT sum(k) FROM t").frame()      # splits t
+        script = "UPDATE t SET k = 0;\nSELECT sum(k) AS s FROM t;\n"
+        assert run_script(mgr, split_script(script), Console(file=out), Console(file=io.StringIO())) == 0
+        assert executor.queries == 2
+    finally:
+        mgr.disable_parallel()
+    assert "│ 0 │" in out.getvalue()
+
+
+def test_parallel_command(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    assert MetaCommand("/parallel").execute(mgr) == "Parallel mode: off"
+    assert MetaCommand("/parallel on 2").execute(mgr) == "Parallel mode on: 2 worker(s)."
+    assert "2 worker(s)" in MetaCommand("/parallel").execute(mgr)
+    assert MetaCommand("/parallel off").execute(mgr) == "Parallel mode off."
+    assert mgr.parallel is None
+    with pytest.raises(ValueError, match="Usage"):
+        MetaCommand("/parallel on two").execute(mgr)
+
+
+def test_duckdb_has_no_parallel_mode(tmp_path):
+    pytest.importorskip("duckdb")
+    with pytest.raises(ValueError, match="sqlite engine"):
+        MetaCommand("/parallel on").execute(create_manager("duckdb", tmp_path))
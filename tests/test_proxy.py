@@ -0,0 +1,85 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.manager import TableManager
+from src.proxy import TableProxy
+from src.router import PythonStmt, names_reached
+
+
+@pytest.fixture
+def table_manager(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    mgr = TableManager(conn, tmp_path)
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    with mgr.track_writes() as written:
+        mgr.execute("UPDATE t SET a = a * 10; CREATE TABLE u AS SELECT a AS b FROM t;")
+    mgr.refresh(written)
+    yield mgr
+    conn.close()
+
+
+def test_sql_writes_leave_tables_unpulled(table_manager):
+    assert table_manager.tables == {}
+    assert table_manager.pending == {"t": ["a"], "u": ["b"]}
+    ns = {}
+    table_manager.bind(ns)
+    assert isinstance(ns["t"], TableProxy)
+    assert "not loaded" in repr(ns["t"]) and table_manager.tables == {}
+
+    # Pushes never look at tables Python hasn't touched
+    table_manager.push_all()
+    assert table_manager.sync_stats.skipped == 0
+
+
+def test_proxy_loads_and_replaces_itself_on_first_use(table_manager):
+    ns = {}
+    table_manager.bind(ns)
+    proxy = ns["t"]
+    assert proxy["a"].tolist() == [10, 20, 30]
+    assert isinstance(ns["t"], pd.DataFrame)
+    assert list(table_manager.tables) == ["t"]
+    assert np.asarray(ns["u"]).ravel().tolist() == [10, 20, 30]
+
+
+def test_mutation_through_proxy_is_pushed(table_manager):
+    ns = {}
+    table_manager.bind(ns)
+    # e.g. a function defined earlier that reaches the table via globals()
+    ns["t"]["c"] = ns["t"]["a"] + 1
+    table_manager.push_all()
+    assert table_manager.query("SELECT c FROM t").c.tolist() == [11, 21, 31]
+    assert "u" in table_manager.pending
+
+
+def test_proxy_of_dropped_table_raises(table_manager):
+    ns = {}
+    table_manager.bind(ns)
+    table_manager.clear("u")
+    with pytest.raises(ValueError, match="not found"):
+        len(ns["u"])
+
+
+def test_proxy_operators_and_pandas_functions(table_manager):
+    ns = {}
+    table_manager.bind(ns)
+    assert (ns["t"] * 2).a.tolist() == [20, 40, 60]
+    assert (ns["u"] == 20).b.tolist() == [False, True, False]
+    table_manager.refresh(["t"])
+    table_manager.bind(ns)
+    assert isinstance(ns["t"], TableProxy)
+    assert len(pd.concat([ns["t"], ns["t"]])) == 6
+
+
+def test_tables_reached_through_functions_are_pulled(table_manager):
+    ns = {}
+    table_manager.bind(ns)
+    exec("def both():\n    return pd.concat([t, helper()])\ndef helper():\n    return u", ns)
+    names = names_reached(PythonStmt("both()").names(), ns)
+    assert {"t", "u", "helper"} <= names
+    table_manager.materialize(names)
+    table_manager.bind(ns)
+    ns["pd"] = pd
+    assert len(eval("both()", ns)) == 6
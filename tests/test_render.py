@@ -0,0 +1,34 @@
+from src import render
+from rich.console import Console
+import io
+import numpy as np
+import pandas as pd
+
+
+def _render(df, width=80, max_rows=render.MAX_ROWS):
+    console = Console(file=io.StringIO(), width=width)
+    render.render_df(console, df, max_rows)
+    return console.file.getvalue()
+
+
+def test_format_column_truncates_and_formats_floats():
+    text = render.format_column(pd.Series([1 / 3, np.nan, 2.0]))
+    assert text.tolist() == ["0.333333", "NaN", "2"]
+    text = render.format_column(pd.Series(["x" * 50]), max_width=10)
+    assert text.tolist() == ["x" * 9 + render.ELLIPSIS]
+
+
+def test_wide_frames_elide_middle_columns():
+    df = pd.DataFrame(np.zeros((3, 100), dtype=int), columns=[f"col{i}" for i in range(100)])
+    table, hidden = render.build_table(df, width=80)
+    headers = [c.header for c in table.columns]
+    assert headers[0] == "col0" and headers[-1] == "col99"
+    assert render.ELLIPSIS in headers
+    assert hidden == 100 - (len(headers) - 1)
+    assert f"{hidden} columns not shown" in _render(df)
+
+
+def test_row_cap():
+    out = _render(pd.DataFrame({"a": range(30)}), max_rows=10)
+    assert "20 more rows" in out
+    assert "[x]" in _render(pd.DataFrame({"a": ["[x]"]}))   # not eaten as markup
@@ -0,0 +1,70 @@
+from src.manager import TableManager
+from src.router import classify
+from src.results import Page, StaleResult
+import sqlite3
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def table_manager(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    mgr = TableManager(conn, tmp_path)
+    mgr.create("t", pd.DataFrame({"a": range(120)}))
+    yield mgr
+    conn.close()
+
+
+def test_stream_fetches_one_page_at_a_time(table_manager):
+    result = table_manager.stream("SELECT a FROM t")
+    assert not result.complete
+
+    page = result.page(0)
+    assert page.frame["a"].tolist() == list(range(50))
+    assert page.has_more
+
+    page = classify("/next").execute(table_manager)
+    assert isinstance(page, Page)
+    assert page.start == 50 and page.frame.index[0] == 50
+
+    last = classify("/next").execute(table_manager)
+    assert last.frame["a"].tolist() == list(range(100, 120))
+    assert not last.has_more
+    # Paging past the end stays on the last page
+    assert classify("/next").execute(table_manager).start == 100
+    assert classify("/prev").execute(table_manager).start == 50
+
+
+def test_small_results_are_complete_immediately(table_manager):
+    result = table_manager.stream("SELECT COUNT(*) AS n FROM t")
+    assert result.complete
+    assert result.frame()["n"].tolist() == [120]
+
+
+def test_frame_materializes_rest(table_manager):
+    result = table_manager.stream("SELECT a FROM t")
+    result.page(0)
+    assert result.frame()["a"].tolist() == list(range(120))
+    assert result.complete
+
+
+def test_open_stream_does_not_block_writes(table_manager):
+    result = table_manager.stream("SELECT a FROM t")
+    table_manager.tables["t"] = pd.DataFrame({"a": [1], "b": [2]})
+    table_manager.push_all()   # schema change: DROP + CREATE
+    # Re-running the closed stream would mix in the new rows
+    with pytest.raises(StaleResult, match="run it again"):
+        result.frame()
+
+
+def test_closed_stream_reruns_when_nothing_changed(table_manager):
+    result = table_manager.stream("SELECT a FROM t")
+    table_manager.query("SELECT count(*) FROM t")   # closes the stream
+    assert classify("/next").execute(table_manager).frame["a"].tolist() == list(range(50, 100))
+    assert result.frame()["a"].tolist() == list(range(120))
+
+
+def test_paging_without_result():
+    mgr = TableManager(sqlite3.connect(":memory:"))
+    with pytest.raises(ValueError, match="No query result"):
+        classify("/next").execute(mgr)
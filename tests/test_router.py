@@ -81,4 +81,8 @@ def test_meta_schema(table_manager):
     assert df_schema['type'].tolist() == ['INTEGER', 'TEXT']
 
 # Add more tests for /load, /save, /export, /exit as needed
-# Remember to handle file operations appropriately (e.g., using tmp_path fixture) 
\ No newline at end of file
+# Remember to handle file operations appropriately (e.g., using tmp_path fixture) 
+
+def test_python_with_block_is_not_sql():
+    assert isinstance(classify("with open('f') as fh:\n    data = fh.read()"), PythonStmt)
+    assert isinstance(classify("WITH x AS (SELECT 1) SELECT * FROM x"), SqlBlock)
@@ -0,0 +1,116 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from rich.console import Console
+
+from src.batch import run_script, split_script
+from src.engines import create_manager
+from src.proxy import TableProxy
+
+
+@pytest.fixture
+def bound(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3, 4, 5], "b": list("vwxyz")}))
+    mgr.create("log", pd.DataFrame({"n": pd.Series([], dtype="int64")}))
+    ns = {}
+    mgr.bind(ns)
+    return mgr, ns
+
+
+def test_queries_with_bound_parameters(bound):
+    mgr, ns = bound
+    sql = ns["sql"]
+    assert sql("SELECT a FROM t WHERE a > ? AND b <> ?", (2, "x")).a.tolist() == [4, 5]
+    rec = sql("SELECT a, b FROM t WHERE a = :a", {"a": 3}, records=True)
+    assert isinstance(rec, np.recarray) and rec.tolist() == [(3, "x")]
+    assert sql("SELECT a FROM t WHERE a > 9").columns.tolist() == ["a"]
+    with pytest.raises(ValueError, match="chunksize"):
+        sql("SELECT 1", chunksize=0)
+
+
+def test_chunks(bound):
+    mgr, ns = bound
+    sql = ns["sql"]
+    chunks = sql("SELECT a FROM t ORDER BY a", chunksize=2)
+    assert [c.a.tolist() for c in chunks] == [[1, 2], [3, 4], [5]]
+    assert [len(c) for c in sql("SELECT a FROM t WHERE a > 9", chunksize=2)] == [0]
+    # The reader has its own cursor, so other statements can run in between
+    for chunk in sql("SELECT a FROM t", chunksize=2, records=True):
+        sql("INSERT INTO log VALUES (?)", (len(chunk),))
+    assert ns["log"].n.tolist() == [2, 2, 1]
+
+
+def test_writes_refresh_only_what_they_modify(bound):
+    mgr, ns = bound
+    sql = ns["sql"]
+    ns["t"].loc[0, "a"] = 100          # Python change, synced before the statement runs
+    assert sql("UPDATE t SET a = a + 1 WHERE a >= 100") is None
+    assert "t" in mgr.pending and "log" in mgr.tables
+    assert isinstance(ns["t"], TableProxy)
+    assert ns["t"].a.tolist() == [101, 2, 3, 4, 5]
+    rows = sql("INSERT INTO log VALUES (?), (?) RETURNING n", (7, 8))
+    assert rows.n.tolist() == [7, 8] and ns["log"].n.tolist() == [7, 8]
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_repeated_query_sees_python_changes(engine, tmp_path):
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+    mgr = create_manager(engine, tmp_path)
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    ns = {}
+    mgr.bind(ns)
+    assert ns["sql"]("SELECT sum(a) AS s FROM t").s[0] == 6
+    ns["t"]["a"] = [10, 20, 30]
+    assert ns["sql"]("SELECT sum(a) AS s FROM t").s[0] == 60
+
+
+def test_repeated_statements_skip_write_tracking(bound, monkeypatch):
+    mgr, ns = bound
+    tracked = []
+    track_writes = mgr.track_writes
+    monkeypatch.setattr(mgr, "track_writes", lambda: tracked.append(1) or track_writes())
+    for n in range(50):
+        ns["sql"]("INSERT INTO log VALUES (?)", (n,))
+    assert len(tracked) == 1
+    assert len(ns["log"]) == 50
+    assert mgr.sync_stats.skipped == 1       # log was checked for changes once
+
+
+def test_statement_analysed_again_until_it_can_be(bound, monkeypatch):
+    mgr, ns = bound
+    tables_used = mgr.tables_used
+    monkeypatch.setattr(mgr, "tables_used", lambda *a: None)   # e.g. a table didn't exist yet
+    ns["sql"]("SELECT a FROM t")
+    monkeypatch.setattr(mgr, "tables_used", tables_used)
+    ns["sql"]("SELECT a FROM t")
+    assert mgr._statements["SELECT a FROM t"].used == {"t"}
+
+
+def test_script_uses_sql(tmp_path):
+    mgr = create_manager("sqlite", tmp_path)
+    out = Console(file=io.StringIO(), width=120)
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    mgr.create("u", pd.DataFrame({"a": [0]}))
+    script = ("t['a'] *= 10\n"
+              "for a in sql('SELECT a FROM t', records=True).a:\n"
+              "    sql('INSERT INTO u VALUES (?)', (int(a),))\n"
+              "SELECT sum(a) AS s FROM u;\n")
+    assert run_script(mgr, split_script(script), out, out) == 0
+    assert "60" in out.file.getvalue()
+
+
+def test_duckdb(tmp_path):
+    pytest.importorskip("duckdb")
+    mgr = create_manager("duckdb", tmp_path)
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    ns = {}
+    mgr.bind(ns)
+    sql = ns["sql"]
+    assert sql("SELECT a FROM t WHERE a >= $lo", {"lo": 2}).a.tolist() == [2, 3]
+    assert [len(c) for c in sql("SELECT a FROM t", chunksize=2)] == [2, 1]
+    assert sql("INSERT INTO t VALUES (?)", (4,)) is None
+    assert ns["t"].a.tolist() == [1, 2, 3, 4]
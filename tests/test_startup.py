@@ -0,0 +1,45 @@
+"""Startup guard: importing the CLI must not pull in heavy modules.
+
+Runs `python -X importtime` in a fresh interpreter; each line it prints is a
+module that was actually executed, so lazily imported modules don't show up
+until first use.
+"""
+
+from pathlib import Path
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Imported on first use only (pandas when a DataFrame is needed, etc.)
+DEFERRED = ("numpy", "pandas", "pyarrow", "duckdb")
+
+
+def _import_times(code: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of every module imported by code."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_startup_defers_heavy_imports():
+    # Everything main() does before the first prompt
+    times = _import_times(
+        "import src.cli as cli; from src.engines import create_manager; "
+        "cli.TableCompleter().sync(create_manager('sqlite').tables)"
+    )
+    assert "src.cli" in times
+    loaded = [m for m in times if m.split(".")[0] in DEFERRED]
+    assert not loaded, f"imported at startup: {loaded}"
+
+
+def test_lazy_module_loads_on_first_use():
+    times = _import_times("from src.cli import pd; pd.DataFrame")
+    # The lazily created package itself isn't listed, but its submodules are
+    assert "pandas.core.frame" in times
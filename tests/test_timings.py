@@ -0,0 +1,58 @@
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytest
+from rich.console import Console
+
+from src.jobs import inline_jobs, run_job
+from src.manager import TableManager
+from src.router import classify
+from src.timings import CommandTimings
+
+
+@pytest.fixture
+def table_manager(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    yield TableManager(conn, tmp_path)
+    conn.close()
+
+
+def test_phases_accumulate_per_command_kind():
+    timings = CommandTimings()
+    for _ in range(2):
+        timings.start()
+        timings.kind = "sql"
+        with timings.phase("execute"):
+            time.sleep(0.01)
+        with timings.phase("render"):
+            pass
+        line = timings.finish()
+    assert line.startswith("execute ") and line.endswith(" ms")
+
+    summary = timings.summary().set_index("phase")
+    assert summary.loc["execute", "count"] == 2
+    assert summary.loc["execute", "total_ms"] >= 20
+    assert list(summary.index) == ["execute", "render", "total"]
+
+
+def test_stats_command(table_manager):
+    assert classify("/stats").execute(table_manager) == "No commands timed yet."
+    classify("/stats on").execute(table_manager)
+    assert table_manager.timings.show
+
+    table_manager.timings.start()
+    table_manager.timings.finish()
+    assert isinstance(classify("/stats").execute(table_manager), pd.DataFrame)
+    classify("/stats reset").execute(table_manager)
+    assert classify("/stats").execute(table_manager) == "No commands timed yet."
+    with pytest.raises(ValueError, match="Usage"):
+        classify("/stats sometimes").execute(table_manager)
+
+
+def test_inline_jobs_run_on_calling_thread(table_manager):
+    with inline_jobs():
+        thread = run_job(threading.get_ident, table_manager, Console(quiet=True))
+    assert thread == threading.get_ident()
+    assert run_job(threading.get_ident, table_manager, Console(quiet=True)) != thread
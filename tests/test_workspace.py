@@ -0,0 +1,75 @@
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.engines import create_manager
+from src.router import PythonStmt
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    return tmp_path / "ws.sqlite"
+
+
+def test_workspace_tables_survive_sessions(workspace, tmp_path):
+    mgr = create_manager("sqlite", tmp_path, workspace)
+    assert mgr.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    mgr.create("t", pd.DataFrame({"a": [1, 2, 3]}))
+    mgr.tables["t"].loc[3] = [4]
+    mgr.push_all()
+    mgr.conn.close()
+
+    mgr = create_manager("sqlite", tmp_path, workspace)
+    assert mgr.list() == ["t"]
+    assert mgr.tables == {}                   # nothing pulled yet
+    assert mgr.table_columns() == {"t": ["a"]}
+    assert mgr.query("SELECT sum(a) AS s FROM t").s[0] == 10
+
+
+def test_pending_tables_materialize_when_named(workspace, tmp_path):
+    mgr = create_manager("sqlite", tmp_path, workspace)
+    mgr.create("t", pd.DataFrame({"a": [1]}))
+    mgr.create("u", pd.DataFrame({"b": [2]}))
+    mgr.conn.close()
+
+    mgr = create_manager("sqlite", tmp_path, workspace)
+    assert mgr.materialize(PythonStmt("t['a'] = t['a'] * 10").names()) == ["t"]
+    assert list(mgr.tables) == ["t"] and list(mgr.pending) == ["u"]
+
+    # SQL writes to a pending table leave it pending (the database is current)
+    with mgr.track_writes() as written:
+        mgr.execute("ALTER TABLE u ADD COLUMN c")
+    mgr.refresh(written)
+    assert mgr.pending == {"u": ["b", "c"]}
+
+    mgr.clear("u")
+    assert mgr.list() == ["t"]
+    with pytest.raises(sqlite3.OperationalError):
+        mgr.conn.execute("SELECT * FROM u")
+
+
+def test_workspace_requires_sqlite(workspace):
+    pytest.importorskip("duckdb")
+    with pytest.raises(ValueError, match="sqlite"):
+        create_manager("duckdb", None, workspace)
+
+
+def test_workspace_keeps_dtypes(workspace, tmp_path):
+    mgr = create_manager("sqlite", tmp_path, workspace)
+    df = pd.DataFrame({"c": pd.Categorical(list("xyx"), categories=list("yx"), ordered=True),
+                       "n": pd.Series([1, 2, 3], dtype="int8"), "f": [True, False, True],
+                       "w": pd.date_range("2024-01-01", periods=3, tz="Europe/Paris")})
+    mgr.create("t", df)
+    mgr.create("u", pd.DataFrame({"a": pd.Series([1], dtype="int16")}))
+    mgr.clear("u")
+    mgr.conn.close()
+
+    mgr = create_manager("sqlite", tmp_path, workspace)
+    assert mgr.list() == ["t"]                # the dtype table isn't a user table
+    mgr.materialize(["t"])
+    assert mgr.tables["t"].dtypes.equals(df.dtypes)
+    # Kept as JSON text, so opening a workspace runs no code from it
+    (name, text), = mgr.conn.execute("SELECT name, dtypes FROM __playground_dtypes").fetchall()
+    assert name == "t" and json.loads(text)[0] == ["c", {"categories": ["y", "x"], "ordered": True}]